@@ -0,0 +1,70 @@
+"""
+Compare the time taken to load a directory of STIX 2 bundles into a memory store using a thread pool (the previous implementation) and `io.get_stix2_data_source_from_directory`, and then to query the techniques in it (which is when `io.RawMemorySource` parses objects).
+
+Each loader is run `--repeat` times and the fastest run is reported. A synthetic directory with one bundle per object is generated (e.g., `python benchmarks/load_directory.py --techniques 1000`).
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import tempfile
+import time
+
+import stix2
+from stix2.datastore.memory import MemoryStore
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mitre_attack_navigator_layer_builder import io, util
+from tests.bundles import new_attack_bundle
+
+
+def load_with_threads(path: str) -> MemoryStore:
+    def f(path: str) -> list:
+        return util.read_json_file(path)['objects']
+
+    paths = [os.path.join(root, file) for root, _, files in os.walk(path) for file in files]
+    memory_store = MemoryStore()
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        for bundle in executor.map(f, paths):
+            for row in bundle:
+                memory_store.add(row)
+    return memory_store
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--techniques', type=int, default=1000)
+    parser.add_argument('--chunk-size', type=int, default=256)
+    parser.add_argument('--repeat', type=int, default=3, help='The number of times to run each loader (the fastest run is reported).')
+    args = parser.parse_args()
+
+    bundle = new_attack_bundle(total_techniques=args.techniques, total_groups=100, total_software=100, total_campaigns=20)
+    with tempfile.TemporaryDirectory() as directory:
+        for o in bundle['objects']:
+            subdirectory = os.path.join(directory, o['type'])
+            os.makedirs(subdirectory, exist_ok=True)
+            with open(os.path.join(subdirectory, f"{o['id']}.json"), 'w') as fp:
+                json.dump({'type': 'bundle', 'id': bundle['id'], 'objects': [o]}, fp)
+
+        print(f"Loading {len(bundle['objects'])} files ({os.cpu_count()} CPUs)")
+        for label, f in [
+            ('threads', lambda: load_with_threads(directory)),
+            ('jobs=1', lambda: io.get_stix2_data_source_from_directory(directory, memory=True, jobs=1, chunk_size=args.chunk_size)),
+            ('jobs=2', lambda: io.get_stix2_data_source_from_directory(directory, memory=True, jobs=2, chunk_size=args.chunk_size)),
+            ('jobs=4', lambda: io.get_stix2_data_source_from_directory(directory, memory=True, jobs=4, chunk_size=args.chunk_size)),
+            ('jobs=0 (all CPUs)', lambda: io.get_stix2_data_source_from_directory(directory, memory=True, jobs=0, chunk_size=args.chunk_size)),
+        ]:
+            load_times, query_times = [], []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                store = f()
+                load_times.append(time.perf_counter() - start)
+                techniques = store.query([stix2.Filter('type', '=', 'attack-pattern')])
+                query_times.append(time.perf_counter() - start)
+            print(f"{label:<30} load: {min(load_times) * 1000:10.1f} ms, load + query: {min(query_times) * 1000:10.1f} ms ({len(techniques)} techniques)")
+
+
+if __name__ == "__main__":
+    main()
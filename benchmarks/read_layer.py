@@ -0,0 +1,45 @@
+"""
+Compare the time taken to decode layers using dacite and `serialization.decode_layer`.
+
+The example layers are scaled up by repeating their techniques (e.g., `python benchmarks/read_layer.py --scale 20`).
+"""
+import argparse
+import glob
+import os
+import timeit
+
+import dacite
+
+from mitre_attack_navigator_layer_builder import serialization, util
+from mitre_attack_navigator_layer_builder.layers import Layer
+
+LAYERS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples', 'layers')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=10, help='Number of times to repeat the techniques in each layer')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    for path in sorted(glob.glob(os.path.join(LAYERS_DIR, '*.json'))):
+        o = util.read_json_file(path)
+        o['techniques'] = o['techniques'] * args.scale
+        rows.append(o)
+
+    total_techniques = sum(len(o['techniques']) for o in rows)
+    print(f"Decoding {len(rows)} layers with {total_techniques} techniques ({args.repeat} repetitions)")
+
+    for label, f in [
+        ('dacite', lambda: [dacite.from_dict(data_class=Layer, data=o) for o in rows]),
+        ('decode_layer(strict=True)', lambda: [serialization.decode_layer(o, strict=True) for o in rows]),
+        ('decode_layer()', lambda: [serialization.decode_layer(o) for o in rows]),
+        ('decode_layer(compact=True)', lambda: [serialization.decode_layer(o, compact=True) for o in rows]),
+    ]:
+        t = min(timeit.repeat(f, number=1, repeat=args.repeat))
+        print(f"{label:<30} {t * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
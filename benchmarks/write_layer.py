@@ -0,0 +1,43 @@
+"""
+Compare the time taken to encode layers using `dataclasses.asdict` + `util.prune_dict` + `json.dumps`, and `serialization.encode_layer`.
+
+The example layers are scaled up by repeating their techniques (e.g., `python benchmarks/write_layer.py --scale 20`).
+"""
+import argparse
+import glob
+import json
+import os
+import timeit
+
+from mitre_attack_navigator_layer_builder import serialization, util
+from mitre_attack_navigator_layer_builder.util import JSONEncoder
+
+LAYERS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples', 'layers')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=10, help='Number of times to repeat the techniques in each layer')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    for path in sorted(glob.glob(os.path.join(LAYERS_DIR, '*.json'))):
+        o = util.read_json_file(path)
+        o['techniques'] = o['techniques'] * args.scale
+        rows.append(serialization.decode_layer(o))
+
+    total_techniques = sum(len(layer.techniques) for layer in rows)
+    print(f"Encoding {len(rows)} layers with {total_techniques} techniques ({args.repeat} repetitions)")
+
+    for label, f in [
+        ('asdict + prune_dict + json', lambda: [json.dumps(util.prune_dict(layer.__dict__()), cls=JSONEncoder, indent=4) for layer in rows]),
+        ('encode_layer()', lambda: [serialization.encode_layer(layer) for layer in rows]),
+        ('encode_layer(indent=None)', lambda: [serialization.encode_layer(layer, indent=None) for layer in rows]),
+    ]:
+        t = min(timeit.repeat(f, number=1, repeat=args.repeat))
+        print(f"{label:<30} {t * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
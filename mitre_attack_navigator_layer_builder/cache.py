@@ -0,0 +1,136 @@
+import contextlib
+from dataclasses import dataclass
+import hashlib
+import logging
+import os
+import pickle
+from typing import Any, Callable, List, Optional
+
+import stix2
+
+from mitre_attack_navigator_layer_builder import util
+from mitre_attack_navigator_layer_builder.constants import DEFAULT_BUNDLE_CACHE_DIR, DEFAULT_BUNDLE_CACHE_MAX_SIZE
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE_EXTENSION = '.pickle'
+
+
+@dataclass()
+class BundleCache:
+    """
+    An on-disk cache of pre-parsed STIX 2 bundles.
+
+    Entries are keyed by the real path of the bundle and by its version (i.e., its modification time and size, and optionally, a SHA-256 hash of its contents). When a new version of a bundle is cached, stale versions are removed, and the least recently used entries are evicted whenever the cache grows beyond `max_size` bytes.
+    """
+    directory: str = DEFAULT_BUNDLE_CACHE_DIR
+    max_size: int = DEFAULT_BUNDLE_CACHE_MAX_SIZE
+    use_content_hash: bool = False
+
+    def __post_init__(self):
+        self.directory = util.get_real_path(self.directory)
+
+    def get(self, path: str, kind: str, load: Callable[[str], Any]) -> Any:
+        """
+        Lookup a cached representation of the provided bundle (e.g., 'objects'), calling `load(path)` and caching the result on a miss.
+        """
+        path = util.get_real_path(path)
+        cache_path = self._get_cache_path(path, kind)
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, mode='rb') as fp:
+                    value = pickle.load(fp)
+            except Exception as e:
+                logger.warning("Failed to read cached bundle: %s (%s)", cache_path, e)
+                _unlink(cache_path)
+            else:
+                logger.debug("Cache hit: %s -> %s", path, cache_path)
+                with contextlib.suppress(FileNotFoundError):
+                    os.utime(cache_path)
+                return value
+
+        logger.debug("Cache miss: %s", path)
+        value = load(path)
+        self._put(path, kind, value)
+        return value
+
+    def invalidate(self, path: Optional[str] = None) -> int:
+        """
+        Remove every cached version of the provided bundle (or of all bundles), returning the number of entries that were removed.
+        """
+        prefix = self._get_path_digest(util.get_real_path(path)) if path else ''
+        removed = 0
+        for cache_path in self._list_cache_paths():
+            if os.path.basename(cache_path).startswith(prefix):
+                _unlink(cache_path)
+                removed += 1
+        return removed
+
+    def evict(self) -> int:
+        """
+        Remove the least recently used entries until the cache is no larger than `max_size` bytes, returning the number of entries that were removed.
+        """
+        entries = []
+        for cache_path in self._list_cache_paths():
+            try:
+                st = os.stat(cache_path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, cache_path))
+
+        size = sum(entry[1] for entry in entries)
+        removed = 0
+        for _, entry_size, cache_path in sorted(entries):
+            if size <= self.max_size:
+                break
+            _unlink(cache_path)
+            size -= entry_size
+            removed += 1
+        return removed
+
+    def get_size(self) -> int:
+        return sum(os.path.getsize(cache_path) for cache_path in self._list_cache_paths())
+
+    def _put(self, path: str, kind: str, value: Any) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        cache_path = self._get_cache_path(path, kind)
+        util.write_file_atomically(cache_path, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+        # Remove stale versions of the same bundle.
+        prefix = self._get_path_digest(path)
+        suffix = f'.{kind}{CACHE_FILE_EXTENSION}'
+        for other in self._list_cache_paths():
+            name = os.path.basename(other)
+            if other != cache_path and name.startswith(prefix) and name.endswith(suffix):
+                logger.debug("Removing stale cache entry: %s", other)
+                _unlink(other)
+
+        self.evict()
+
+    def _get_cache_path(self, path: str, kind: str) -> str:
+        name = f'{self._get_path_digest(path)}-{self._get_version_digest(path)}.{kind}{CACHE_FILE_EXTENSION}'
+        return os.path.join(self.directory, name)
+
+    def _get_path_digest(self, path: str) -> str:
+        return hashlib.sha256(path.encode('utf-8')).hexdigest()[:16]
+
+    def _get_version_digest(self, path: str) -> str:
+        st = os.stat(path)
+        h = hashlib.sha256(f'{st.st_mtime_ns}:{st.st_size}:{stix2.__version__}'.encode('utf-8'))
+        if self.use_content_hash:
+            with open(path, mode='rb') as fp:
+                for chunk in iter(lambda: fp.read(1 << 20), b''):
+                    h.update(chunk)
+        return h.hexdigest()[:16]
+
+    def _list_cache_paths(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(CACHE_FILE_EXTENSION)]
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
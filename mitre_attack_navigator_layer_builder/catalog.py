@@ -0,0 +1,191 @@
+import collections
+from dataclasses import dataclass
+import dataclasses
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+from mitre_attack_navigator_layer_builder.parsers import Decoder, MitreDecoder
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TechniqueDetails:
+    """
+    The attributes of a technique that are used to enrich layers (see `layers.enrich_layer`).
+    """
+    technique_id: str
+    name: str
+    tactics: Tuple[str, ...] = ()          # Tactic shortnames (e.g., "initial-access").
+    platforms: Tuple[str, ...] = ()
+    data_sources: Tuple[str, ...] = ()
+    url: Optional[str] = None
+
+
+@dataclass()
+class AttackCatalog:
+    """
+    An index of ATT&CK objects built in a single pass over the objects in a STIX 2 bundle.
+
+    Lookups by STIX ID, external ID, type, tactic, and platform are dictionary lookups rather than scans over every object.
+    """
+    objects: List[dict] = dataclasses.field(default_factory=list)
+    decoder: Decoder = dataclasses.field(default_factory=MitreDecoder)
+
+    def __post_init__(self):
+        self._objects_by_id: Dict[str, dict] = {}
+        self._objects_by_external_id: Dict[str, dict] = {}
+        self._objects_by_type: Dict[str, List[dict]] = collections.defaultdict(list)
+        self._external_ids_by_id: Dict[str, str] = {}
+        self._tactic_shortnames_to_ids: Dict[str, str] = {}
+        self._technique_ids_by_tactic: Dict[str, List[str]] = collections.defaultdict(list)
+        self._tactics_by_technique_id: Dict[str, List[str]] = collections.defaultdict(list)
+        self._technique_ids_by_platform: Dict[str, List[str]] = collections.defaultdict(list)
+        self._revoked_ids: Set[str] = set()
+        self._deprecated_ids: Set[str] = set()
+        self._technique_details: Optional[Dict[str, TechniqueDetails]] = None
+
+        for o in self.objects:
+            self._add(o)
+
+    @classmethod
+    def from_bundle(cls, bundle: dict) -> "AttackCatalog":
+        return cls(objects=bundle['objects'])
+
+    def _add(self, o: dict) -> None:
+        stix_id = o['id']
+        object_type = o['type']
+        self._objects_by_id[stix_id] = o
+        self._technique_details = None
+        self._objects_by_type[object_type].append(o)
+
+        if self.decoder.is_revoked(o):
+            self._revoked_ids.add(stix_id)
+        if self.decoder.is_deprecated(o):
+            self._deprecated_ids.add(stix_id)
+
+        external_id = self.decoder.get_external_id(o) if o.get('external_references') else None
+        if external_id is None:
+            return
+
+        # Prefer active objects if an external ID is reused (e.g., by a revoked object).
+        self._external_ids_by_id[stix_id] = external_id
+        existing = self._objects_by_external_id.get(external_id)
+        if existing is None or not self.is_active(existing):
+            self._objects_by_external_id[external_id] = o
+
+        if object_type == 'x-mitre-tactic':
+            self._tactic_shortnames_to_ids[o['x_mitre_shortname']] = external_id
+        elif object_type == 'attack-pattern':
+            for phase in o.get('kill_chain_phases', []):
+                shortname = phase['phase_name']
+                self._technique_ids_by_tactic[shortname].append(external_id)
+                self._tactics_by_technique_id[external_id].append(shortname)
+            for platform in o.get('x_mitre_platforms', []):
+                self._technique_ids_by_platform[platform].append(external_id)
+
+    def add(self, o: dict) -> "AttackCatalog":
+        self.objects.append(o)
+        self._add(o)
+        return self
+
+    def get(self, stix_id: str) -> Optional[dict]:
+        return self._objects_by_id.get(stix_id)
+
+    def get_by_external_id(self, external_id: str) -> Optional[dict]:
+        return self._objects_by_external_id.get(external_id)
+
+    def get_external_id(self, stix_id: str) -> Optional[str]:
+        return self._external_ids_by_id.get(stix_id)
+
+    def get_objects(self, object_type: str, include_revoked: bool = False, include_deprecated: bool = False) -> List[dict]:
+        objects = self._objects_by_type.get(object_type, [])
+        if include_revoked and include_deprecated:
+            return list(objects)
+        return [o for o in objects if self._include(o, include_revoked, include_deprecated)]
+
+    def is_revoked(self, o: dict) -> bool:
+        return o['id'] in self._revoked_ids
+
+    def is_deprecated(self, o: dict) -> bool:
+        return o['id'] in self._deprecated_ids
+
+    def is_active(self, o: dict) -> bool:
+        return not (self.is_revoked(o) or self.is_deprecated(o))
+
+    def _include(self, o: dict, include_revoked: bool, include_deprecated: bool) -> bool:
+        if not include_revoked and self.is_revoked(o):
+            return False
+        if not include_deprecated and self.is_deprecated(o):
+            return False
+        return True
+
+    def get_technique(self, technique_id: str) -> Optional[dict]:
+        o = self._objects_by_external_id.get(technique_id)
+        if o is not None and o['type'] == 'attack-pattern':
+            return o
+        return None
+
+    def get_technique_ids(self, include_revoked: bool = False, include_deprecated: bool = False) -> Set[str]:
+        return {self._external_ids_by_id[o['id']] for o in self.get_objects('attack-pattern', include_revoked, include_deprecated) if o['id'] in self._external_ids_by_id}
+
+    def get_technique_details(self) -> Dict[str, TechniqueDetails]:
+        """
+        Lookup the details of every active technique by technique ID - the details are computed once and reused until the catalog is changed.
+        """
+        if self._technique_details is None:
+            details = {}
+            for o in self.get_objects('attack-pattern'):
+                technique_id = self._external_ids_by_id.get(o['id'])
+                if technique_id is None:
+                    continue
+                details[technique_id] = TechniqueDetails(
+                    technique_id=technique_id,
+                    name=o.get('name', technique_id),
+                    tactics=tuple(phase['phase_name'] for phase in o.get('kill_chain_phases', []) if phase.get('kill_chain_name', '').startswith('mitre-')),
+                    platforms=tuple(o.get('x_mitre_platforms', [])),
+                    data_sources=tuple(o.get('x_mitre_data_sources', [])),
+                    url=next((ref.get('url') for ref in o['external_references'] if ref.get('external_id') == technique_id), None),
+                )
+            self._technique_details = details
+        return self._technique_details
+
+    def get_tactic(self, shortname: str) -> Optional[dict]:
+        tactic_id = self._tactic_shortnames_to_ids.get(shortname)
+        return self._objects_by_external_id.get(tactic_id) if tactic_id else None
+
+    def get_tactic_id(self, shortname: str) -> Optional[str]:
+        return self._tactic_shortnames_to_ids.get(shortname)
+
+    def get_tactic_shortnames(self, technique_id: str) -> List[str]:
+        return self._tactics_by_technique_id.get(technique_id, [])
+
+    def get_technique_ids_by_tactic(self, shortname: str) -> List[str]:
+        return self._technique_ids_by_tactic.get(shortname, [])
+
+    def get_technique_ids_by_platform(self, platform: str) -> List[str]:
+        return self._technique_ids_by_platform.get(platform, [])
+
+    def get_map_of_tactic_ids_to_technique_ids(self) -> Dict[str, List[str]]:
+        m = {}
+        for shortname, technique_ids in self._technique_ids_by_tactic.items():
+            tactic_id = self._tactic_shortnames_to_ids.get(shortname)
+            if tactic_id:
+                m.setdefault(tactic_id, set()).update(technique_ids)
+        return {k: sorted(v) for k, v in m.items()}
+
+    def get_map_of_technique_ids_to_tactic_ids(self) -> Dict[str, List[str]]:
+        m = collections.defaultdict(list)
+        for tactic_id, technique_ids in self.get_map_of_tactic_ids_to_technique_ids().items():
+            for technique_id in technique_ids:
+                m[technique_id].append(tactic_id)
+        return dict(m)
+
+    def __contains__(self, stix_id: str) -> bool:
+        return stix_id in self._objects_by_id
+
+    def __iter__(self) -> Iterable[dict]:
+        return iter(self.objects)
+
+    def __len__(self) -> int:
+        return len(self.objects)
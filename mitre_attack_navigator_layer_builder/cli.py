@@ -1,8 +1,21 @@
-from typing import List
+from typing import List, Optional
+import contextlib
+import json
+import os
+import sys
+import itertools
 import click
 import logging
 
-from mitre_attack_navigator_layer_builder.constants import DEFAULT_COLOR, MITRE_ATTACK_ENTERPRISE, MITRE_ATTACK_ICS, MITRE_ATTACK_MOBILE, STIX2_URLS_BY_LAYER_DOMAIN
+from mitre_attack_navigator_layer_builder import diffs, generators, io, layers
+from mitre_attack_navigator_layer_builder.coloring import GradientColorScheme, SingleColorScheme
+from mitre_attack_navigator_layer_builder.controls import ControlMatrix
+from mitre_attack_navigator_layer_builder.migrations import COMBINE_RULES_TO_FUNCTIONS, DEFAULT_COMBINE_RULE, RemapTable, migrate_layer_files
+from mitre_attack_navigator_layer_builder.snapshots import SnapshotSeries
+from mitre_attack_navigator_layer_builder.sources import load_attack_catalog
+from mitre_attack_navigator_layer_builder.universe import get_attack_release_url
+from mitre_attack_navigator_layer_builder.vectors import TechniqueIndex
+from mitre_attack_navigator_layer_builder.constants import DEFAULT_COLOR, DEFAULT_MOVING_AVERAGE_WINDOW, MITRE_ATTACK_ENTERPRISE, MITRE_ATTACK_ICS, MITRE_ATTACK_MOBILE, NIST_SP_800_53_TO_MITRE_ATTACK_ENTERPRISE_MAPPINGS_URL, NIST_SP_800_53_URL, STIX2_URLS_BY_LAYER_DOMAIN
 
 
 @click.group('main')
@@ -10,5 +23,154 @@ def main_group():
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
 
+@main_group.command('heatmap')
+@click.argument('paths', nargs=-1, required=True)
+@click.option('--output', '-o', required=True, help='Path to write the heatmap layer to.')
+@click.option('--min-color', default=GradientColorScheme.min_color, show_default=True)
+@click.option('--max-color', default=GradientColorScheme.max_color, show_default=True)
+@click.option('--jobs', '-j', type=int, default=1, show_default=True, help='Number of worker processes (0 = one per CPU).')
+def heatmap_command(paths: List[str], output: str, min_color: str, max_color: str, jobs: int):
+    """
+    Build a heatmap from layer files, directories, or glob patterns.
+    """
+    color_scheme = GradientColorScheme(min_color=min_color, max_color=max_color)
+    layer = io.calculate_heatmap_from_files(paths, color_scheme=color_scheme, jobs=jobs)
+    io.write_layer(layer, output)
+
+
+@main_group.command('merge')
+@click.argument('paths', nargs=-1, required=True)
+@click.option('--output', '-o', required=True, help='Path to write the merged layer to.')
+@click.option('--strategy', type=click.Choice(layers.MERGE_STRATEGIES), default=layers.DEFAULT_MERGE_STRATEGY, show_default=True)
+@click.option('--color', default=DEFAULT_COLOR, show_default=True)
+@click.option('--jobs', '-j', type=int, default=1, show_default=True, help='Number of worker processes (0 = one per CPU).')
+def merge_command(paths: List[str], output: str, strategy: str, color: str, jobs: int):
+    """
+    Merge layer files, directories, or glob patterns.
+    """
+    layer = io.merge_layer_files(paths, merge_strategy=strategy, color_scheme=SingleColorScheme(color), jobs=jobs)
+    io.write_layer(layer, output)
+
+
+@main_group.command('generate')
+@click.option('--source', '-s', 'sources', multiple=True, help='STIX 2 bundle files, directories, or URLs (defaults to the latest release of ATT&CK for the domain).')
+@click.option('--output', '-o', required=True, help='Directory (or .jsonl/.jsonl.gz archive) to write the layers to.')
+@click.option('--domain', type=click.Choice([MITRE_ATTACK_ENTERPRISE, MITRE_ATTACK_MOBILE, MITRE_ATTACK_ICS]), default=MITRE_ATTACK_ENTERPRISE, show_default=True)
+@click.option('--type', 'entity_types', type=click.Choice(generators.ENTITY_TYPES), multiple=True, help='The types of objects to generate layers for (defaults to all).')
+@click.option('--color', default=DEFAULT_COLOR, show_default=True)
+@click.option('--jobs', '-j', type=int, default=1, show_default=True, help='Number of worker processes (0 = one per CPU).')
+def generate_command(sources: List[str], output: str, domain: str, entity_types: List[str], color: str, jobs: int):
+    """
+    Generate one layer per group, software, and campaign.
+    """
+    catalog, _ = load_attack_catalog(sources or [STIX2_URLS_BY_LAYER_DOMAIN[domain]])
+    rows = generators.iter_entity_layers(catalog, entity_types=entity_types or generators.ENTITY_TYPES, color_scheme=SingleColorScheme(color), domain=domain)
+    total = io.write_layers(rows, output, jobs=jobs)
+    logging.info("Wrote %d layers to %s", total, output)
+
+
+@main_group.command('controls')
+@click.option('--source', '-s', 'sources', multiple=True, help='STIX 2 bundle files, directories, or URLs containing NIST SP 800-53 controls and their mappings to ATT&CK (defaults to the latest controls, mappings, and release of ATT&CK).')
+@click.option('--attack-source', 'attack_sources', multiple=True, help='STIX 2 bundle files, directories, or URLs containing the ATT&CK techniques referenced by the mappings (if they are not included in the sources).')
+@click.option('--output', '-o', required=True, help='Directory (or .jsonl/.jsonl.gz archive) to write the layers to.')
+@click.option('--color', default=DEFAULT_COLOR, show_default=True)
+@click.option('--jobs', '-j', type=int, default=1, show_default=True, help='Number of worker processes (0 = one per CPU).')
+def controls_command(sources: List[str], attack_sources: List[str], output: str, color: str, jobs: int):
+    """
+    Generate one coverage layer per NIST SP 800-53 control and control family, and a layer scoring techniques by the number of controls that mitigate them.
+    """
+    # The mapping bundles only contain relationships, so the techniques are resolved using a release of ATT&CK.
+    catalog, _ = load_attack_catalog(sources or [NIST_SP_800_53_URL, NIST_SP_800_53_TO_MITRE_ATTACK_ENTERPRISE_MAPPINGS_URL, STIX2_URLS_BY_LAYER_DOMAIN[MITRE_ATTACK_ENTERPRISE]])
+    attack_catalog = load_attack_catalog(attack_sources)[0] if attack_sources else None
+    matrix = ControlMatrix.from_stix2_objects(catalog, catalog=attack_catalog)
+    rows = itertools.chain(
+        matrix.iter_control_layers(color_scheme=SingleColorScheme(color)),
+        ((f'family-{family}', layer) for family, layer in matrix.iter_family_layers()),
+        [('technique-scores', matrix.get_technique_score_layer())],
+    )
+    total = io.write_layers(rows, output, jobs=jobs)
+    logging.info("Wrote %d layers to %s", total, output)
+
+
+@main_group.command('migrate')
+@click.argument('paths', nargs=-1, required=True)
+@click.option('--output', '-o', required=True, help='Directory to write the migrated layers to.')
+@click.option('--from', 'source', required=True, help='The ATT&CK version (e.g., "14.1"), STIX 2 bundle file, directory, or URL that the layers are pinned to.')
+@click.option('--to', 'target', help='The ATT&CK version, STIX 2 bundle file, directory, or URL to migrate the layers to (defaults to the latest release of ATT&CK for the domain).')
+@click.option('--domain', type=click.Choice([MITRE_ATTACK_ENTERPRISE, MITRE_ATTACK_MOBILE, MITRE_ATTACK_ICS]), default=MITRE_ATTACK_ENTERPRISE, show_default=True)
+@click.option('--combine', type=click.Choice(list(COMBINE_RULES_TO_FUNCTIONS)), default=DEFAULT_COMBINE_RULE, show_default=True, help='How to combine the scores of merged techniques.')
+@click.option('--jobs', '-j', type=int, default=1, show_default=True, help='Number of worker processes (0 = one per CPU).')
+def migrate_command(paths: List[str], output: str, source: str, target: Optional[str], domain: str, combine: str, jobs: int):
+    """
+    Migrate layer files, directories, or glob patterns from one release of ATT&CK to another.
+    """
+    releases = []
+    for release in [source, target]:
+        is_version = release is None or release.replace('.', '').isdigit()
+        catalog, _ = load_attack_catalog([get_attack_release_url(domain, release) if is_version else release])
+        releases.append((catalog, release if is_version else None))
+
+    (source_catalog, source_version), (target_catalog, target_version) = releases
+    table = RemapTable.from_catalogs(source_catalog, target_catalog, source_version=source_version, target_version=target_version)
+    total = migrate_layer_files(paths, output, table, combine=combine, jobs=jobs)
+    logging.info("Migrated %d layers to %s", total, output)
+
+
+@main_group.command('diff')
+@click.argument('old')
+@click.argument('new')
+@click.option('--output', '-o', help='Path to write the diff layer to (or a directory to write diff layers to when comparing directories).')
+@click.option('--changes', help='Path to write the changes to as JSON lines ("-" for stdout).')
+@click.option('--include-unchanged', is_flag=True, default=False, help='Include techniques that are present in both layers without any changes.')
+def diff_command(old: str, new: str, output: Optional[str], changes: Optional[str], include_unchanged: bool):
+    """
+    Compare two layer files, or two directories of layer files, field by field.
+    """
+    with contextlib.ExitStack() as stack:
+        fp = None
+        if changes == '-':
+            fp = sys.stdout
+        elif changes:
+            fp = stack.enter_context(open(changes, mode='w'))
+
+        if os.path.isdir(old) and os.path.isdir(new):
+            total = diffs.diff_layer_directories(old, new, output_dir=output, changes=fp, include_unchanged=include_unchanged)
+        else:
+            layer, rows = diffs.calculate_field_diff(io.read_layer(old), io.read_layer(new), include_unchanged=include_unchanged)
+            total = sum(row.change != diffs.UNCHANGED for row in rows)
+            if fp is not None:
+                for row in rows:
+                    fp.write(json.dumps(row.to_dict()) + '\n')
+            if output:
+                io.write_layer(layer, output)
+
+    logging.info("Found %d changes", total)
+
+
+@main_group.command('trends')
+@click.argument('paths', nargs=-1, required=True)
+@click.option('--output', '-o', required=True, help='Directory to write the trend layers and summaries to.')
+@click.option('--source', '-s', 'sources', multiple=True, help='STIX 2 bundle files, directories, or URLs defining the techniques and tactics to track (defaults to the latest release of ATT&CK for the domain).')
+@click.option('--domain', type=click.Choice([MITRE_ATTACK_ENTERPRISE, MITRE_ATTACK_MOBILE, MITRE_ATTACK_ICS]), default=MITRE_ATTACK_ENTERPRISE, show_default=True)
+@click.option('--window', type=int, default=DEFAULT_MOVING_AVERAGE_WINDOW, show_default=True, help='The number of snapshots to average over.')
+@click.option('--min-color', default=GradientColorScheme.min_color, show_default=True)
+@click.option('--max-color', default=GradientColorScheme.max_color, show_default=True)
+@click.option('--jobs', '-j', type=int, default=1, show_default=True, help='Number of worker processes (0 = one per CPU).')
+def trends_command(paths: List[str], output: str, sources: List[str], domain: str, window: int, min_color: str, max_color: str, jobs: int):
+    """
+    Summarize the trends in a series of dated layer snapshots (e.g., "coverage-2024-01-31.json").
+    """
+    catalog, _ = load_attack_catalog(sources or [STIX2_URLS_BY_LAYER_DOMAIN[domain]])
+    series = SnapshotSeries.from_files(paths, TechniqueIndex(sorted(catalog.get_technique_ids())), jobs=jobs)
+
+    color_scheme = GradientColorScheme(min_color=min_color, max_color=max_color)
+    os.makedirs(output, exist_ok=True)
+    io.write_layer(series.get_delta_layer(color_scheme=color_scheme), os.path.join(output, 'delta.json'))
+    io.write_layer(series.get_moving_average_layer(window, color_scheme=color_scheme), os.path.join(output, 'moving-average.json'))
+    series.get_summary(window).write_csv(os.path.join(output, 'techniques.csv'))
+    series.get_tactic_summary(catalog.get_map_of_tactic_ids_to_technique_ids()).write_csv(os.path.join(output, 'tactics.csv'))
+    logging.info("Summarized %d snapshots in %s", len(series), output)
+
+
 if __name__ == "__main__":
     main_group()
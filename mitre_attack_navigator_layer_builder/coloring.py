@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+import functools
 import re
 from typing import Dict, List
 import logging
@@ -14,6 +15,8 @@ def is_hex_color(value: str) -> bool:
     return bool(HEX_COLOR_REGEX.match(value))
 
 
+# Resolving colour names is relatively expensive, and the same few colours are resolved for every generated layer.
+@functools.lru_cache(maxsize=1024)
 def get_hex_color_value(color: str) -> str:
     if is_hex_color(color):
         return color
@@ -82,6 +85,7 @@ class DiffColorScheme:
     left_color: str = 'lightcoral'
     right_color: str = 'lightgreen'
     unchanged_color: str = 'gray'
+    changed_color: str = 'khaki'    # Techniques in both layers with different scores, colours, comments, or visibility (see `diffs.new_diff_layer`).
 
 
 # TODO: pick default colors
@@ -94,8 +98,8 @@ class IntersectionColorScheme:
 
 @dataclass()
 class GradientColorScheme(ColorScheme):
-    min_color: str
-    max_color: str
+    min_color: str = 'PaleGoldenrod'
+    max_color: str = 'FireBrick'
 
     def get_colors(self, total_samples: int) -> List[str]:
         return get_color_gradient(self.min_color, self.max_color, total_samples)
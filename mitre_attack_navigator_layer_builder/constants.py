@@ -10,6 +10,9 @@ MITRE_ATTACK_ENTERPRISE_URL = 'https://raw.githubusercontent.com/mitre-attack/at
 MITRE_ATTACK_MOBILE_URL = 'https://raw.githubusercontent.com/mitre-attack/attack-stix-data/refs/heads/master/mobile-attack/mobile-attack.json'
 MITRE_ATTACK_ICS_URL = 'https://raw.githubusercontent.com/mitre-attack/attack-stix-data/refs/heads/master/ics-attack/ics-attack.json'
 
+# The URL of a specific release of ATT&CK (e.g., `enterprise-attack/enterprise-attack-15.1.json`)
+MITRE_ATTACK_VERSIONED_URL_TEMPLATE = 'https://raw.githubusercontent.com/mitre-attack/attack-stix-data/refs/heads/master/{domain}/{domain}-{version}.json'
+
 MITRE_ATTACK_TACTICS = [
   {
     "name": "Credential Access",
@@ -171,3 +174,30 @@ ALL = 'all'
 ANNOTATED = 'annotated'
 
 DEFAULT_COLOR = 'cornflowerblue'
+
+# The number of layer files read by each worker process at a time
+DEFAULT_LAYER_FILE_CHUNK_SIZE = 64
+
+# The default location and maximum size (in bytes) of the cache of pre-parsed STIX 2 bundles
+DEFAULT_BUNDLE_CACHE_DIR = '~/.cache/mitre-attack-navigator-layer-builder/bundles'
+DEFAULT_BUNDLE_CACHE_MAX_SIZE = 1024 * 1024 * 1024
+
+# The number of characters read at a time when streaming the objects in a STIX 2 bundle
+DEFAULT_BUNDLE_READ_CHUNK_SIZE = 1024 * 1024
+
+# The number of STIX 2 bundle files read by each worker process at a time
+DEFAULT_BUNDLE_FILE_CHUNK_SIZE = 256
+
+# The default location of the cache of HTTP responses and TAXII collections, and the maximum age (in seconds) of cached TAXII collections
+DEFAULT_HTTP_CACHE_DIR = '~/.cache/mitre-attack-navigator-layer-builder/http'
+DEFAULT_TAXII_CACHE_MAX_AGE = 24 * 60 * 60
+
+# The number of pooled connections per host, and the timeout (in seconds) of HTTP requests
+DEFAULT_HTTP_POOL_SIZE = 10
+DEFAULT_HTTP_TIMEOUT = 60
+
+# The maximum number of technique universes (i.e., one per ATT&CK domain and version) kept in memory
+DEFAULT_TECHNIQUE_UNIVERSE_CACHE_SIZE = 8
+
+# The default number of snapshots averaged by moving averages over a series of layer snapshots (e.g., one week of daily snapshots)
+DEFAULT_MOVING_AVERAGE_WINDOW = 7
@@ -0,0 +1,173 @@
+from dataclasses import dataclass
+import dataclasses
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from mitre_attack_navigator_layer_builder import layers, parsers
+from mitre_attack_navigator_layer_builder.catalog import AttackCatalog
+from mitre_attack_navigator_layer_builder.coloring import GradientColorScheme, SingleColorScheme
+from mitre_attack_navigator_layer_builder.constants import MITRE_ATTACK_ENTERPRISE
+from mitre_attack_navigator_layer_builder.layers import Layer, MetadataItem
+from mitre_attack_navigator_layer_builder.pivots import NIST_SP_800_53_SOURCE_NAMES
+from mitre_attack_navigator_layer_builder.vectors import TechniqueIndex
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass()
+class ControlMatrix:
+    """
+    A dense control × technique matrix of the ATT&CK techniques mitigated by each NIST SP 800-53 control.
+
+    Controls are grouped into families by the prefix of their IDs (e.g., "AC-2(1)" belongs to the "AC" family).
+    """
+    control_ids: List[str]
+    index: TechniqueIndex
+    matrix: np.ndarray                                                  # One row per control, and one column per technique.
+    control_names: Dict[str, str] = dataclasses.field(default_factory=dict)
+    domain: str = MITRE_ATTACK_ENTERPRISE
+
+    def __post_init__(self):
+        self._positions = {control_id: i for i, control_id in enumerate(self.control_ids)}
+
+    @classmethod
+    def from_stix2_objects(cls, objects: Iterable[dict], domain: str = MITRE_ATTACK_ENTERPRISE, catalog: Optional[AttackCatalog] = None) -> "ControlMatrix":
+        """
+        Build a matrix in a single pass over NIST SP 800-53 controls, ATT&CK techniques, and the `mitigates` relationships between them (e.g., from the NIST SP 800-53 control and mapping bundles).
+
+        The mapping bundles only contain relationships, so techniques that aren't among the provided objects are resolved using a catalog of ATT&CK techniques (if provided). Mappings to techniques that can't be resolved are dropped.
+        """
+        decoder = parsers.MitreDecoder()
+        controls = {}
+        techniques = {}
+        edges = []
+        for o in objects:
+            if o['type'] == 'relationship':
+                if o.get('relationship_type') == 'mitigates' and not decoder.is_revoked(o) and not decoder.is_deprecated(o):
+                    edges.append((o['source_ref'], o['target_ref']))
+            elif o['type'] == 'course-of-action' and parsers.is_nist_sp_800_53_object(o):
+                control_id = next(ref['external_id'] for ref in o['external_references'] if ref['source_name'] in NIST_SP_800_53_SOURCE_NAMES)
+                controls[o['id']] = (control_id, o.get('name', control_id))
+            elif o['type'] == 'attack-pattern' and o.get('external_references'):
+                technique_id = next((ref['external_id'] for ref in o['external_references'] if ref.get('source_name') == 'mitre-attack'), None)
+                if technique_id:
+                    techniques[o['id']] = technique_id
+
+        if catalog is not None:
+            for _, b in edges:
+                if b not in techniques and b.startswith('attack-pattern--'):
+                    technique_id = catalog.get_external_id(b)
+                    if technique_id:
+                        techniques[b] = technique_id
+
+        unresolved = sum(1 for a, b in edges if a in controls and b not in techniques)
+        if unresolved:
+            logger.warning("Dropped %d mappings to techniques which weren't found (are the ATT&CK techniques included?)", unresolved)
+
+        control_ids = sorted({control_id for control_id, _ in controls.values()})
+        positions = {control_id: i for i, control_id in enumerate(control_ids)}
+        index = TechniqueIndex(sorted(set(techniques.values())))
+
+        edges = [(controls[a][0], techniques[b]) for a, b in edges if a in controls and b in techniques]
+        rows = np.fromiter((positions[control_id] for control_id, _ in edges), dtype=np.int64, count=len(edges))
+        columns = index.get_positions(technique_id for _, technique_id in edges)
+
+        matrix = np.zeros((len(control_ids), len(index)), dtype=bool)
+        matrix[rows, columns] = True
+        logger.debug("Indexed %d mappings between %d controls and %d techniques", len(edges), len(control_ids), len(index))
+        return cls(
+            control_ids=control_ids,
+            index=index,
+            matrix=matrix,
+            control_names={control_id: name for control_id, name in controls.values()},
+            domain=domain,
+        )
+
+    @property
+    def families(self) -> Dict[str, np.ndarray]:
+        """
+        The positions of the controls in each family.
+        """
+        families = {}
+        for i, control_id in enumerate(self.control_ids):
+            families.setdefault(get_control_family(control_id), []).append(i)
+        return {family: np.array(positions, dtype=np.int64) for family, positions in families.items()}
+
+    def get_technique_ids(self, control_id: str) -> List[str]:
+        return self.index.get_technique_ids(self.matrix[self._positions[control_id]])
+
+    def get_control_ids(self, technique_id: str) -> List[str]:
+        position = self.index.get_position(technique_id)
+        if position is None:
+            return []
+        return [self.control_ids[i] for i in np.flatnonzero(self.matrix[:, position])]
+
+    def get_technique_scores(self) -> np.ndarray:
+        """
+        The number of controls that mitigate each technique.
+        """
+        return self.matrix.sum(axis=0)
+
+    def get_family_scores(self) -> Dict[str, np.ndarray]:
+        """
+        The number of controls within each family that mitigate each technique.
+        """
+        return {family: self.matrix[positions].sum(axis=0) for family, positions in self.families.items()}
+
+    def iter_control_layers(self, color_scheme: Optional[SingleColorScheme] = None, include_empty_layers: bool = False) -> Iterator[Tuple[str, Layer]]:
+        """
+        Generate one coverage layer per control, returning an iterator of (control ID, layer) pairs.
+        """
+        color_scheme = color_scheme or SingleColorScheme()
+        covered = self.matrix.any(axis=1)
+        for i, control_id in enumerate(self.control_ids):
+            if not covered[i] and not include_empty_layers:
+                continue
+
+            name = self.control_names.get(control_id, control_id)
+            layer = layers.new_layer_from_masks(
+                self.index,
+                [(self.matrix[i], color_scheme.color)],
+                present=self.matrix[i],
+                name=f"{control_id}: {name}" if name != control_id else control_id,
+                description=f"ATT&CK techniques mitigated by NIST SP 800-53 control {control_id}",
+                domain=self.domain,
+                metadata=[MetadataItem(name='control', value=control_id)],
+            )
+            yield control_id, layer
+
+    def iter_family_layers(self, color_scheme: Optional[GradientColorScheme] = None) -> Iterator[Tuple[str, Layer]]:
+        """
+        Generate one coverage layer per control family, scoring each technique by the number of controls within the family that mitigate it, and return an iterator of (family, layer) pairs.
+        """
+        for family, scores in sorted(self.get_family_scores().items()):
+            layer = layers.new_heatmap_layer(
+                self.index,
+                scores,
+                color_scheme=color_scheme,
+                present=scores > 0,
+                name=family,
+                description=f"ATT&CK techniques mitigated by the {family} family of NIST SP 800-53 controls",
+                domain=self.domain,
+                metadata=[MetadataItem(name='family', value=family)],
+            )
+            yield family, layer
+
+    def get_technique_score_layer(self, color_scheme: Optional[GradientColorScheme] = None) -> Layer:
+        """
+        Create a layer which scores every technique by the number of controls that mitigate it.
+        """
+        return layers.new_heatmap_layer(
+            self.index,
+            self.get_technique_scores(),
+            color_scheme=color_scheme,
+            name='NIST SP 800-53 controls per technique',
+            description='The number of NIST SP 800-53 controls that mitigate each ATT&CK technique',
+            domain=self.domain,
+        )
+
+
+def get_control_family(control_id: str) -> str:
+    return control_id.split('-', maxsplit=1)[0]
@@ -0,0 +1,211 @@
+from dataclasses import dataclass
+import dataclasses
+import json
+import os
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+from mitre_attack_navigator_layer_builder import coloring, io, util
+from mitre_attack_navigator_layer_builder.coloring import DiffColorScheme
+from mitre_attack_navigator_layer_builder.constants import MITRE_ATTACK_ENTERPRISE
+from mitre_attack_navigator_layer_builder.layers import Layer, LegendItem, Technique
+
+logger = logging.getLogger(__name__)
+
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+UNCHANGED = 'unchanged'
+
+CHANGE_TYPES = [ADDED, REMOVED, CHANGED, UNCHANGED]
+
+# The fields of each technique that are compared.
+DIFF_FIELDS = ['score', 'color', 'comment', 'enabled']
+
+
+@dataclass(frozen=True)
+class TechniqueChange:
+    """
+    A change to a technique (or technique/tactic pair) between two layers.
+
+    For changed techniques, `fields` maps the name of each changed field to its (old, new) values.
+    """
+    technique_id: str
+    tactic: Optional[str]
+    change: str
+    fields: Dict[str, Tuple[Any, Any]] = dataclasses.field(default_factory=dict)
+    path: Optional[str] = None      # The path of the layer relative to the directories being compared (see `iter_directory_changes`).
+    technique: Optional[Technique] = dataclasses.field(default=None, compare=False, repr=False)
+
+    def to_dict(self) -> dict:
+        o = {
+            'techniqueID': self.technique_id,
+            'tactic': self.tactic,
+            'change': self.change,
+        }
+        if self.fields:
+            o['fields'] = {name: list(values) for name, values in self.fields.items()}
+        if self.path is not None:
+            o = {'path': self.path, **o}
+        return o
+
+
+def iter_technique_changes(a: Layer, b: Layer, include_unchanged: bool = False, path: Optional[str] = None) -> Iterator[TechniqueChange]:
+    """
+    Compare two layers using a sorted merge-join over (technique ID, tactic) pairs, returning an iterator of changes ordered by technique ID and tactic.
+
+    If a technique/tactic pair appears more than once within a layer, only the first occurrence is compared.
+    """
+    left = _iter_sorted_techniques(a)
+    right = _iter_sorted_techniques(b)
+    x = next(left, None)
+    y = next(right, None)
+    while x is not None or y is not None:
+        if y is None or (x is not None and x[0] < y[0]):
+            yield TechniqueChange(x[1].techniqueID, x[1].tactic, REMOVED, path=path, technique=x[1])
+            x = next(left, None)
+        elif x is None or y[0] < x[0]:
+            yield TechniqueChange(y[1].techniqueID, y[1].tactic, ADDED, path=path, technique=y[1])
+            y = next(right, None)
+        else:
+            fields = get_changed_fields(x[1], y[1])
+            if fields or include_unchanged:
+                yield TechniqueChange(y[1].techniqueID, y[1].tactic, CHANGED if fields else UNCHANGED, fields=fields, path=path, technique=y[1])
+            x = next(left, None)
+            y = next(right, None)
+
+
+def _iter_sorted_techniques(layer: Layer) -> Iterator[Tuple[Tuple[str, str], Technique]]:
+    previous = None
+    for key, technique in sorted((((technique.techniqueID, technique.tactic or ''), technique) for technique in layer.techniques), key=lambda row: row[0]):
+        if key != previous:
+            yield key, technique
+        previous = key
+
+
+def get_changed_fields(a: Technique, b: Technique) -> Dict[str, Tuple[Any, Any]]:
+    fields = {}
+    for name in DIFF_FIELDS:
+        old, new = getattr(a, name), getattr(b, name)
+        if name == 'color':
+            old, new = _normalize_color(old), _normalize_color(new)
+        if old != new:
+            fields[name] = (old, new)
+    return fields
+
+
+def _normalize_color(color: Optional[str]) -> Optional[str]:
+    return coloring.get_hex_color_value(color) if color else None
+
+
+def new_diff_layer(changes: Iterable[TechniqueChange], color_scheme: Optional[DiffColorScheme] = None, **kwargs) -> Layer:
+    """
+    Create a layer from a stream of changes - added, removed, changed, and unchanged techniques are coloured according to the provided colour scheme, and the changed fields of each technique are listed in its comment.
+    """
+    color_scheme = color_scheme or DiffColorScheme()
+    colors = {
+        REMOVED: color_scheme.left_color,
+        ADDED: color_scheme.right_color,
+        CHANGED: color_scheme.changed_color,
+        UNCHANGED: color_scheme.unchanged_color,
+    }
+    colors = {change: coloring.get_hex_color_value(color) for change, color in colors.items()}
+
+    kwargs.setdefault('domain', MITRE_ATTACK_ENTERPRISE)
+    kwargs.setdefault('legendItems', [LegendItem(label=change.capitalize(), color=colors[change]) for change in CHANGE_TYPES])
+    layer = Layer(**kwargs)
+    for change in changes:
+        comment = change.change.capitalize()
+        if change.fields:
+            comment += ': ' + ', '.join(f'{name}: {old!r} → {new!r}' for name, (old, new) in change.fields.items())
+
+        layer.techniques.append(Technique(
+            techniqueID=change.technique_id,
+            tactic=change.tactic,
+            score=change.technique.score if change.technique else None,
+            color=colors[change.change],
+            comment=comment,
+        ))
+    return layer
+
+
+def calculate_field_diff(a: Layer, b: Layer, color_scheme: Optional[DiffColorScheme] = None, include_unchanged: bool = False) -> Tuple[Layer, List[TechniqueChange]]:
+    """
+    Compare the techniques in two layers field by field, returning a coloured diff layer and the list of changes.
+    """
+    changes = list(iter_technique_changes(a, b, include_unchanged=include_unchanged))
+    layer = new_diff_layer(
+        changes,
+        color_scheme=color_scheme,
+        name=f'{a.name} → {b.name}',
+        description=f'Changes from {a.name} to {b.name}',
+        domain=b.domain or a.domain,
+    )
+    return layer, changes
+
+
+def iter_directory_changes(a: str, b: str, include_unchanged: bool = False) -> Iterator[Tuple[str, Optional[Layer], Optional[Layer], List[TechniqueChange]]]:
+    """
+    Compare two directories of layer snapshots using a sorted merge-join over the relative paths of their layer files, returning an iterator of (relative path, old layer, new layer, changes) tuples.
+
+    Only one pair of layers is held in memory at a time. Layers which only exist in one directory are reported as entirely added or removed.
+    """
+    a, b = util.get_real_path(a), util.get_real_path(b)
+    left = iter(_get_relative_layer_paths(a))
+    right = iter(_get_relative_layer_paths(b))
+    x = next(left, None)
+    y = next(right, None)
+    while x is not None or y is not None:
+        if y is None or (x is not None and x < y):
+            path, old, new = x, io.read_layer(os.path.join(a, x), compact=True), None
+            x = next(left, None)
+        elif x is None or y < x:
+            path, old, new = y, None, io.read_layer(os.path.join(b, y), compact=True)
+            y = next(right, None)
+        else:
+            path, old, new = x, io.read_layer(os.path.join(a, x), compact=True), io.read_layer(os.path.join(b, y), compact=True)
+            x = next(left, None)
+            y = next(right, None)
+
+        changes = list(iter_technique_changes(old if old is not None else Layer(), new if new is not None else Layer(), include_unchanged=include_unchanged, path=path))
+        yield path, old, new, changes
+
+
+def _get_relative_layer_paths(path: str) -> List[str]:
+    return sorted(os.path.relpath(p, path) for p in io.iter_layer_paths(path))
+
+
+def diff_layer_directories(
+        a: str,
+        b: str,
+        output_dir: Optional[str] = None,
+        changes: Optional[IO[str]] = None,
+        color_scheme: Optional[DiffColorScheme] = None,
+        include_unchanged: bool = False) -> int:
+    """
+    Compare two directories of layer snapshots, optionally writing a diff layer for every changed layer to `output_dir` (preserving relative paths) and the changes to a file object as JSON lines, and return the total number of changes.
+    """
+    total = 0
+    for path, old, new, rows in iter_directory_changes(a, b, include_unchanged=include_unchanged):
+        total += sum(row.change != UNCHANGED for row in rows)
+        if changes is not None:
+            for row in rows:
+                changes.write(json.dumps(row.to_dict()) + '\n')
+
+        if output_dir and any(row.change != UNCHANGED for row in rows):
+            latest = new if new is not None else old
+            layer = new_diff_layer(
+                rows,
+                color_scheme=color_scheme,
+                name=latest.name,
+                description=f'Changes to {path}',
+                domain=latest.domain,
+            )
+            output_path = os.path.join(util.get_real_path(output_dir), path)
+            if output_path.endswith('.gz'):
+                output_path = output_path[:-len('.gz')]
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            io.write_layer(layer, output_path)
+
+    logger.info("Found %d changes between %s and %s", total, a, b)
+    return total
@@ -0,0 +1,209 @@
+from dataclasses import dataclass
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import List, Optional
+import logging
+import urllib.parse
+
+import requests
+import requests.adapters
+from taxii2client.common import _HTTPConnection
+from taxii2client.v21 import Collection, as_pages
+
+from mitre_attack_navigator_layer_builder import util
+from mitre_attack_navigator_layer_builder.constants import DEFAULT_HTTP_CACHE_DIR, DEFAULT_HTTP_POOL_SIZE, DEFAULT_HTTP_TIMEOUT, DEFAULT_TAXII_CACHE_MAX_AGE
+
+logger = logging.getLogger(__name__)
+
+BODY_FILE_EXTENSION = '.body.gz'
+METADATA_FILE_EXTENSION = '.meta.json'
+
+GZIP_MAGIC_NUMBER = b'\x1f\x8b'
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Get the shared HTTP session, which keeps connections to each host alive between requests.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            adapter = requests.adapters.HTTPAdapter(pool_connections=DEFAULT_HTTP_POOL_SIZE, pool_maxsize=DEFAULT_HTTP_POOL_SIZE)
+            _session = requests.Session()
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        return _session
+
+
+def decode_json_body(body: bytes) -> dict:
+    """
+    Decode a JSON response body, decompressing it first if it's GZIP compressed (e.g., a `.json.gz` bundle served without `Content-Encoding: gzip`).
+    """
+    if body[:2] == GZIP_MAGIC_NUMBER:
+        body = gzip.decompress(body)
+    return json.loads(body)
+
+
+class _SessionWithDefaults:
+    """
+    A view of a shared session which passes default keyword arguments (e.g., `verify` and `timeout`) to every request.
+
+    taxii2client calls `session.get` without `verify` or `timeout`, and the shared session's own settings apply to every caller, so they're passed per request instead.
+    """
+    def __init__(self, session: requests.Session, **kwargs):
+        self.session = session
+        self.kwargs = kwargs
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.session.get(url, **{**self.kwargs, **kwargs})
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.session.post(url, **{**self.kwargs, **kwargs})
+
+    def close(self) -> None:
+        # The shared session outlives each TAXII connection.
+        pass
+
+    def __getattr__(self, name: str):
+        return getattr(self.session, name)
+
+
+@dataclass()
+class HTTPCache:
+    """
+    An on-disk cache of HTTP responses (e.g., STIX 2 bundles) and TAXII collections.
+
+    Cached responses are revalidated using conditional requests (i.e., `If-None-Match` and `If-Modified-Since`), so unchanged resources are only downloaded once. Response bodies are stored GZIP compressed.
+
+    If `offline` is true, the network is never used, and a `FileNotFoundError` is raised if a resource hasn't been cached. If a resource can't be revalidated (e.g., because the server can't be reached), the cached copy is used.
+    """
+    directory: str = DEFAULT_HTTP_CACHE_DIR
+    offline: bool = False
+    verify_tls_certificate_chain: bool = True
+    timeout: float = DEFAULT_HTTP_TIMEOUT
+    taxii_max_age: float = DEFAULT_TAXII_CACHE_MAX_AGE
+
+    def __post_init__(self):
+        self.directory = util.get_real_path(self.directory)
+
+    def get(self, url: str) -> bytes:
+        """
+        Get the body of the resource at the provided URL.
+        """
+        metadata = self._read_metadata(url)
+        if self.offline:
+            if metadata is None:
+                raise FileNotFoundError(f"Not cached (offline): {url}")
+            return self._read_body(url)
+
+        headers = {}
+        if metadata is not None:
+            if metadata.get('etag'):
+                headers['If-None-Match'] = metadata['etag']
+            if metadata.get('last_modified'):
+                headers['If-Modified-Since'] = metadata['last_modified']
+
+        try:
+            response = get_session().get(url, headers=headers, timeout=self.timeout, verify=self.verify_tls_certificate_chain)
+            if response.status_code == 304 and metadata is not None:
+                logger.debug("Not modified: %s", url)
+                self._write_metadata(url, dict(metadata, fetched_at=time.time()))
+                return self._read_body(url)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            if metadata is None:
+                raise
+            logger.warning("Failed to revalidate %s - using cached copy (%s)", url, e)
+            return self._read_body(url)
+
+        body = response.content
+        self._write_body(url, body)
+        self._write_metadata(url, {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+        })
+        return body
+
+    def get_json(self, url: str) -> dict:
+        return decode_json_body(self.get(url))
+
+    def get_stix2_objects(self, url: str) -> List[dict]:
+        """
+        Get the objects in a STIX 2 bundle, or in a TAXII 2.1 collection, at the provided URL.
+
+        TAXII collections can't be revalidated, so the objects in a collection are paged through again once the cached copy is older than `taxii_max_age` seconds.
+        """
+        path = urllib.parse.urlparse(url).path
+        if path.endswith(('.json', '.json.gz')):
+            return self.get_json(url)['objects']
+
+        metadata = self._read_metadata(url)
+        if metadata is not None and (self.offline or time.time() - metadata['fetched_at'] < self.taxii_max_age):
+            return json.loads(self._read_body(url))
+        elif self.offline:
+            raise FileNotFoundError(f"Not cached (offline): {url}")
+
+        objects = []
+        for page in as_pages(self._get_taxii_collection(url).get_objects):
+            objects.extend(page.get('objects', []))
+
+        self._write_body(url, json.dumps(objects).encode('utf-8'))
+        self._write_metadata(url, {'url': url, 'fetched_at': time.time()})
+        return objects
+
+    def _get_taxii_collection(self, url: str) -> Collection:
+        conn = _HTTPConnection(verify=self.verify_tls_certificate_chain, version='2.1')
+        conn.session = _SessionWithDefaults(get_session(), verify=self.verify_tls_certificate_chain, timeout=self.timeout)
+        return Collection(url, conn=conn)
+
+    def invalidate(self, url: Optional[str] = None) -> int:
+        """
+        Remove the cached copy of the provided resource (or of all resources), returning the number of files that were removed.
+        """
+        prefix = self._get_digest(url) if url else ''
+        removed = 0
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.startswith(prefix) and name.endswith((BODY_FILE_EXTENSION, METADATA_FILE_EXTENSION)):
+                    os.unlink(os.path.join(self.directory, name))
+                    removed += 1
+        return removed
+
+    def _get_digest(self, url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]
+
+    def _get_path(self, url: str, extension: str) -> str:
+        return os.path.join(self.directory, self._get_digest(url) + extension)
+
+    def _read_metadata(self, url: str) -> Optional[dict]:
+        path = self._get_path(url, METADATA_FILE_EXTENSION)
+        if not (os.path.exists(path) and os.path.exists(self._get_path(url, BODY_FILE_EXTENSION))):
+            return None
+        try:
+            return util.read_json_file(path)
+        except ValueError as e:
+            logger.warning("Failed to read cached metadata: %s (%s)", path, e)
+            return None
+
+    def _write_metadata(self, url: str, metadata: dict) -> None:
+        self._write(self._get_path(url, METADATA_FILE_EXTENSION), json.dumps(metadata).encode('utf-8'))
+
+    def _read_body(self, url: str) -> bytes:
+        with gzip.open(self._get_path(url, BODY_FILE_EXTENSION), mode='rb') as fp:
+            return fp.read()
+
+    def _write_body(self, url: str, body: bytes) -> None:
+        self._write(self._get_path(url, BODY_FILE_EXTENSION), gzip.compress(body))
+
+    def _write(self, path: str, data: bytes) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        util.write_file_atomically(path, data)
@@ -0,0 +1,204 @@
+from dataclasses import dataclass
+import dataclasses
+import json
+from typing import Iterable, List, Optional, Union
+import logging
+
+import polars as pl
+
+from mitre_attack_navigator_layer_builder import coloring
+from mitre_attack_navigator_layer_builder.coloring import ColorScheme, GradientColorScheme, LabeledColorScheme, SingleColorScheme
+from mitre_attack_navigator_layer_builder.constants import AVG, MAX, MIN, SUM
+from mitre_attack_navigator_layer_builder.layers import Divider, Layer, Link, MetadataItem, Technique
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = {
+    'layer': pl.UInt32,             # The position of the layer within the frame.
+    'name': pl.Utf8,                # The name of the layer.
+    'techniqueID': pl.Utf8,
+    'tactic': pl.Utf8,
+    'showSubtechniques': pl.Boolean,
+    'enabled': pl.Boolean,
+    'score': pl.Int64,
+    'color': pl.Utf8,
+    'comment': pl.Utf8,
+    'metadata': pl.Utf8,            # JSON encoded metadata items (or null if there aren't any).
+    'links': pl.Utf8,               # JSON encoded links (or null if there aren't any).
+}
+
+AGGREGATE_FUNCTIONS_TO_EXPRESSIONS = {
+    AVG: pl.col('score').mean,
+    MIN: pl.col('score').min,
+    MAX: pl.col('score').max,
+    SUM: pl.col('score').sum,
+}
+
+
+@dataclass()
+class LayerFrame:
+    """
+    A columnar representation of one or more layers with one row per technique.
+
+    Layer-level attributes (e.g., the description, filters, and layout of each layer) are stored separately from the techniques so that the frame can be converted back to layers without losing any information.
+    """
+    df: pl.DataFrame
+    layers: List[Layer] = dataclasses.field(default_factory=list)  # One layer per position, without techniques.
+
+    @classmethod
+    def from_layer(cls, layer: Layer) -> "LayerFrame":
+        return cls.from_layers([layer])
+
+    @classmethod
+    def from_layers(cls, layers: Iterable[Layer]) -> "LayerFrame":
+        columns = {k: [] for k in SCHEMA}
+        templates = []
+        for i, layer in enumerate(layers):
+            templates.append(dataclasses.replace(layer, techniques=[]))
+            for technique in layer.techniques:
+                columns['layer'].append(i)
+                columns['name'].append(layer.name)
+                columns['techniqueID'].append(technique.techniqueID)
+                columns['tactic'].append(technique.tactic)
+                columns['showSubtechniques'].append(technique.showSubtechniques)
+                columns['enabled'].append(technique.enabled)
+                columns['score'].append(technique.score)
+                columns['color'].append(technique.color)
+                columns['comment'].append(technique.comment)
+                columns['metadata'].append(_encode_items(technique.metadata))
+                columns['links'].append(_encode_items(technique.links))
+
+        df = pl.DataFrame(columns, schema=SCHEMA)
+        return cls(df=df, layers=templates)
+
+    def to_layers(self) -> List[Layer]:
+        partitions = self.df.partition_by('layer', maintain_order=True, as_dict=True)
+
+        layers = []
+        for i, template in enumerate(self.layers):
+            layer = dataclasses.replace(template, techniques=[])
+            partition = partitions.get((i,))
+            if partition is not None:
+                for row in partition.iter_rows(named=True):
+                    technique = Technique(
+                        techniqueID=row['techniqueID'],
+                        tactic=row['tactic'],
+                        showSubtechniques=row['showSubtechniques'],
+                        enabled=row['enabled'],
+                        score=row['score'],
+                        color=row['color'],
+                        comment=row['comment'],
+                        metadata=_decode_items(row['metadata']),
+                        links=_decode_items(row['links']),
+                    )
+                    layer.techniques.append(technique)
+            layers.append(layer)
+        return layers
+
+    def to_layer(self) -> Layer:
+        assert len(self.layers) == 1, f"Expected a single layer - got {len(self.layers)}"
+        return self.to_layers()[0]
+
+    def _with_columns(self, *exprs: pl.Expr) -> "LayerFrame":
+        return dataclasses.replace(self, df=self.df.with_columns(*exprs))
+
+    def drop_comments(self) -> "LayerFrame":
+        return self._with_columns(pl.lit(None, dtype=pl.Utf8).alias('comment'))
+
+    def drop_tactic_mappings(self) -> "LayerFrame":
+        return self._with_columns(pl.lit(None, dtype=pl.Utf8).alias('tactic'))
+
+    def reset_scores(self, score: Optional[int] = None) -> "LayerFrame":
+        return self._with_columns(pl.lit(score, dtype=pl.Int64).alias('score'))
+
+    def disable_deselected_techniques(self) -> "LayerFrame":
+        return self._with_columns(
+            pl.when(is_selected()).then(pl.col('enabled')).otherwise(pl.lit(False)).alias('enabled')
+        )
+
+    def set_subtechnique_visibility(self, visible: bool) -> "LayerFrame":
+        return self._with_columns(pl.lit(visible).alias('showSubtechniques'))
+
+    def apply_color_scheme(self, color_scheme: Union[str, ColorScheme]) -> "LayerFrame":
+        """
+        Recolour the enabled techniques in the frame (see `layers.apply_color_scheme`) - disabled techniques keep their colours.
+        """
+        if isinstance(color_scheme, str):
+            color_scheme = SingleColorScheme(color_scheme)
+
+        enabled = pl.col('enabled').fill_null(False)
+        if isinstance(color_scheme, SingleColorScheme):
+            color = pl.lit(coloring.get_hex_color_value(color_scheme.color))
+        elif isinstance(color_scheme, GradientColorScheme):
+            max_score = self.df.filter(enabled).get_column('score').max() or 0
+            if max_score < 1:
+                return self
+            color_map = color_scheme.get_color_map(max_score)
+            color = pl.col('score').replace_strict(color_map, default=pl.col('color'), return_dtype=pl.Utf8)
+        elif isinstance(color_scheme, LabeledColorScheme):
+            color = pl.col('techniqueID').replace_strict(color_scheme.colors_to_labels, default=None, return_dtype=pl.Utf8)
+        else:
+            raise ValueError(f'Invalid color scheme: {color_scheme}')
+
+        return self._with_columns(
+            pl.when(enabled).then(color).otherwise(pl.col('color')).alias('color')
+        )
+
+    def get_selected(self) -> pl.DataFrame:
+        return self.df.filter(is_selected())
+
+    def aggregate_scores(self, aggregate_function: str = SUM) -> pl.DataFrame:
+        """
+        Aggregate the scores of selected techniques across all rows in the frame (i.e., across layers and tactics), returning one row per technique ID.
+        """
+        f = AGGREGATE_FUNCTIONS_TO_EXPRESSIONS[aggregate_function]
+        return self.get_selected().group_by('techniqueID', maintain_order=True).agg(
+            f().alias('score'),
+            pl.col('layer').n_unique().alias('layers'),
+        )
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+
+def concat(frames: Iterable[LayerFrame]) -> LayerFrame:
+    """
+    Concatenate the provided frames into a single multi-layer frame.
+    """
+    dfs = []
+    templates = []
+    for frame in frames:
+        dfs.append(frame.df.with_columns((pl.col('layer') + len(templates)).cast(pl.UInt32)))
+        templates.extend(frame.layers)
+    df = pl.concat(dfs) if dfs else pl.DataFrame(schema=SCHEMA)
+    return LayerFrame(df=df, layers=templates)
+
+
+def is_selected() -> pl.Expr:
+    """
+    An expression which matches selected techniques (see `Technique.is_selected`).
+    """
+    score = pl.col('score').fill_null(0) != 0
+    color = pl.col('color').fill_null('') != ''
+    return pl.col('enabled').fill_null(False) & (score | color)
+
+
+def _encode_items(items: List[Union[MetadataItem, Link, Divider]]) -> Optional[str]:
+    if not items:
+        return None
+    return json.dumps([dataclasses.asdict(item) for item in items])
+
+
+def _decode_items(s: Optional[str]) -> List[Union[MetadataItem, Link, Divider]]:
+    if s is None:
+        return []
+
+    items = []
+    for o in json.loads(s):
+        if 'divider' in o:
+            items.append(Divider(**o))
+        elif 'label' in o:
+            items.append(Link(**o))
+        else:
+            items.append(MetadataItem(**o))
+    return items
@@ -0,0 +1,98 @@
+import collections
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+from mitre_attack_navigator_layer_builder import coloring
+from mitre_attack_navigator_layer_builder.catalog import AttackCatalog
+from mitre_attack_navigator_layer_builder.coloring import SingleColorScheme
+from mitre_attack_navigator_layer_builder.constants import MITRE_ATTACK_ENTERPRISE
+from mitre_attack_navigator_layer_builder.layers import Layer, Link, Technique
+
+logger = logging.getLogger(__name__)
+
+GROUP = 'intrusion-set'
+MALWARE = 'malware'
+TOOL = 'tool'
+CAMPAIGN = 'campaign'
+
+ENTITY_TYPES = [GROUP, MALWARE, TOOL, CAMPAIGN]
+
+
+def get_uses_index(catalog: AttackCatalog) -> Dict[str, List[Tuple[str, Optional[str]]]]:
+    """
+    Build an index of the techniques used by each object (e.g., each group, software, or campaign) in a single pass over the `uses` relationships in a catalog.
+
+    The index maps the STIX ID of each source object to the STIX IDs of the active techniques that it uses, along with the description of each relationship. Revoked and deprecated relationships are ignored.
+    """
+    index = collections.defaultdict(list)
+    for relationship in catalog.get_objects('relationship'):
+        if relationship['relationship_type'] != 'uses' or not relationship['target_ref'].startswith('attack-pattern--'):
+            continue
+        if not catalog.is_active(relationship):
+            continue
+
+        target = catalog.get(relationship['target_ref'])
+        if target is None or not catalog.is_active(target):
+            continue
+        index[relationship['source_ref']].append((relationship['target_ref'], relationship.get('description')))
+    return dict(index)
+
+
+def iter_entity_layers(
+        catalog: AttackCatalog,
+        entity_types: Iterable[str] = ENTITY_TYPES,
+        color_scheme: Optional[SingleColorScheme] = None,
+        domain: str = MITRE_ATTACK_ENTERPRISE,
+        include_empty_layers: bool = False) -> Iterator[Tuple[str, Layer]]:
+    """
+    Generate one layer per group, software, and/or campaign in a catalog, returning an iterator of (external ID, layer) pairs.
+
+    Each layer selects the techniques used by the entity within the provided domain, with the description of each relationship as a comment, and links back to ATT&CK.
+    """
+    color_scheme = color_scheme or SingleColorScheme()
+    color = coloring.get_hex_color_value(color_scheme.color)
+    uses = get_uses_index(catalog)
+
+    # Techniques are shared by many entities, so they're only resolved once.
+    techniques = {}
+    for o in catalog.get_objects('attack-pattern'):
+        technique_id = catalog.get_external_id(o['id'])
+        if technique_id and domain in o.get('x_mitre_domains', [domain]):
+            techniques[o['id']] = (technique_id, _get_external_url(o))
+
+    for entity_type in entity_types:
+        for o in catalog.get_objects(entity_type):
+            external_id = catalog.get_external_id(o['id'])
+            if external_id is None:
+                continue
+
+            layer = Layer(
+                name=f"{o['name']} ({external_id})",
+                description=o.get('description', ''),
+                domain=domain,
+            )
+            url = _get_external_url(o)
+            if url:
+                layer.links.append(Link(label=external_id, url=url))
+
+            seen = set()
+            for stix_id, description in uses.get(o['id'], []):
+                if stix_id not in techniques or stix_id in seen:
+                    continue
+                seen.add(stix_id)
+
+                technique_id, technique_url = techniques[stix_id]
+                layer.techniques.append(Technique(
+                    techniqueID=technique_id,
+                    score=1,
+                    color=color,
+                    comment=description,
+                    links=[Link(label=technique_id, url=technique_url)] if technique_url else [],
+                ))
+
+            if layer.techniques or include_empty_layers:
+                yield external_id, layer
+
+
+def _get_external_url(o: dict) -> Optional[str]:
+    return next((ref.get('url') for ref in o.get('external_references', []) if ref.get('source_name') == 'mitre-attack'), None)
@@ -1,44 +1,77 @@
-from typing import Dict, List
-import dacite
+from typing import Any, Dict, List
 from stix2.datastore import DataSource
 import collections
 from stix2 import TAXIICollectionSource, Filter
+import stix2
 from stix2.datastore import DataSource, DataSourceError, DataStoreMixin
 from stix2.datastore.filesystem import FileSystemSource
-from stix2.datastore.filters import Filter as STIX2Filter
+from stix2.datastore.filters import Filter as STIX2Filter, FilterSet, apply_common_filters
 from stix2.datastore.memory import MemoryStore, MemorySource
 from taxii2client.v21 import Collection
-from typing import Iterable, Iterator, Optional, Union, List
-import concurrent.futures
+from typing import Iterable, Iterator, Optional, Set, Tuple, Union, List
+import dataclasses
+import functools
+import glob
+import itertools
+import gzip
 import json
 import os
-import requests
 import urllib.parse
 import uuid
 
+import numpy as np
+
+from mitre_attack_navigator_layer_builder.cache import BundleCache
+from mitre_attack_navigator_layer_builder.catalog import AttackCatalog
+from mitre_attack_navigator_layer_builder.fetch import HTTPCache
+from mitre_attack_navigator_layer_builder.coloring import GradientColorScheme, SingleColorScheme
+from mitre_attack_navigator_layer_builder.constants import DEFAULT_BUNDLE_FILE_CHUNK_SIZE, DEFAULT_LAYER_FILE_CHUNK_SIZE, JSON_INDENT, MITRE_ATTACK_ENTERPRISE
 from mitre_attack_navigator_layer_builder.layers import Layer
 from mitre_attack_navigator_layer_builder.util import JSONEncoder
-from mitre_attack_navigator_layer_builder import parsers, util
+from mitre_attack_navigator_layer_builder.vectors import TechniqueCounter, TechniqueIndex
+from mitre_attack_navigator_layer_builder import fetch, layers, parsers, serialization, streaming, util
 
 
 def iter_stix2_objects(
     data_sources: Union[str, DataSource, DataStoreMixin, Iterable[Union[str, DataSource]]], 
     queries: Optional[Iterable[str]] = None, 
     include_deprecated_objects: bool = False, 
-    include_revoked_objects: bool = False) -> Iterator[dict]:
+    include_revoked_objects: bool = False,
+    types: Optional[Iterable[str]] = None,
+    raw: bool = False,
+    cache: Optional[BundleCache] = None) -> Iterator[dict]:
     """
     Given the provided STIX 2 data sources, queries, and filters, return an iterator of STIX 2 objects.
+
+    If `raw` is true, objects from file- and directory-backed data sources will be returned as they appear in the underlying bundles, without being loaded into a STIX 2 data store first, and type/revoked/deprecated filters will be applied while scanning (see `iter_raw_stix2_objects`).
     """
-    if isinstance(data_sources, (str, MemoryStore, MemorySource, DataSource)):
+    if isinstance(data_sources, (str, MemoryStore, MemorySource, DataSource, DataStoreMixin)):
         data_sources = [data_sources]
             
     if queries:
-        queries = [parsers.parse_stix2_filter(q) if isinstance(q, str) else STIX2Filter for q in queries]
+        queries = [parsers.parse_stix2_filter(q) if isinstance(q, str) else q for q in queries]
+
+    types = set(types) if types else None
     
     decoder = parsers.MitreDecoder()
     for src in data_sources:
-        src = get_stix2_data_source(src) if isinstance(src, str) else src
-        rows = src.query(queries)
+        if raw and isinstance(src, str) and not src.startswith(('http://', 'https://')):
+            yield from iter_raw_stix2_objects(
+                src, 
+                queries=queries, 
+                types=types, 
+                include_deprecated_objects=include_deprecated_objects, 
+                include_revoked_objects=include_revoked_objects, 
+                cache=cache,
+            )
+            continue
+
+        src = get_stix2_data_source(src, cache=cache) if isinstance(src, str) else src
+        src_queries = list(queries or [])
+        if types:
+            src_queries.append(STIX2Filter('type', 'in', sorted(types)))
+
+        rows = src.query(src_queries)
         rows = map(parsers.parse_stix2_object, rows)
 
         if include_deprecated_objects is False:
@@ -50,73 +83,247 @@ def iter_stix2_objects(
         yield from rows
 
 
-def get_stix2_data_sources(data_sources: Iterable[Union[str, DataSource]]) -> List[DataSource]:
-    return list(map(get_stix2_data_source, data_sources))
+def iter_raw_stix2_objects(
+    path: str, 
+    queries: Optional[Iterable[STIX2Filter]] = None, 
+    types: Optional[Iterable[str]] = None, 
+    include_deprecated_objects: bool = False, 
+    include_revoked_objects: bool = False, 
+    cache: Optional[BundleCache] = None) -> Iterator[dict]:
+    """
+    Iterate over the objects in a STIX 2 bundle, or a directory of STIX 2 bundles, returning the objects as they appear in the bundles (i.e., without copying or re-serializing them).
+
+    Filters are applied during the scan: objects are checked by type before anything else, `type` queries are used to narrow the set of types, and, within directories, files named after an excluded type (e.g., `relationship--<uuid>.json`) are skipped without being read.
+    """
+    queries = list(queries or [])
+    types = set(types) if types else None
+    for q in [q for q in queries if q.property == 'type' and q.op in ('=', 'in')]:
+        queried_types = {q.value} if q.op == '=' else set(q.value)
+        types = types & queried_types if types is not None else queried_types
+        queries.remove(q)
+
+    decoder = parsers.MitreDecoder()
+
+    def is_match(o: dict) -> bool:
+        if types is not None and o['type'] not in types:
+            return False
+        if include_revoked_objects is False and decoder.is_revoked(o):
+            return False
+        if include_deprecated_objects is False and decoder.is_deprecated(o):
+            return False
+        return True
+
+    path = util.get_real_path(path)
+    if os.path.isdir(path):
+        rows = _iter_stix2_objects_in_directory(path, types)
+    elif cache is None:
+        rows = streaming.iter_bundle_objects(path)
+    else:
+        rows = read_stix2_bundle_objects(path, cache=cache)
+
+    rows = filter(is_match, rows)
+    if queries:
+        rows = apply_common_filters(rows, queries)
+    yield from rows
 
 
-def get_stix2_data_source(path: str, memory: bool = True) -> Union[DataSource, MemoryStore]:
+def _iter_stix2_objects_in_directory(path: str, types: Optional[Set[str]] = None) -> Iterator[dict]:
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for file in sorted(files):
+            if not file.endswith(('.json', '.json.gz')):
+                continue
+            
+            # Files are typically named after the object that they contain (e.g., `attack-pattern--<uuid>.json`).
+            object_type, sep, _ = file.partition('--')
+            if types is not None and sep and object_type not in types:
+                continue
+
+            o = util.read_json_file(os.path.join(root, file))
+            if o.get('type') == 'bundle':
+                yield from o.get('objects', [])
+            else:
+                yield o
+
+
+def get_stix2_data_sources(data_sources: Iterable[Union[str, DataSource]], cache: Optional[BundleCache] = None) -> List[DataSource]:
+    return [get_stix2_data_source(data_source, cache=cache) for data_source in data_sources]
+
+
+def get_stix2_data_source(
+        path: str, 
+        memory: bool = True, 
+        cache: Optional[BundleCache] = None, 
+        http_cache: Optional[HTTPCache] = None, 
+        jobs: int = 1, 
+        chunk_size: int = DEFAULT_BUNDLE_FILE_CHUNK_SIZE) -> Union[DataSource, MemoryStore]:
     if path.startswith(('http://', 'https://')):
-        return get_stix2_data_source_from_url(path)
+        return get_stix2_data_source_from_url(path, http_cache=http_cache)
     
     path = util.get_real_path(path)
     if not os.path.exists(path):
         raise FileNotFoundError(path)
     elif os.path.isdir(path):
-        return get_stix2_data_source_from_directory(path, memory=memory)
+        return get_stix2_data_source_from_directory(path, memory=memory, jobs=jobs, chunk_size=chunk_size)
     elif os.path.isfile(path):
-        return get_stix2_data_source_from_file(path)
+        return get_stix2_data_source_from_file(path, cache=cache)
     else:
         raise ValueError(f"Unsupported path: {path}")
 
 
-def get_stix2_data_source_from_url(url: str, verify_tls_certificate_chain: bool = False) -> DataSource:
+def get_stix2_data_source_from_url(url: str, verify_tls_certificate_chain: Optional[bool] = None, http_cache: Optional[HTTPCache] = None) -> DataSource:
+    """
+    Load a STIX 2 bundle, or a TAXII 2.1 collection, from a URL.
+
+    If an HTTP cache is provided, responses will be cached on disk and revalidated on subsequent calls (see `fetch.HTTPCache`). If `verify_tls_certificate_chain` isn't provided, the setting of the HTTP cache is used (or, without an HTTP cache, certificates aren't verified).
+    """
     scheme, _, _, _, _, _ = urllib.parse.urlparse(url)
-    if scheme in ('http', 'https'):
-        try:
-            return TAXIICollectionSource(Collection(url))
-        except DataSourceError as e:
-            response = requests.get(url, verify=verify_tls_certificate_chain)
-            response.raise_for_status()
-            data = response.json()
-            return MemorySource(data)
-    else:
+    if scheme not in ('http', 'https'):
         raise ValueError(f"Unsupported URL scheme: {url}")
+    
+    if http_cache is not None:
+        if verify_tls_certificate_chain is not None and verify_tls_certificate_chain != http_cache.verify_tls_certificate_chain:
+            http_cache = dataclasses.replace(http_cache, verify_tls_certificate_chain=verify_tls_certificate_chain)
+        return MemorySource(http_cache.get_stix2_objects(url))
 
+    try:
+        return TAXIICollectionSource(Collection(url))
+    except DataSourceError as e:
+        response = fetch.get_session().get(url, verify=bool(verify_tls_certificate_chain))
+        response.raise_for_status()
+        data = response.json()
+        return MemorySource(data)
 
-def get_stix2_data_source_from_file(path: str) -> DataSource:
-    store = MemoryStore()
-    if path.endswith(('.json', '.json.gz')):
-        bundle = util.read_json_file(path)
-        for row in bundle['objects']:
-            store.add(row)
-    else:
+
+def get_stix2_data_source_from_file(path: str, cache: Optional[BundleCache] = None) -> DataSource:
+    """
+    Load a STIX 2 bundle into memory.
+
+    If a cache is provided, the parsed contents of the bundle will be cached on disk, which avoids having to parse every object on subsequent calls.
+    """
+    if not path.endswith(('.json', '.json.gz')):
         raise ValueError(f"Unsupported file format: {path}")
-    return store
+    
+    if cache is None:
+        return MemoryStore(stix_data=_parse_stix2_bundle_objects(path))
 
+    # Parsed objects are added to the store as-is, so only the (cached) parsing step is skipped.
+    return MemoryStore(stix_data=cache.get(path, 'parsed-objects', _parse_stix2_bundle_objects))
 
-def get_stix2_data_source_from_directory(path: str, memory: bool = False) -> DataSource:
-    if memory:
-        def f(path: str) -> Iterator[dict]:
-            yield from util.read_json_file(path)['objects']
-        
-        paths = set()
-        for root, _, files in os.walk(path):
-            for file in files:
-                path = os.path.join(root, file)
-                paths.add(path)
-        
-        memory_store = MemoryStore()
-        with concurrent.futures.ThreadPoolExecutor() as executor:            
-            for bundle in executor.map(f, paths):
-                for row in bundle:
-                    memory_store.add(row)
 
-        return memory_store
-    else:
+def _parse_stix2_bundle_objects(path: str) -> list:
+    return [stix2.parse(row, allow_custom=True) for row in streaming.iter_bundle_objects(path)]
+
+
+def read_stix2_bundle_objects(path: str, cache: Optional[BundleCache] = None) -> List[dict]:
+    """
+    Read the objects in a STIX 2 bundle as dictionaries, optionally using a cache (see `get_stix2_data_source_from_file`).
+    """
+    if cache is None:
+        return list(streaming.iter_bundle_objects(path))
+    return cache.get(path, 'objects', read_stix2_bundle_objects)
+
+
+def get_stix2_data_source_from_directory(
+        path: str, 
+        memory: bool = False, 
+        jobs: int = 1, 
+        chunk_size: int = DEFAULT_BUNDLE_FILE_CHUNK_SIZE) -> DataSource:
+    """
+    Load a directory of STIX 2 bundles (e.g., a checkout of mitre/cti).
+
+    If `memory` is true, the bundles will be loaded into memory as a `RawMemorySource`. Files are split into chunks and the JSON of each chunk is decoded (optionally by a pool of `jobs` worker processes, or by one worker per CPU if `jobs` is 0) into plain dictionaries, which are indexed as-is - objects are only parsed into STIX 2 objects when they're returned by a query.
+    """
+    if not memory:
         return FileSystemSource(path)
+    
+    paths = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        paths.extend(os.path.join(root, file) for file in sorted(files) if file.endswith(('.json', '.json.gz')))
+
+    src = RawMemorySource()
+    for objects in util.map_chunks(_read_stix2_bundle_objects_in_files, paths, jobs=jobs, chunk_size=chunk_size):
+        src.add(objects)
+    return src
 
 
-def read_stix2_bundle(path: str) -> Iterable[dict]:
+class RawMemorySource(DataSource):
+    """
+    An in-memory STIX 2 data source which stores objects as plain dictionaries (e.g., as decoded from JSON).
+
+    Unlike a `MemorySource`, objects aren't parsed into STIX 2 objects when they're added, which is by far the most expensive part of loading a bundle. Filters are applied to the dictionaries, and only the objects returned by `get`, `all_versions`, and `query` are parsed (once each).
+    """
+    def __init__(self, objects: Optional[Iterable[dict]] = None, allow_custom: bool = True):
+        super().__init__()
+        self.allow_custom = allow_custom
+        self._data: Dict[str, Dict[str, Any]] = {}      # STIX IDs to versions (keyed by `modified` timestamp) of each object.
+        if objects:
+            self.add(objects)
+
+    def add(self, objects: Iterable[dict]) -> None:
+        for o in objects:
+            if o.get('type') == 'bundle':
+                self.add(o.get('objects', []))
+            else:
+                self._data.setdefault(o['id'], {})[_get_stix2_version_key(o)] = o
+
+    def get(self, stix_id: str, _composite_filters=None) -> Optional[Any]:
+        versions = self._data.get(stix_id)
+        if not versions:
+            return None
+        o = versions[max(versions)]
+        return next(iter(self._filter([o], _composite_filters=_composite_filters)), None)
+
+    def all_versions(self, stix_id: str, _composite_filters=None) -> List[Any]:
+        return self._filter(self._data.get(stix_id, {}).values(), _composite_filters=_composite_filters)
+
+    def query(self, query=None, _composite_filters=None) -> List[Any]:
+        rows = itertools.chain.from_iterable(versions.values() for versions in self._data.values())
+        return self._filter(rows, query=query, _composite_filters=_composite_filters)
+
+    def _filter(self, rows: Iterable[Any], query=None, _composite_filters=None) -> List[Any]:
+        query = FilterSet(query)
+        if self.filters:
+            query.add(self.filters)
+        if _composite_filters:
+            query.add(_composite_filters)
+        return [self._parse(o) for o in apply_common_filters(rows, query)]
+
+    def _parse(self, o: Any) -> Any:
+        if not isinstance(o, dict):
+            return o
+
+        # Parsed objects replace their dictionaries so that each object is only parsed once.
+        parsed = stix2.parse(o, allow_custom=self.allow_custom)
+        self._data[o['id']][_get_stix2_version_key(o)] = parsed
+        return parsed
+
+    def __len__(self) -> int:
+        return sum(map(len, self._data.values()))
+
+
+def _get_stix2_version_key(o: dict) -> str:
+    return o.get('modified') or o.get('created') or ''
+
+
+def _read_stix2_bundle_objects_in_files(paths: List[str]) -> List[dict]:
+    objects = []
+    for path in paths:
+        objects.extend(util.read_json_file(path).get('objects', []))
+    return objects
+
+
+def read_stix2_bundle(path: str, stream: bool = False) -> Iterable[dict]:
+    """
+    Read the objects in a STIX 2 bundle.
+    
+    If `stream` is true and the bundle is a file, objects will be read incrementally as dictionaries (see `streaming.iter_bundle_objects`) rather than being loaded into a STIX 2 data store first.
+    """
+    if stream and os.path.isfile(util.get_real_path(path)):
+        yield from streaming.iter_bundle_objects(path)
+        return
+
     src = get_stix2_data_source(path)
     yield from src.query()
 
@@ -137,7 +344,24 @@ def new_stix2_bundle(rows: Iterable[dict], spec_version: str = '2.1') -> dict:
     }
 
 
-def get_map_of_attack_tactic_ids_to_technique_ids(data_source: DataSource) -> Dict[str, List[str]]:
+def get_attack_catalog(data_sources: Union[str, DataSource, DataStoreMixin, Iterable[Union[str, DataSource]]], cache: Optional[BundleCache] = None) -> AttackCatalog:
+    """
+    Build an ATT&CK catalog from the provided STIX 2 data sources (see `iter_stix2_objects`), including revoked and deprecated objects.
+    
+    Bundle files are read directly (optionally using a cache) rather than being loaded into a STIX 2 memory store first.
+    """
+    if isinstance(data_sources, str) and os.path.isfile(util.get_real_path(data_sources)):
+        return AttackCatalog(objects=read_stix2_bundle_objects(util.get_real_path(data_sources), cache=cache))
+    
+    objects = iter_stix2_objects(data_sources, include_deprecated_objects=True, include_revoked_objects=True)
+    return AttackCatalog(objects=list(objects))
+
+
+def get_map_of_attack_tactic_ids_to_technique_ids(data_source: Union[DataSource, AttackCatalog]) -> Dict[str, List[str]]:
+    if isinstance(data_source, AttackCatalog):
+        return data_source.get_map_of_tactic_ids_to_technique_ids()
+
+    decoder = parsers.MitreDecoder()
     techniques = list(map(dict, data_source.query(Filter("type", "=", "attack-pattern"))))
     tactics = list(map(dict, data_source.query(Filter("type", "=", "x-mitre-tactic"))))
     
@@ -149,14 +373,18 @@ def get_map_of_attack_tactic_ids_to_technique_ids(data_source: DataSource) -> Di
     
     tactic_ids_to_technique_ids = collections.defaultdict(set)
     for technique in techniques:
+        technique_id = decoder.get_external_id(technique)
         for phase in technique['kill_chain_phases']:
             tactic_id = tactic_shortnames_to_ids[phase['phase_name']]
-            tactic_ids_to_technique_ids[tactic_id].add(tactic_id)
+            tactic_ids_to_technique_ids[tactic_id].add(technique_id)
 
     return {k: sorted(v) for k, v in tactic_ids_to_technique_ids.items()}
     
 
-def get_map_of_attack_technique_ids_to_tactic_ids(data_source: DataSource) -> Dict[str, List[str]]:
+def get_map_of_attack_technique_ids_to_tactic_ids(data_source: Union[DataSource, AttackCatalog]) -> Dict[str, List[str]]:
+    if isinstance(data_source, AttackCatalog):
+        return data_source.get_map_of_technique_ids_to_tactic_ids()
+    
     m = collections.defaultdict(list)
     for tactic_id, technique_ids in get_map_of_attack_tactic_ids_to_technique_ids(data_source).items():
         for technique_id in technique_ids:
@@ -164,22 +392,214 @@ def get_map_of_attack_technique_ids_to_tactic_ids(data_source: DataSource) -> Di
     return dict(m)
 
 
+def read_layer(path: str, compact: bool = False, strict: bool = False) -> Layer:
+    """
+    Read a layer from a JSON file, optionally using memory-compact techniques (see `layers.compact_layer`).
 
-def read_layer(path: str) -> Layer:
+    If `strict` is true, the layer will be validated before it's decoded (see `serialization.decode_layer`).
+    """
     path = util.get_real_path(path)
     o = util.read_json_file(path)
-    return dacite.from_dict(data_class=Layer, data=o)
+    return serialization.decode_layer(o, strict=strict, compact=compact)
 
 
+def write_layers(
+        layers: Iterable[Tuple[str, Layer]], 
+        path: str, 
+        jobs: int = 1, 
+        chunk_size: int = DEFAULT_LAYER_FILE_CHUNK_SIZE,
+        indent: Optional[int] = JSON_INDENT) -> int:
+    """
+    Write (name, layer) pairs to a directory (as `<name>.json` files) or, if the path ends with `.jsonl` or `.jsonl.gz`, to a JSONL archive with one compact layer per line, returning the number of layers that were written.
 
-# TODO: add support for CSV
-def write_layer(layer: Layer, path: str, indent: int = 4) -> None:
-    data = util.prune_dict(layer.__dict__())
+    Layers are split into chunks and each chunk is encoded (optionally by a pool of `jobs` worker processes, or by one worker per CPU if `jobs` is 0) while the next chunks are being generated - at most two chunks per worker are generated ahead of the writer.
+    """
+    path = util.get_real_path(path)
+    if not path.endswith(('.jsonl', '.jsonl.gz')):
+        os.makedirs(path, exist_ok=True)
+        rows = ((os.path.join(path, f'{name}.json'), layer) for name, layer in layers)
+        return sum(util.map_chunks(functools.partial(_write_layers, indent=indent), rows, jobs=jobs, chunk_size=chunk_size))
+
+    total = 0
+    with gzip.open(path, mode='wt') if path.endswith('.gz') else open(path, mode='w') as fp:
+        for lines in util.map_chunks(_encode_layers, (layer for _, layer in layers), jobs=jobs, chunk_size=chunk_size):
+            fp.writelines(lines)
+            total += len(lines)
+    return total
+
+
+def _encode_layers(layers: List[Layer]) -> List[str]:
+    return [serialization.encode_layer(layer, indent=None) + '\n' for layer in layers]
+
+
+def _write_layers(rows: List[Tuple[str, Layer]], indent: Optional[int] = JSON_INDENT) -> int:
+    for path, layer in rows:
+        write_layer(layer, path, indent=indent)
+    return len(rows)
+
+
+def iter_layers_from_jsonl(path: str, compact: bool = False) -> Iterator[Layer]:
+    """
+    Read layers from a JSONL archive (see `write_layers`).
+    """
+    path = util.get_real_path(path)
+    with (gzip.open(path, mode='rt') if path.endswith('.gz') else open(path, mode='r')) as fp:
+        for line in fp:
+            if line.strip():
+                yield serialization.decode_layer(json.loads(line), compact=compact)
+
+
+def iter_layer_paths(paths: Union[str, Iterable[str]]) -> Iterator[str]:
+    """
+    Given one or more paths to layer files, directories, or glob patterns (e.g., "layers/**/*.json"), return an iterator of paths to layer files.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+
+    for path in paths:
+        path = util.get_real_path(path)
+        if glob.has_magic(path):
+            yield from sorted(glob.iglob(path, recursive=True))
+        elif os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for file in sorted(files):
+                    if file.endswith(('.json', '.json.gz')):
+                        yield os.path.join(root, file)
+        else:
+            yield path
+
+
+def read_layer_technique_ids(path: str) -> Tuple[str, Set[str], Set[str]]:
+    """
+    Read the domain, technique IDs, and selected technique IDs of a layer without decoding the rest of the layer.
+    """
+    o = util.read_json_file(path)
+    technique_ids = set()
+    selected_technique_ids = set()
+    for technique in o.get('techniques', []):
+        technique_id = technique['techniqueID']
+        technique_ids.add(technique_id)
+
+        # See `Technique.is_selected`.
+        if technique.get('enabled', True) and any((technique.get('score'), technique.get('color'))):
+            selected_technique_ids.add(technique_id)
+
+    return o.get('domain', MITRE_ATTACK_ENTERPRISE), technique_ids, selected_technique_ids
 
+
+def calculate_heatmap_from_files(
+        paths: Union[str, Iterable[str]], 
+        color_scheme: Optional[GradientColorScheme] = None, 
+        index: Optional[TechniqueIndex] = None,
+        jobs: int = 1,
+        chunk_size: int = DEFAULT_LAYER_FILE_CHUNK_SIZE) -> Layer:
+    """
+    Calculate a heatmap over any number of layer files (see `layers.calculate_heatmap`).
+
+    Layer files are read one at a time and only their selected technique IDs are kept, so peak memory use doesn't grow with the number of layers.
+    
+    If `jobs` is greater than one, layer files will be read in parallel by a pool of worker processes (or by one worker process per CPU if `jobs` is zero).
+    """
+    domains, _, counter = count_selected_techniques_in_files(paths, index=index, jobs=jobs, chunk_size=chunk_size)
+    return layers.new_heatmap_layer(
+        counter.index, 
+        counter.counts, 
+        color_scheme=color_scheme, 
+        domain=next(iter(domains), MITRE_ATTACK_ENTERPRISE),
+    )
+
+
+def merge_layer_files(
+        paths: Union[str, Iterable[str]], 
+        merge_strategy: str = layers.DEFAULT_MERGE_STRATEGY, 
+        color_scheme: Optional[SingleColorScheme] = None,
+        jobs: int = 1,
+        chunk_size: int = DEFAULT_LAYER_FILE_CHUNK_SIZE) -> Layer:
+    """
+    Merge any number of layer files using the provided merge strategy (see `layers.merge_layers`).
+
+    Every merge strategy can be calculated from per-technique selection counts and the techniques selected in the first and last layers, so layer files can be read in parallel (see `calculate_heatmap_from_files`).
+    """
+    color_scheme = color_scheme or SingleColorScheme()
+    paths = list(iter_layer_paths(paths))
+    domains, total_layers, counter = count_selected_techniques_in_files(paths, jobs=jobs, chunk_size=chunk_size)
+
+    # The left and right differences also depend on the techniques selected in the first and last layers.
+    index = counter.index
+    first = last = np.zeros(len(index), dtype=bool)
+    if paths:
+        first = index.get_mask(read_layer_technique_ids(paths[0])[2])
+        last = index.get_mask(read_layer_technique_ids(paths[-1])[2])
+
+    mask = layers.get_merge_mask_from_counts(merge_strategy, counter.counts, total_layers, first, last)
+
+    return layers.new_layer_from_masks(
+        index,
+        [(mask, color_scheme.color)],
+        domain=next(iter(domains), MITRE_ATTACK_ENTERPRISE),
+        name=f'{layers.MERGE_STRATEGIES_TO_LABELS[merge_strategy]} of {total_layers} layers',
+        description=f'{layers.MERGE_STRATEGIES_TO_LABELS[merge_strategy]} of {total_layers} layers',
+    )
+
+
+def count_selected_techniques_in_files(
+        paths: Union[str, Iterable[str]], 
+        index: Optional[TechniqueIndex] = None, 
+        jobs: int = 1,
+        chunk_size: int = DEFAULT_LAYER_FILE_CHUNK_SIZE) -> Tuple[Set[str], int, TechniqueCounter]:
+    """
+    Count the number of layer files in which each technique is selected, returning the set of domains, the total number of layers, and the counts.
+
+    Layer files are split into chunks and each chunk is counted as a partial aggregate (optionally by a pool of worker processes) which is then merged into the result.
+    """
+    counter = TechniqueCounter(index=index if index is not None else TechniqueIndex())
+    domains = set()
+    total_layers = 0
+
+    partials = util.map_chunks(_count_selected_techniques_in_files, iter_layer_paths(paths), jobs=jobs, chunk_size=chunk_size)
+    for partial_domains, partial_total_layers, partial_counter in partials:
+        domains |= partial_domains
+        assert len(domains) <= 1, f'All layers must have the same domain - got {domains}'
+
+        total_layers += partial_total_layers
+        counter.merge(partial_counter)
+
+    return domains, total_layers, counter
+
+
+def _count_selected_techniques_in_files(paths: List[str]) -> Tuple[Set[str], int, TechniqueCounter]:
+    counter = TechniqueCounter()
+    domains = set()
+    for path in paths:
+        domain, technique_ids, selected_technique_ids = read_layer_technique_ids(path)
+        domains.add(domain)
+        counter.register(technique_ids)
+        counter.add(selected_technique_ids)
+    return domains, len(paths), counter
+
+
+def read_heatmap_accumulator(path: str) -> layers.HeatmapAccumulator:
+    path = util.get_real_path(path)
+    o = util.read_json_file(path)
+    return layers.HeatmapAccumulator.from_dict(o)
+
+
+def write_heatmap_accumulator(accumulator: layers.HeatmapAccumulator, path: str) -> None:
+    path = util.get_real_path(path)
+    with open(path, mode='w') as fp:
+        json.dump(accumulator.to_dict(), fp, cls=JSONEncoder)
+
+
+# TODO: add support for CSV
+def write_layer(layer: Layer, path: str, indent: Optional[int] = JSON_INDENT) -> None:
+    """
+    Write a layer to a JSON file - if `indent` is `None`, the layer will be written in compact form (see `serialization.encode_layer`).
+    """
     path = util.get_real_path(path)
 
     if path.endswith('.json'):
         with open(path, mode='w') as fp:
-            json.dump(data, fp, cls=JSONEncoder, indent=indent)
+            serialization.dump_layer(layer, fp, indent=indent)
     else:
         raise ValueError(f"Unsupported file extension: {path}")
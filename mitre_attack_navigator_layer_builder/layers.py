@@ -1,15 +1,21 @@
-import collections
 from dataclasses import dataclass
 import dataclasses
-from typing import Dict, Iterable, Iterator, List, Optional, Set, Union
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 import logging
+import sys
+
+import numpy as np
 
 from mitre_attack_navigator_layer_builder.util import JSONEncoder
-from mitre_attack_navigator_layer_builder import coloring, util, parsers
+from mitre_attack_navigator_layer_builder import coloring, util, parsers, vectors
+from mitre_attack_navigator_layer_builder.catalog import AttackCatalog, TechniqueDetails
 from mitre_attack_navigator_layer_builder.parsers import MitreDecoder
 from mitre_attack_navigator_layer_builder.coloring import ColorScheme, DiffColorScheme, GradientColorScheme, IntersectionColorScheme, LabeledColorScheme, SingleColorScheme
 from mitre_attack_navigator_layer_builder.constants import ALL, ATTACK_NAVIGATOR_LAYER_VERSION, ATTACK_NAVIGATOR_VERSION, AVG, MAX, MITRE_ATTACK_ENTERPRISE, MITRE_ATTACK_ICS, MITRE_ATTACK_MOBILE, NONE, SIDE, SORT_ASCENDING_BY_TECHNIQUE_NAME
 
+if TYPE_CHECKING:
+    from mitre_attack_navigator_layer_builder.universe import TechniqueUniverse, TechniqueUniverseProvider
+
 logger = logging.getLogger(__name__)
 
 
@@ -102,6 +108,122 @@ class Technique:
         return self.is_selected()
 
 
+# The measured memory footprint of a `CompactTechnique` (including its slot in the `techniques` list) is ~115 bytes, compared to ~330 bytes for a `Technique` (see `tests/test_layers.py`).
+COMPACT_TECHNIQUE_MEMORY_BUDGET = 128
+
+
+@dataclass(slots=True)
+class CompactTechnique:
+    """
+    A memory-compact, drop-in replacement for `Technique` intended for large in-memory collections of layers (see `compact_layer`).
+
+    Compact techniques don't have a per-instance `__dict__`, technique IDs, tactics, and colors are interned, and techniques without metadata or links share the same empty tuple.
+    """
+    techniqueID: str
+    tactic: Optional[str] = None
+    showSubtechniques: bool = False
+    enabled: Optional[bool] = True
+    score: Optional[int] = None
+    color: Optional[str] = None
+    comment: Optional[str] = None
+    metadata: Tuple[Union[MetadataItem, Divider], ...] = ()
+    links: Tuple[Union[Link, Divider], ...] = ()
+
+    def __post_init__(self):
+        self.techniqueID = sys.intern(self.techniqueID)
+        if self.tactic is not None:
+            self.tactic = sys.intern(self.tactic)
+        if self.color is not None:
+            self.color = sys.intern(self.color)
+        self.metadata = tuple(self.metadata) if self.metadata else ()
+        self.links = tuple(self.links) if self.links else ()
+
+    @classmethod
+    def from_technique(cls, technique: Technique) -> "CompactTechnique":
+        return cls(
+            techniqueID=technique.techniqueID,
+            tactic=technique.tactic,
+            showSubtechniques=technique.showSubtechniques,
+            enabled=technique.enabled,
+            score=technique.score,
+            color=technique.color,
+            comment=technique.comment,
+            metadata=technique.metadata,
+            links=technique.links,
+        )
+    
+    def to_technique(self) -> Technique:
+        return Technique(
+            techniqueID=self.techniqueID,
+            tactic=self.tactic,
+            showSubtechniques=self.showSubtechniques,
+            enabled=self.enabled,
+            score=self.score,
+            color=self.color,
+            comment=self.comment,
+            metadata=list(self.metadata),
+            links=list(self.links),
+        )
+
+    id = Technique.id
+    is_selected = Technique.is_selected
+    is_deselected = Technique.is_deselected
+    is_enabled = Technique.is_enabled
+    is_disabled = Technique.is_disabled
+    __bool__ = Technique.__bool__
+
+
+class TechniqueList(list):
+    """
+    The list of techniques in a layer.
+
+    Appending techniques is tracked by length, and every other change (e.g., replacing, removing, inserting, or reordering techniques) increments `version`, so the layer's technique index can be kept in sync in time proportional to the number of techniques that are looked up.
+    """
+    version = 0
+
+    def _changed(self) -> None:
+        self.version += 1
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+    def __imul__(self, n):
+        self._changed()
+        return super().__imul__(n)
+
+    def insert(self, i, technique):
+        super().insert(i, technique)
+        self._changed()
+
+    def pop(self, i=-1):
+        self._changed()
+        return super().pop(i)
+
+    def remove(self, technique):
+        super().remove(technique)
+        self._changed()
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._changed()
+
+    def reverse(self):
+        super().reverse()
+        self._changed()
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
 @dataclass()
 class Versions:
     """
@@ -163,6 +285,79 @@ class Layer:
         self.description = self.description or ""
         assert self.domain in [MITRE_ATTACK_ENTERPRISE, MITRE_ATTACK_MOBILE, MITRE_ATTACK_ICS], f"Invalid domain: {self.domain}"
 
+        # An index of technique IDs to techniques (one entry per tactic) which is kept in sync with `techniques`.
+        self._technique_index: Dict[str, List[Technique]] = {}
+        self._indexed_techniques: Optional[TechniqueList] = None
+        self._indexed_version = 0
+        self._total_indexed_techniques = 0
+
+    def _get_technique_index(self) -> Dict[str, List[Technique]]:
+        """
+        Return the index of technique IDs to techniques.
+
+        Techniques appended directly to `techniques` are indexed lazily, so only the new entries are visited. If the list is replaced, or entries are replaced, removed, inserted, or reordered (see `TechniqueList`), the index is rebuilt.
+        """
+        techniques = self.techniques
+        if techniques is not self._indexed_techniques or techniques.version != self._indexed_version:
+            self._technique_index = {}
+            self._indexed_techniques = techniques
+            self._indexed_version = techniques.version
+            self._total_indexed_techniques = 0
+
+        index = self._technique_index
+        if len(techniques) > self._total_indexed_techniques:
+            for technique in techniques[self._total_indexed_techniques:]:
+                index.setdefault(technique.techniqueID, []).append(technique)
+            self._total_indexed_techniques = len(techniques)
+        return index
+
+    def reindex_techniques(self) -> "Layer":
+        """
+        Rebuild the technique index (e.g., after changing the technique IDs of existing entries in place).
+        """
+        self._indexed_techniques = None
+        self._get_technique_index()
+        return self
+
+    def new_technique(self, technique_id: str, **kwargs) -> Technique:
+        """
+        Create a technique of the same type as the techniques already in the layer (i.e., a `CompactTechnique` if the layer has been compacted - see `compact_layer`) without adding it to the layer.
+        """
+        if self.techniques and isinstance(self.techniques[0], CompactTechnique):
+            return CompactTechnique(techniqueID=technique_id, **kwargs)
+        return Technique(techniqueID=technique_id, **kwargs)
+
+    def _add_technique(self, technique: Technique) -> Technique:
+        # Callers fetch (and so validate) the index before adding techniques, so it isn't checked again for every technique.
+        index = self._technique_index
+        self.techniques.append(technique)
+        index.setdefault(technique.techniqueID, []).append(technique)
+        self._total_indexed_techniques += 1
+        return technique
+
+    def _iter_techniques(self, technique_ids: Optional[Iterable[str]] = None) -> Iterator[Technique]:
+        if technique_ids is None:
+            yield from self.techniques
+        else:
+            index = self._get_technique_index()
+            for technique_id in set(technique_ids):
+                yield from index.get(technique_id, ())
+
+    def has_technique(self, technique_id: str) -> bool:
+        return technique_id in self._get_technique_index()
+
+    def get_technique(self, technique_id: str, tactic: Optional[str] = None) -> Optional[Technique]:
+        """
+        Lookup a technique by ID, and optionally, by tactic shortname.
+        """
+        for technique in self._get_technique_index().get(technique_id, ()):
+            if tactic is None or technique.tactic == tactic:
+                return technique
+        return None
+
+    def get_techniques(self, technique_ids: Iterable[str]) -> List[Technique]:
+        return list(self._iter_techniques(technique_ids))
+
     @property
     def technique_ids(self) -> Set[str]:
         return self.get_technique_ids()
@@ -176,19 +371,19 @@ class Layer:
         return self.get_deselected_technique_ids()
     
     def get_technique_ids(self) -> Set[str]:
-        return {technique.techniqueID for technique in self.techniques}
+        return set(self._get_technique_index())
     
-    def get_enabled_technique_ids(self) -> Set[str]:
-        return {technique.techniqueID for technique in self.techniques if technique.is_enabled()}
+    def get_enabled_technique_ids(self, technique_ids: Optional[Iterable[str]] = None) -> Set[str]:
+        return {technique.techniqueID for technique in self._iter_techniques(technique_ids) if technique.is_enabled()}
     
-    def get_disabled_technique_ids(self) -> Set[str]:
-        return {technique.techniqueID for technique in self.techniques if technique.is_disabled()}
+    def get_disabled_technique_ids(self, technique_ids: Optional[Iterable[str]] = None) -> Set[str]:
+        return {technique.techniqueID for technique in self._iter_techniques(technique_ids) if technique.is_disabled()}
     
-    def get_selected_technique_ids(self) -> Set[str]:
-        return {technique.techniqueID for technique in self.techniques if technique.is_selected()}
+    def get_selected_technique_ids(self, technique_ids: Optional[Iterable[str]] = None) -> Set[str]:
+        return {technique.techniqueID for technique in self._iter_techniques(technique_ids) if technique.is_selected()}
     
-    def get_deselected_technique_ids(self) -> Set[str]:
-        return {technique.techniqueID for technique in self.techniques if technique.is_deselected()}
+    def get_deselected_technique_ids(self, technique_ids: Optional[Iterable[str]] = None) -> Set[str]:
+        return {technique.techniqueID for technique in self._iter_techniques(technique_ids) if technique.is_deselected()}
 
     def select_techniques(
             self, 
@@ -199,29 +394,28 @@ class Layer:
         technique_ids = set(technique_ids)
         assert technique_ids, "No technique IDs provided"
 
-        existing_technique_ids = self.technique_ids
-        new_technique_ids = technique_ids - existing_technique_ids
+        # Colours are interned so that they're shared by compact techniques (see `CompactTechnique`).
+        color = sys.intern(coloring.get_hex_color_value(color)) if color else None
 
-        color = coloring.get_hex_color_value(color) if color else None
+        index = self._get_technique_index()
+        for technique_id in technique_ids:
+            existing = index.get(technique_id)
+            
+            # Update techniques.
+            if existing:
+                for technique in existing:
+                    technique.enabled = True
+                    technique.score = score
+                    technique.color = color
 
-        # Add techniques.
-        if new_technique_ids:
-            for technique_id in new_technique_ids:
-                technique = Technique(
-                    techniqueID=technique_id, 
+            # Add techniques.
+            else:
+                technique = self.new_technique(
+                    technique_id, 
                     score=score, 
                     color=color,
                 )
-                self.techniques.append(technique)
-        
-        # Update techniques.
-        if existing_technique_ids:
-            for i, technique in enumerate(self.techniques):
-                if technique.techniqueID in technique_ids:
-                    technique.enabled = True
-                    technique.score = score
-                    technique.color = color
-                    self.techniques[i] = technique
+                self._add_technique(technique)
 
         return self
 
@@ -229,29 +423,30 @@ class Layer:
         technique_ids = set(technique_ids)
         assert technique_ids, "No technique IDs provided"
         
-        # Deselect any techniques that exist in the layer.
-        for i, technique in enumerate(self.techniques):
-            if technique.techniqueID in technique_ids:
-                if disable:
-                    technique.enabled = False
-
-                if score is not None:
-                    technique.score = score
-
-                if reset_color:
-                    technique.color = None
-
-                self.techniques[i] = technique
-            
-        # Add any missing techniques.
-        missing_technique_ids = technique_ids - self.technique_ids
-        for technique_id in missing_technique_ids:
-            technique = Technique(
-                techniqueID=technique_id,
-                enabled=False,
-                score=score,
-            )
-            self.techniques.append(technique)
+        index = self._get_technique_index()
+        for technique_id in technique_ids:
+            existing = index.get(technique_id)
+
+            # Deselect any techniques that exist in the layer.
+            if existing:
+                for technique in existing:
+                    if disable:
+                        technique.enabled = False
+
+                    if score is not None:
+                        technique.score = score
+
+                    if reset_color:
+                        technique.color = None
+
+            # Add any missing techniques.
+            else:
+                technique = self.new_technique(
+                    technique_id,
+                    enabled=False,
+                    score=score,
+                )
+                self._add_technique(technique)
         
         return self
     
@@ -266,8 +461,8 @@ class Layer:
             self.techniques[i].showSubtechniques = visible
         return self
 
-    def get_colors(self, include_color_gradient: bool = False) -> List[str]:
-        colors = {technique.color for technique in self.techniques if technique.color}
+    def get_colors(self, include_color_gradient: bool = False, technique_ids: Optional[Iterable[str]] = None) -> List[str]:
+        colors = {technique.color for technique in self._iter_techniques(technique_ids) if technique.color}
         if include_color_gradient and self.gradient:
             colors |= set(self.gradient.colors)
         return sorted(colors)
@@ -286,9 +481,9 @@ class Layer:
             self.techniques[i].tactic = None
         return self
     
-    def get_scores(self) -> Dict[str, int]:
+    def get_scores(self, technique_ids: Optional[Iterable[str]] = None) -> Dict[str, int]:
         scores = {}
-        for technique in self.techniques:
+        for technique in self._iter_techniques(technique_ids):
             if technique.is_selected() and technique.score is not None:
                 scores[technique.techniqueID] = technique.score
         return scores
@@ -301,41 +496,86 @@ class Layer:
     def __dict__(self):
         data = dataclasses.asdict(self)
         return data
-    
+
+    def __reduce__(self):
+        # `__dict__` is overridden, so layers can't be pickled (e.g., when they're sent to worker processes) by default.
+        return self.__class__, tuple(getattr(self, f.name) for f in dataclasses.fields(self))
+
     def __iter__(self) -> Iterator[Technique]:
         yield from self.techniques
 
 
-def merge_layers_as_heatmap(layers: List[Layer]) -> Layer:
-    domains = {layer.domain for layer in layers}
-    assert len(domains) == 1, f'All layers must have the same domain - got {domains}'
-    
-    technique_scores = collections.defaultdict(int)
-    for layer in layers:
-        for technique in layer.techniques:
-            if technique.enabled:
-                technique_scores[technique.id] += 1
-    
-    max_score = max(technique_scores.values())
-    color_scheme = GradientColorScheme()
+def _get_techniques(layer: Layer) -> "TechniqueList":
+    return layer._techniques
+
+
+def _set_techniques(layer: Layer, techniques: Iterable[Technique]) -> None:
+    layer._techniques = techniques if isinstance(techniques, TechniqueList) else TechniqueList(techniques)
+
+
+# Techniques are stored in a `TechniqueList` so that the technique index can detect changes without rescanning the list.
+Layer.techniques = property(_get_techniques, _set_techniques)
+
+
+def compact_layer(layer: Layer) -> Layer:
+    """
+    Replace the techniques in the provided layer with `CompactTechnique`s.
+    """
+    layer.techniques = [technique if isinstance(technique, CompactTechnique) else CompactTechnique.from_technique(technique) for technique in layer.techniques]
+    return layer
+
+
+def merge_layers_as_heatmap(layers: List[Layer], color_scheme: Optional[GradientColorScheme] = None) -> Layer:
+    """
+    Merge the provided layers into a heatmap where each technique is scored by the number of layers in which it is enabled.
+    """
+    matrix = vectors.LayerMatrix.from_layers(layers)
+    return new_heatmap_layer(
+        matrix.index,
+        matrix.enabled.sum(axis=0, dtype=np.int64),
+        color_scheme=color_scheme,
+        present=matrix.get_present(),
+        domain=matrix.domain or MITRE_ATTACK_ENTERPRISE,
+    )
+
+
+def new_heatmap_layer(index: vectors.TechniqueIndex, counts: np.ndarray, color_scheme: Optional[GradientColorScheme] = None, present: Optional[np.ndarray] = None, **kwargs) -> Layer:
+    """
+    Create a heatmap layer from per-technique counts.
+
+    Techniques with a non-zero count are scored and coloured using the provided gradient, and all other techniques in the index (or only those in `present`) are included without a score.
+    """
+    color_scheme = color_scheme or GradientColorScheme()
+    kwargs.setdefault('name', 'Heatmap')
+
+    # Gradients require at least two colors.
+    max_score = max(int(counts.max()) if len(counts) else 0, 2)
     color_map = color_scheme.get_color_map(max_score)
 
     layer = Layer(
-        domain=next(iter(domains)),
         gradient=Gradient(
             minValue=1,
             maxValue=max_score,
             colors=list(color_map.values()),
-        )
+        ),
+        **kwargs,
     )
-    for technique, score in technique_scores.items():
-        technique = Technique(
-            techniqueID=technique, 
-            score=score, 
-            color=color_map[score],
-        )
+    positions = range(len(index)) if present is None else np.flatnonzero(present)
+    for i in positions:
+        technique_id = index.technique_ids[i]
+        score = int(counts[i])
+        if score > 0:
+            technique = Technique(
+                techniqueID=technique_id, 
+                score=score, 
+                color=color_map[score],
+            )
+        else:
+            technique = Technique(
+                techniqueID=technique_id,
+            )
         layer.techniques.append(technique)
-    
+
     return layer
 
 
@@ -404,7 +644,6 @@ MERGE_STRATEGIES = [
 DEFAULT_MERGE_STRATEGY = UNION
 
 
-# TODO
 def merge(a: Layer, b: Layer, merge_strategy: str) -> Layer:
     f = MERGE_STRATEGIES_TO_FUNCTIONS[merge_strategy]    
     c = f(a, b)
@@ -419,47 +658,106 @@ def get_deselected_techniques(layer: Layer) -> Set[str]:
     return {technique.id for technique in layer.techniques if technique.is_deselected()}
 
 
-# TODO
 def calculate_heatmap(layers: List[Layer], color_scheme: Optional[GradientColorScheme] = None) -> Layer:
-    techniques = []
-    color_scheme = color_scheme or GradientColorScheme()
+    """
+    Calculate a heatmap where each technique is scored by the number of layers in which it is selected.
+    
+    To build a heatmap over a large number of layer files without loading them all into memory, see `io.calculate_heatmap_from_files`.
+    """
+    matrix = vectors.LayerMatrix.from_layers(layers)
+    return new_heatmap_layer(
+        matrix.index,
+        matrix.get_selection_counts(),
+        color_scheme=color_scheme,
+        present=matrix.get_present(),
+        domain=matrix.domain or MITRE_ATTACK_ENTERPRISE,
+    )
+
+
+@dataclass()
+class HeatmapAccumulator:
+    """
+    A heatmap that can be updated incrementally as layers are added, removed, or changed (see `calculate_heatmap`).
+
+    Each operation runs in time proportional to the size of the layer rather than the number of layers in the heatmap.
+    """
+    domain: str = MITRE_ATTACK_ENTERPRISE
+    color_scheme: GradientColorScheme = dataclasses.field(default_factory=GradientColorScheme)
+    total_layers: int = 0
+    index: vectors.TechniqueIndex = dataclasses.field(default_factory=vectors.TechniqueIndex)
+
+    def __post_init__(self):
+        self._selected = vectors.TechniqueCounter(index=self.index)  # The number of layers in which each technique is selected.
+        self._present = vectors.TechniqueCounter(index=self.index)   # The number of layers in which each technique is present.
 
-    # Rank techniques by frequency.
-    m = collections.defaultdict(int)
-    for layer in layers:
-        for technique_id in layer.get_selected_technique_ids():
-            m[technique_id] += 1
+    @property
+    def counts(self) -> np.ndarray:
+        return self._selected.counts
+
+    def add(self, layer: Layer) -> "HeatmapAccumulator":
+        assert layer.domain == self.domain, f'All layers must have the same domain - got {layer.domain} (expected {self.domain})'
+        self._present.add(layer.get_technique_ids())
+        self._selected.add(layer.get_selected_technique_ids())
+        self.total_layers += 1
+        return self
+
+    def remove(self, layer: Layer) -> "HeatmapAccumulator":
+        """
+        Remove a layer that was previously added - the layer must be identical to the one that was added (in terms of the techniques that are present and selected), otherwise a `ValueError` is raised and the heatmap is left unchanged.
+        """
+        technique_ids = layer.get_technique_ids()
+        selected_technique_ids = layer.get_selected_technique_ids()
+        positions = self.index.get_positions(technique_ids)
+        selected_positions = self.index.get_positions(selected_technique_ids)
+        if self.total_layers < 1 or len(positions) < len(technique_ids) or len(selected_positions) < len(selected_technique_ids):
+            raise ValueError(f"Layer was not added to the heatmap: `{layer.name}`")
+
+        # After removing the layer, no technique can be present in fewer layers than it's selected in.
+        present = self._present.counts[positions] - 1
+        selected = self._selected.counts[positions] - np.isin(positions, selected_positions)
+        if (present < 0).any() or (selected < 0).any() or (selected > present).any() or not np.isin(selected_positions, positions).all():
+            raise ValueError(f"Layer was not added to the heatmap: `{layer.name}`")
         
-    max_score = max(m.values())
-    color_map = color_scheme.get_color_map(max_score)
+        self._present.subtract(technique_ids)
+        self._selected.subtract(selected_technique_ids)
+        self.total_layers -= 1
+        return self
 
-    for technique, score in m.items():
-        technique = Technique(
-            techniqueID=technique, 
-            score=score, 
-            color=color_map[score],
+    def update(self, old: Layer, new: Layer) -> "HeatmapAccumulator":
+        assert new.domain == self.domain, f'All layers must have the same domain - got {new.domain} (expected {self.domain})'
+        return self.remove(old).add(new)
+
+    def get_layer(self, **kwargs) -> Layer:
+        return new_heatmap_layer(
+            self.index, 
+            self.counts, 
+            color_scheme=self.color_scheme, 
+            present=self._present.counts > 0, 
+            domain=self.domain, 
+            **kwargs,
         )
-        techniques.append(technique)
-
-    # Add any other techniques.
-    all_technique_ids = {technique.id for layer in layers for technique in layer.techniques}
-    for technique_id in all_technique_ids:
-        if technique_id not in m:
-            technique = Technique(
-                techniqueID=technique_id,
-            )
-            techniques.append(technique)
 
-    layer = Layer(
-        name='Heatmap',
-        gradient=Gradient(
-            minValue=1,
-            maxValue=max_score,
-            colors=list(color_map.values()),
-        ),
-        techniques=techniques,
-    )
-    return layer
+    def to_dict(self) -> dict:
+        return {
+            'domain': self.domain,
+            'color_scheme': dataclasses.asdict(self.color_scheme),
+            'total_layers': self.total_layers,
+            'technique_ids': self.index.technique_ids,
+            'selected': self._selected.counts.tolist(),
+            'present': self._present.counts.tolist(),
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> "HeatmapAccumulator":
+        accumulator = cls(
+            domain=data['domain'],
+            color_scheme=GradientColorScheme(**data['color_scheme']),
+            total_layers=data['total_layers'],
+            index=vectors.TechniqueIndex(data['technique_ids']),
+        )
+        accumulator._selected.counts[:] = data['selected']
+        accumulator._present.counts[:] = data['present']
+        return accumulator
 
 
 # TODO
@@ -467,41 +765,39 @@ def calculate_diff(a: Layer, b: Layer) -> Layer:
     return calculate_left_diff(a, b)
 
 
-# TODO: here
 def calculate_left_diff(a: Layer, b: Layer, color_scheme: Optional[DiffColorScheme] = None) -> Layer:
-    raise NotImplementedError()
+    color_scheme = color_scheme or DiffColorScheme()
+    return merge_layers([a, b], LEFT_DIFF, color_scheme=SingleColorScheme(color_scheme.left_color))
 
 
-# TODO
-def calculate_right_diff(a: Layer, b: Layer) -> Layer:
-    return calculate_left_diff(b, a)
-
-
-# TODO
-def calculate_symmetric_diff(a: Layer, b: Layer) -> Layer:
-    raise NotImplementedError()
-
+def calculate_right_diff(a: Layer, b: Layer, color_scheme: Optional[DiffColorScheme] = None) -> Layer:
+    return calculate_left_diff(b, a, color_scheme=color_scheme)
 
-def calculate_union(a: Layer, b: Layer, color_scheme: Optional[SingleColorScheme]) -> Layer:
-    color_scheme = color_scheme or SingleColorScheme()
 
-    layer = Layer(
-        name=f'{a.name} ∪ {b.name}',
-        description=f'Union of {a.name} and {b.name}',
+def calculate_symmetric_diff(a: Layer, b: Layer, color_scheme: Optional[DiffColorScheme] = None) -> Layer:
+    color_scheme = color_scheme or DiffColorScheme()
+    legend = [
+        LegendItem(label=a.name, color=coloring.get_hex_color_value(color_scheme.left_color)),
+        LegendItem(label=b.name, color=coloring.get_hex_color_value(color_scheme.right_color)),
+    ]
+    matrix = vectors.LayerMatrix.from_layers([a, b])
+    l, r = matrix.selected
+    return new_layer_from_masks(
+        matrix.index,
+        [
+            (l & ~r, color_scheme.left_color),
+            (r & ~l, color_scheme.right_color),
+        ],
+        present=matrix.get_present(),
+        domain=matrix.domain or MITRE_ATTACK_ENTERPRISE,
+        name=f'{a.name} △ {b.name}',
+        description=f'Symmetric difference of {a.name} and {b.name}',
+        legendItems=legend,
     )
 
-    selected_techniques = a.get_selected_technique_ids() | b.get_selected_technique_ids()
-    all_techniques = a.technique_ids | b.technique_ids
-    for technique_id in all_techniques:
-        enabled = technique_id in selected_techniques
-        technique = Technique(
-            techniqueID=technique_id,
-            enabled=enabled,
-            color=color_scheme.color,
-        )
-        layer.techniques.append(technique)
 
-    return layer
+def calculate_union(a: Layer, b: Layer, color_scheme: Optional[SingleColorScheme] = None) -> Layer:
+    return merge_layers([a, b], UNION, color_scheme=color_scheme)
 
 
 def calculate_intersection(a: Layer, b: Layer, color_scheme: Optional[IntersectionColorScheme] = None) -> Layer:
@@ -511,38 +807,25 @@ def calculate_intersection(a: Layer, b: Layer, color_scheme: Optional[Intersecti
         LegendItem(label='Intersection', color=coloring.get_hex_color_value(color_scheme.intersection_color)),
         LegendItem(label=b.name, color=coloring.get_hex_color_value(color_scheme.right_color)),
     ]
-    layer = Layer(
-        name=f'{a.name} ∩ {b.name}',
-        description=f'Intersection of {a.name} and {b.name}',
-        legendItems=legend,
-    )
 
     # Calculate the intersection.
-    l = a.get_selected_technique_ids()
-    r = b.get_selected_technique_ids()
+    matrix = vectors.LayerMatrix.from_layers([a, b])
+    l, r = matrix.selected
     i = l & r
 
-    # Add the techniques to the layer.
-    for technique_id in a.technique_ids | b.technique_ids:
-        enabled = True
-        if technique_id in i:
-            color = color_scheme.intersection_color
-        elif technique_id in l:
-            color = color_scheme.left_color
-        elif technique_id in r:
-            color = color_scheme.right_color
-        else:
-            color = None
-            enabled = False
-
-        technique = Technique(
-            techniqueID=technique_id,
-            color=color,
-            enabled=enabled,
-        )
-        layer.techniques.append(technique)
-
-    return layer
+    return new_layer_from_masks(
+        matrix.index,
+        [
+            (l & ~i, color_scheme.left_color),
+            (r & ~i, color_scheme.right_color),
+            (i, color_scheme.intersection_color),
+        ],
+        present=matrix.get_present(),
+        domain=matrix.domain or MITRE_ATTACK_ENTERPRISE,
+        name=f'{a.name} ∩ {b.name}',
+        description=f'Intersection of {a.name} and {b.name}',
+        legendItems=legend,
+    )
 
 
 MERGE_STRATEGIES_TO_FUNCTIONS = {
@@ -553,31 +836,215 @@ MERGE_STRATEGIES_TO_FUNCTIONS = {
     SYMMETRIC_DIFF: calculate_symmetric_diff,
 }
 
+# N-way merges are calculated as a single reduction over a (layers x techniques) matrix of selected techniques.
+MERGE_STRATEGIES_TO_REDUCTIONS = {
+    UNION: vectors.LayerMatrix.get_union,
+    INTERSECTION: vectors.LayerMatrix.get_intersection,
+    LEFT_DIFF: vectors.LayerMatrix.get_left_diff,
+    RIGHT_DIFF: vectors.LayerMatrix.get_right_diff,
+    SYMMETRIC_DIFF: vectors.LayerMatrix.get_symmetric_diff,
+}
 
-# TODO
-def enrich_layer(layer: Layer, stix2_objects: Iterable[dict]) -> Layer:
-    raise NotImplementedError()
+MERGE_STRATEGIES_TO_SYMBOLS = {
+    UNION: '∪',
+    INTERSECTION: '∩',
+    LEFT_DIFF: '-',
+    RIGHT_DIFF: '-',
+    SYMMETRIC_DIFF: '△',
+}
 
+MERGE_STRATEGIES_TO_LABELS = {
+    UNION: 'Union',
+    INTERSECTION: 'Intersection',
+    LEFT_DIFF: 'Left difference',
+    RIGHT_DIFF: 'Right difference',
+    SYMMETRIC_DIFF: 'Symmetric difference',
+}
 
-# TODO
-def add_missing_techniques(layer: Layer, stix2_objects: Iterable[dict], enable: bool = True) -> Layer:
-    decoder = MitreDecoder()
 
-    all_technique_ids = {decoder.get_external_id(o) for o in stix2_objects if o['type'] == 'attack-pattern'}
-    existing_technique_ids = layer.technique_ids
-    missing_technique_ids = all_technique_ids - existing_technique_ids
+def merge_layers(layers: Iterable[Layer], merge_strategy: str = DEFAULT_MERGE_STRATEGY, color_scheme: Optional[SingleColorScheme] = None) -> Layer:
+    """
+    Merge any number of layers using the provided merge strategy.
 
-    logger.info("Adding %d missing techniques to layer: `%s` (enabled: %s)", len(missing_technique_ids), layer.name, enable)
-    for technique_id in missing_technique_ids:
+    Techniques that are selected in the result are enabled and coloured using the provided colour scheme, and all other techniques from the input layers are disabled.
+    """
+    color_scheme = color_scheme or SingleColorScheme()
+
+    matrix = vectors.LayerMatrix.from_layers(layers)
+    f = MERGE_STRATEGIES_TO_REDUCTIONS[merge_strategy]
+    mask = f(matrix)
+
+    names = matrix.names
+    if merge_strategy == RIGHT_DIFF:
+        names = names[::-1]
+
+    return new_layer_from_masks(
+        matrix.index,
+        [(mask, color_scheme.color)],
+        present=matrix.get_present(),
+        domain=matrix.domain or MITRE_ATTACK_ENTERPRISE,
+        name=f' {MERGE_STRATEGIES_TO_SYMBOLS[merge_strategy]} '.join(names),
+        description=f'{MERGE_STRATEGIES_TO_LABELS[merge_strategy]} of {", ".join(names)}',
+    )
+
+
+def get_merge_mask_from_counts(merge_strategy: str, counts: np.ndarray, total_layers: int, first: np.ndarray, last: np.ndarray) -> np.ndarray:
+    """
+    Calculate a merge from per-technique selection counts, and the techniques selected in the first and last layers (see `io.merge_layer_files`).
+    """
+    if merge_strategy == UNION:
+        return counts > 0
+    elif merge_strategy == INTERSECTION:
+        return (counts == total_layers) & (total_layers > 0)
+    elif merge_strategy == LEFT_DIFF:
+        return first & (counts == 1)
+    elif merge_strategy == RIGHT_DIFF:
+        return last & (counts == 1)
+    elif merge_strategy == SYMMETRIC_DIFF:
+        return counts % 2 == 1
+    else:
+        raise ValueError(f'Invalid merge strategy: {merge_strategy}')
+
+
+def new_layer_from_masks(index: vectors.TechniqueIndex, masks_to_colors: List[Tuple[np.ndarray, str]], present: Optional[np.ndarray] = None, **kwargs) -> Layer:
+    """
+    Create a layer containing every technique from the provided index (or only those in `present`) - techniques within each mask are enabled and assigned the associated colour, and all other techniques are disabled.
+    """
+    colors = np.full(len(index), None, dtype=object)
+    for mask, color in masks_to_colors:
+        colors[mask] = coloring.get_hex_color_value(color)
+
+    positions = range(len(index)) if present is None else np.flatnonzero(present)
+
+    layer = Layer(**kwargs)
+    for i in positions:
+        color = colors[i]
         technique = Technique(
-            techniqueID=technique_id,
-            enabled=enable,
+            techniqueID=index.technique_ids[i],
+            enabled=color is not None,
+            color=color,
         )
         layer.techniques.append(technique)
-    
+
     return layer
 
 
-# TODO
-def add_missing_tactic_shortnames(layer: Layer, tactics: Iterable[dict], techniques: Iterable[dict]) -> Layer:
-    pass
+def enrich_layer(
+        layer: Layer, 
+        stix2_objects: Union[Iterable[dict], AttackCatalog], 
+        split_tactics: bool = True, 
+        add_links: bool = True, 
+        add_metadata: bool = True) -> Layer:
+    """
+    Enrich the techniques in a layer in a single pass using the technique details in a catalog (see `AttackCatalog.get_technique_details`):
+
+    - techniques without a tactic are split into one entry per tactic - if the layer already has an entry for a tactic, the score, colour, and comment of the technique are merged into the existing entry instead (without overwriting its own score or colour);
+    - a link to each technique is added; and
+    - the name, platforms, and data sources of each technique are added as metadata.
+
+    The details are computed once per catalog, so the same catalog should be reused when enriching many layers.
+    """
+    details = _get_technique_details(stix2_objects)
+    existing = {(technique.techniqueID, technique.tactic): technique for technique in layer.techniques if technique.tactic}
+
+    techniques = []
+    for technique in layer.techniques:
+        d = details.get(technique.techniqueID)
+        if d is None:
+            techniques.append(technique)
+            continue
+
+        if add_links:
+            _add_technique_links(technique, d)
+        if add_metadata:
+            _add_technique_metadata(technique, d)
+
+        if not (split_tactics and technique.tactic is None and d.tactics):
+            techniques.append(technique)
+            continue
+
+        for tactic in d.tactics:
+            key = (technique.techniqueID, tactic)
+            if key in existing:
+                _merge_untacticked_technique(existing[key], technique)
+                continue
+
+            existing[key] = dataclasses.replace(
+                technique, 
+                tactic=tactic, 
+                metadata=type(technique.metadata)(technique.metadata),
+                links=type(technique.links)(technique.links),
+            )
+            techniques.append(existing[key])
+
+    layer.techniques = techniques
+    return layer
+
+
+def _merge_untacticked_technique(technique: Technique, other: Technique) -> None:
+    if technique.score is None:
+        technique.score = other.score
+    if technique.color is None:
+        technique.color = other.color
+    if other.comment and other.comment != technique.comment:
+        technique.comment = f'{technique.comment}\n{other.comment}' if technique.comment else other.comment
+
+
+def _get_technique_details(stix2_objects: Union[Iterable[dict], AttackCatalog]) -> Dict[str, TechniqueDetails]:
+    catalog = stix2_objects if isinstance(stix2_objects, AttackCatalog) else AttackCatalog(objects=list(stix2_objects))
+    return catalog.get_technique_details()
+
+
+def _add_technique_links(technique: Technique, d: TechniqueDetails) -> None:
+    if d.url and not any(isinstance(link, Link) and link.url == d.url for link in technique.links):
+        technique.links = type(technique.links)([*technique.links, Link(label=d.technique_id, url=d.url)])
+
+
+def _add_technique_metadata(technique: Technique, d: TechniqueDetails) -> None:
+    names = {item.name for item in technique.metadata if isinstance(item, MetadataItem)}
+    items = [
+        MetadataItem(name=name, value=value) for name, value in [
+            ('name', d.name),
+            ('platforms', ', '.join(d.platforms)),
+            ('data sources', ', '.join(d.data_sources)),
+        ] if value and name not in names
+    ]
+    if items:
+        technique.metadata = type(technique.metadata)([*technique.metadata, *items])
+
+
+def add_missing_techniques(
+        layer: Layer, 
+        stix2_objects: Union[Iterable[dict], AttackCatalog, "TechniqueUniverse", "TechniqueUniverseProvider"], 
+        enable: bool = True) -> Layer:
+    """
+    Add every technique that isn't already in the layer (e.g., to pad a layer to the full matrix).
+
+    When padding many layers, pass a `TechniqueUniverseProvider` (or a `TechniqueUniverse`) so that the set of technique IDs for the layer's domain and ATT&CK version is only computed once.
+    """
+    from mitre_attack_navigator_layer_builder.universe import TechniqueUniverse, TechniqueUniverseProvider
+
+    if isinstance(stix2_objects, TechniqueUniverseProvider):
+        stix2_objects = stix2_objects.get_for_layer(layer)
+
+    if isinstance(stix2_objects, TechniqueUniverse):
+        missing_technique_ids = stix2_objects.get_missing_technique_ids(layer)
+    else:
+        if isinstance(stix2_objects, AttackCatalog):
+            all_technique_ids = stix2_objects.get_technique_ids()
+        else:
+            decoder = MitreDecoder()
+            all_technique_ids = {decoder.get_external_id(o) for o in stix2_objects if o['type'] == 'attack-pattern'}
+        missing_technique_ids = sorted(all_technique_ids - layer.technique_ids)
+
+    logger.info("Adding %d missing techniques to layer: `%s` (enabled: %s)", len(missing_technique_ids), layer.name, enable)
+    layer.techniques.extend([layer.new_technique(technique_id, enabled=enable) for technique_id in missing_technique_ids])
+    return layer
+
+
+def add_missing_tactic_shortnames(layer: Layer, tactics: Union[Iterable[dict], AttackCatalog], techniques: Optional[Iterable[dict]] = None) -> Layer:
+    """
+    Split techniques without a tactic into one entry per tactic (see `enrich_layer`) using either a catalog, or tactic and technique objects.
+    """
+    catalog = tactics if isinstance(tactics, AttackCatalog) else AttackCatalog(objects=[*tactics, *(techniques or [])])
+    return enrich_layer(layer, catalog, add_links=False, add_metadata=False)
@@ -0,0 +1,172 @@
+from dataclasses import dataclass
+import dataclasses
+import functools
+import os
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import logging
+
+from mitre_attack_navigator_layer_builder import io, util
+from mitre_attack_navigator_layer_builder.catalog import AttackCatalog
+from mitre_attack_navigator_layer_builder.constants import AVG, DEFAULT_LAYER_FILE_CHUNK_SIZE, MAX, MIN, SUM
+from mitre_attack_navigator_layer_builder.layers import Layer, Technique, Versions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMBINE_RULE = MAX
+
+COMBINE_RULES_TO_FUNCTIONS = {
+    AVG: lambda scores: sum(scores) / len(scores),
+    MIN: min,
+    MAX: max,
+    SUM: sum,
+}
+
+
+@dataclass()
+class RemapTable:
+    """
+    The changes to technique IDs between two releases of ATT&CK.
+
+    Technique IDs that were revoked (or renumbered) are mapped to their replacements, deprecated technique IDs are mapped to an empty list, and unchanged technique IDs aren't included.
+    """
+    source_version: Optional[str] = None
+    target_version: Optional[str] = None
+    remaps: Dict[str, List[str]] = dataclasses.field(default_factory=dict)
+    tactics: Dict[str, List[str]] = dataclasses.field(default_factory=dict)    # The tactic shortnames of every technique in the target release.
+
+    def get_technique_ids(self, technique_id: str) -> List[str]:
+        return self.remaps.get(technique_id, [technique_id])
+
+    @classmethod
+    def from_catalogs(cls, source: AttackCatalog, target: AttackCatalog, source_version: Optional[str] = None, target_version: Optional[str] = None) -> "RemapTable":
+        """
+        Build a remap table by following the `revoked-by` relationships and deprecation flags of every technique in the source release through the target release.
+        """
+        revoked_by = {}
+        for relationship in target.get_objects('relationship', include_revoked=True, include_deprecated=True):
+            if relationship['relationship_type'] == 'revoked-by':
+                revoked_by[relationship['source_ref']] = relationship['target_ref']
+
+        table = cls(
+            source_version=source_version or get_attack_version(source),
+            target_version=target_version or get_attack_version(target),
+        )
+        for o in source.get_objects('attack-pattern', include_revoked=True, include_deprecated=True):
+            technique_id = source.get_external_id(o['id'])
+            if technique_id is None:
+                continue
+
+            # Follow chains of revocations (e.g., A revoked by B, which is later revoked by C).
+            stix_id = o['id']
+            seen = {stix_id}
+            while stix_id in revoked_by and revoked_by[stix_id] not in seen:
+                stix_id = revoked_by[stix_id]
+                seen.add(stix_id)
+
+            replacement = target.get(stix_id)
+            if replacement is None:
+                # Techniques that are missing from the target release are assumed to be unchanged.
+                continue
+            elif target.is_deprecated(replacement) or target.is_revoked(replacement):
+                table.remaps[technique_id] = []
+            else:
+                replacement_id = target.get_external_id(stix_id)
+                if replacement_id and replacement_id != technique_id:
+                    table.remaps[technique_id] = [replacement_id]
+
+        table.tactics = {technique_id: list(d.tactics) for technique_id, d in target.get_technique_details().items()}
+        logger.info("Built a remap table from ATT&CK %s to %s (%d changes)", table.source_version, table.target_version, len(table.remaps))
+        return table
+
+
+def get_attack_version(catalog: AttackCatalog) -> Optional[str]:
+    """
+    Lookup the version of ATT&CK from the collection object in a catalog.
+    """
+    for o in catalog.get_objects('x-mitre-collection', include_revoked=True, include_deprecated=True):
+        if o.get('x_mitre_version'):
+            return o['x_mitre_version']
+    return None
+
+
+def migrate_layer(layer: Layer, table: RemapTable, combine: str = DEFAULT_COMBINE_RULE) -> Layer:
+    """
+    Remap the techniques in a layer from one release of ATT&CK to another and update `Versions.attack`.
+
+    Techniques that are merged into the same technique (and tactic) are combined: scores are combined using the provided rule (i.e., "max", "min", "sum", or "average"), the colour of the highest scoring technique is kept, comments, metadata and links are concatenated, and the technique is enabled if any of the merged techniques were. Deprecated techniques are removed, and tactics that don't apply to a replacement technique are dropped.
+    """
+    if combine not in COMBINE_RULES_TO_FUNCTIONS:
+        raise ValueError(f"Unsupported combine rule: {combine} (expected one of: {', '.join(COMBINE_RULES_TO_FUNCTIONS)})")
+
+    if layer.versions and layer.versions.attack and table.source_version and layer.versions.attack != table.source_version:
+        logger.warning("Layer `%s` is pinned to ATT&CK %s, not %s", layer.name, layer.versions.attack, table.source_version)
+
+    groups: Dict[Tuple[str, Optional[str]], List[Technique]] = {}
+    for technique in layer.techniques:
+        technique_ids = table.get_technique_ids(technique.techniqueID)
+        for technique_id in technique_ids:
+            tactic = technique.tactic
+            if technique_id != technique.techniqueID and tactic and tactic not in table.tactics.get(technique_id, [tactic]):
+                tactic = None
+            groups.setdefault((technique_id, tactic), []).append(dataclasses.replace(technique, techniqueID=technique_id, tactic=tactic))
+
+    layer.techniques = [techniques[0] if len(techniques) == 1 else _combine_techniques(techniques, combine) for techniques in groups.values()]
+    layer.versions = dataclasses.replace(layer.versions or Versions(), attack=table.target_version)
+    return layer
+
+
+def _combine_techniques(techniques: List[Technique], combine: str) -> Technique:
+    scores = [technique.score for technique in techniques if technique.score is not None]
+    colored = [technique for technique in techniques if technique.color]
+    comments = [technique.comment for technique in techniques if technique.comment]
+    first = techniques[0]
+    return dataclasses.replace(
+        first,
+        score=COMBINE_RULES_TO_FUNCTIONS[combine](scores) if scores else None,
+        color=max(colored, key=lambda technique: technique.score or 0).color if colored else None,
+        enabled=any(technique.enabled is not False for technique in techniques),
+        showSubtechniques=any(technique.showSubtechniques for technique in techniques),
+        comment='\n'.join(dict.fromkeys(comments)) if comments else None,
+        metadata=type(first.metadata)(_unique(item for technique in techniques for item in technique.metadata)),
+        links=type(first.links)(_unique(link for technique in techniques for link in technique.links)),
+    )
+
+
+def _unique(items: Iterable) -> list:
+    unique = []
+    for item in items:
+        if item not in unique:
+            unique.append(item)
+    return unique
+
+
+def migrate_layer_files(
+        paths: Union[str, Iterable[str]],
+        output_dir: str,
+        table: RemapTable,
+        combine: str = DEFAULT_COMBINE_RULE,
+        jobs: int = 1,
+        chunk_size: int = DEFAULT_LAYER_FILE_CHUNK_SIZE) -> int:
+    """
+    Migrate layer files, directories, or glob patterns (see `io.iter_layer_paths`) and write them to a directory, preserving their paths relative to the common parent directory of the input files, and return the number of layers that were migrated.
+
+    The remap table is built once by the caller, and files are migrated in chunks (optionally by a pool of worker processes).
+    """
+    paths = list(io.iter_layer_paths(paths))
+    if not paths:
+        return 0
+
+    root = os.path.commonpath([os.path.dirname(path) for path in paths])
+    output_dir = util.get_real_path(output_dir)
+    rows = [(path, os.path.join(output_dir, os.path.relpath(path, root))) for path in paths]
+
+    f = functools.partial(_migrate_layer_files, table=table, combine=combine)
+    return sum(util.map_chunks(f, rows, jobs=jobs, chunk_size=chunk_size))
+
+
+def _migrate_layer_files(rows: List[Tuple[str, str]], table: RemapTable, combine: str) -> int:
+    for input_path, output_path in rows:
+        layer = migrate_layer(io.read_layer(input_path), table, combine=combine)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        io.write_layer(layer, output_path)
+    return len(rows)
@@ -0,0 +1,181 @@
+import collections
+from dataclasses import dataclass
+import dataclasses
+import json
+import mmap
+import os
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from mitre_attack_navigator_layer_builder import streaming, util
+from mitre_attack_navigator_layer_builder.parsers import Decoder, MitreDecoder
+
+logger = logging.getLogger(__name__)
+
+OFFSET_INDEX_FILE_EXTENSION = '.index.json'
+OFFSET_INDEX_FORMAT_VERSION = 1
+
+
+@dataclass()
+class BundleOffsetIndex:
+    """
+    The byte offset and length of each object in a STIX 2 bundle file, keyed by STIX ID, along with the STIX IDs of each object by type and external ID.
+
+    The index records the modification time and size of the bundle that it was built from so that stale indexes can be detected.
+    """
+    offsets: Dict[str, Tuple[int, int]] = dataclasses.field(default_factory=dict)
+    ids_by_type: Dict[str, List[str]] = dataclasses.field(default_factory=dict)
+    ids_by_external_id: Dict[str, str] = dataclasses.field(default_factory=dict)
+    mtime_ns: int = 0
+    size: int = 0
+
+    @classmethod
+    def build(cls, path: str, decoder: Optional[Decoder] = None) -> "BundleOffsetIndex":
+        """
+        Build an index by scanning the objects in an uncompressed bundle once.
+        """
+        decoder = decoder or MitreDecoder()
+        path = util.get_real_path(path)
+        if path.endswith('.gz'):
+            raise ValueError(f"Compressed bundles can't be memory mapped: {path}")
+
+        st = os.stat(path)
+        index = cls(mtime_ns=st.st_mtime_ns, size=st.st_size)
+        ids_by_type = collections.defaultdict(list)
+        inactive = set()
+
+        # Latin-1 maps every byte to a single character, so character offsets are byte offsets (IDs are ASCII).
+        with open(path, mode='r', encoding='latin-1') as fp:
+            for offset, length, o in streaming.iter_json_array_items(fp, key='objects'):
+                stix_id = o['id']
+                index.offsets[stix_id] = (offset, length)
+                ids_by_type[o['type']].append(stix_id)
+                if decoder.is_revoked(o) or decoder.is_deprecated(o):
+                    inactive.add(stix_id)
+
+                external_id = decoder.get_external_id(o) if o.get('external_references') else None
+                if external_id is not None:
+                    # Prefer active objects if an external ID is reused (e.g., by a revoked object).
+                    existing = index.ids_by_external_id.get(external_id)
+                    if existing is None or existing in inactive:
+                        index.ids_by_external_id[external_id] = stix_id
+
+        index.ids_by_type = dict(ids_by_type)
+        return index
+
+    def is_stale(self, path: str) -> bool:
+        st = os.stat(util.get_real_path(path))
+        return (st.st_mtime_ns, st.st_size) != (self.mtime_ns, self.size)
+
+    def to_dict(self) -> dict:
+        return {
+            'version': OFFSET_INDEX_FORMAT_VERSION,
+            'mtime_ns': self.mtime_ns,
+            'size': self.size,
+            'offsets': self.offsets,
+            'ids_by_type': self.ids_by_type,
+            'ids_by_external_id': self.ids_by_external_id,
+        }
+
+    @classmethod
+    def from_dict(cls, o: dict) -> "BundleOffsetIndex":
+        if o.get('version') != OFFSET_INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported offset index version: {o.get('version')}")
+        return cls(
+            offsets={k: tuple(v) for k, v in o['offsets'].items()},
+            ids_by_type=o['ids_by_type'],
+            ids_by_external_id=o['ids_by_external_id'],
+            mtime_ns=o['mtime_ns'],
+            size=o['size'],
+        )
+
+
+def get_offset_index_path(path: str) -> str:
+    return util.get_real_path(path) + OFFSET_INDEX_FILE_EXTENSION
+
+
+def read_offset_index(path: str) -> Optional[BundleOffsetIndex]:
+    """
+    Read the persisted index of the provided bundle, returning `None` if there isn't one, or if it is stale or unreadable.
+    """
+    index_path = get_offset_index_path(path)
+    if not os.path.exists(index_path):
+        return None
+    try:
+        index = BundleOffsetIndex.from_dict(util.read_json_file(index_path))
+    except (ValueError, KeyError) as e:
+        logger.warning("Failed to read offset index: %s (%s)", index_path, e)
+        return None
+
+    if index.is_stale(path):
+        logger.debug("Offset index is stale: %s", index_path)
+        return None
+    return index
+
+
+def write_offset_index(index: BundleOffsetIndex, path: str) -> str:
+    """
+    Persist an index next to the provided bundle (i.e., `<bundle>.index.json`), returning the path to the index.
+    """
+    index_path = get_offset_index_path(path)
+
+    util.write_file_atomically(index_path, json.dumps(index.to_dict(), separators=(',', ':')).encode('utf-8'))
+    return index_path
+
+
+def get_offset_index(path: str) -> BundleOffsetIndex:
+    """
+    Read the persisted index of the provided bundle, building and persisting a new index if there isn't an up-to-date one.
+    """
+    index = read_offset_index(path)
+    if index is None:
+        index = BundleOffsetIndex.build(path)
+        try:
+            write_offset_index(index, path)
+        except OSError as e:
+            logger.warning("Failed to write offset index: %s (%s)", get_offset_index_path(path), e)
+    return index
+
+
+class MappedBundle:
+    """
+    Random access to the objects in a STIX 2 bundle file by STIX ID, type, or external ID.
+
+    The bundle is memory mapped, and only the requested objects are decoded.
+    """
+    def __init__(self, path: str, index: Optional[BundleOffsetIndex] = None):
+        self.path = util.get_real_path(path)
+        self.index = index or get_offset_index(self.path)
+        with open(self.path, mode='rb') as fp:
+            self._mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) if self.index.size else None
+
+    def get(self, stix_id: str) -> Optional[dict]:
+        span = self.index.offsets.get(stix_id)
+        if span is None:
+            return None
+        offset, length = span
+        return json.loads(self._mm[offset:offset + length])
+
+    def get_by_external_id(self, external_id: str) -> Optional[dict]:
+        stix_id = self.index.ids_by_external_id.get(external_id)
+        return self.get(stix_id) if stix_id else None
+
+    def get_objects(self, object_type: str) -> List[dict]:
+        return [self.get(stix_id) for stix_id in self.index.ids_by_type.get(object_type, [])]
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def __contains__(self, stix_id: str) -> bool:
+        return stix_id in self.index.offsets
+
+    def __len__(self) -> int:
+        return len(self.index.offsets)
+
+    def __enter__(self) -> "MappedBundle":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
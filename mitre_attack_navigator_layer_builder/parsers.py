@@ -23,12 +23,12 @@ class MitreDecoder(Decoder):
         return o.get('revoked', False)
     
     def is_deprecated(self, o: dict) -> bool:
-        return o.get('x-mitre-deprecated', False)
+        return o.get('x_mitre_deprecated', False)
 
 
 def parse_stix2_object(o: Union[_STIXBase, dict]) -> dict:
     if isinstance(o, _STIXBase):
-        o = json.loads(o.serialize(pretty=True))
+        o = json.loads(o.serialize())
     assert isinstance(o, dict)
     return o
 
@@ -59,14 +59,14 @@ def parse_external_id(o: dict) -> Optional[str]:
 def is_mitre_attack_object(o: dict) -> bool:
     if o:
         marking = 'marking-definition--fa42a846-8d90-4e51-bc29-71d5b4802168'
-        return o['id'] == marking or marking in o['object_marking_refs']
+        return o['id'] == marking or marking in o.get('object_marking_refs', [])
     return False
 
 
 def is_mitre_capec_object(o: dict) -> bool:
     if o:
         marking = 'marking-definition--17d82bb2-eeeb-4898-bda5-3ddbcd2b799d'
-        return o['id'] == marking or marking in o['object_marking_refs']
+        return o['id'] == marking or marking in o.get('object_marking_refs', [])
     return False
 
 
@@ -0,0 +1,215 @@
+import collections
+from dataclasses import dataclass
+import dataclasses
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+import logging
+
+from mitre_attack_navigator_layer_builder import coloring, parsers
+from mitre_attack_navigator_layer_builder.coloring import SingleColorScheme
+from mitre_attack_navigator_layer_builder.constants import MITRE_ATTACK_ENTERPRISE
+from mitre_attack_navigator_layer_builder.layers import Layer, MetadataItem, Technique
+
+logger = logging.getLogger(__name__)
+
+CVE = 'cve'
+CWE = 'cwe'
+CAPEC = 'capec'
+D3FEND = 'd3fend'
+ATTACK = 'attack'
+NIST_SP_800_53 = 'nist-sp-800-53'
+NIST_CSF = 'nist-csf'
+NIST_PF = 'nist-pf'
+
+# The order of the frameworks along the pivot graph (see `docs/pivot-points.dot`) - edges always point from an earlier framework to a later one, which keeps the graph acyclic.
+KINDS = [CVE, CWE, CAPEC, D3FEND, ATTACK, NIST_SP_800_53, NIST_CSF, NIST_PF]
+
+NIST_SP_800_53_SOURCE_NAMES = ['NIST 800-53 Revision 4', 'NIST 800-53 Revision 5']
+
+_EMPTY = frozenset()
+
+
+@dataclass()
+class PivotGraph:
+    """
+    A typed adjacency index between frameworks (e.g., CVE → CWE → CAPEC → ATT&CK → NIST SP 800-53) keyed by external ID.
+
+    Only pivots between CVE, CWE, CAPEC, ATT&CK, and NIST SP 800-53 are loaded from STIX 2 objects (see `add_stix2_objects`) - there are no loaders for D3FEND, NIST CSF, or NIST PF mappings, so their edges must be added with `add_edge`.
+
+    The transitive closure of every node is precomputed (by framework, in both directions) the first time that the graph is queried after it has been changed, so each query is a dictionary lookup rather than a traversal.
+    """
+    kinds: Dict[str, str] = dataclasses.field(default_factory=dict)     # External IDs to frameworks.
+    edges: Dict[str, Set[str]] = dataclasses.field(default_factory=dict)
+
+    def __post_init__(self):
+        self._descendants: Optional[Dict[str, Dict[str, FrozenSet[str]]]] = None
+        self._ancestors: Optional[Dict[str, Dict[str, FrozenSet[str]]]] = None
+
+    @classmethod
+    def from_stix2_objects(cls, objects: Iterable[dict]) -> "PivotGraph":
+        return cls().add_stix2_objects(objects)
+
+    def add_node(self, node: str, kind: str) -> "PivotGraph":
+        if kind not in KINDS:
+            raise ValueError(f"Unsupported framework: {kind}")
+        existing = self.kinds.setdefault(node, kind)
+        if existing != kind:
+            raise ValueError(f"Conflicting frameworks for {node}: {existing} and {kind}")
+        return self
+
+    def add_edge(self, a: str, a_kind: str, b: str, b_kind: str) -> "PivotGraph":
+        """
+        Connect two nodes - edges are undirected (i.e., they can be followed both ways), and are stored pointing from the earlier framework to the later one.
+        """
+        self.add_node(a, a_kind)
+        self.add_node(b, b_kind)
+        if KINDS.index(a_kind) > KINDS.index(b_kind):
+            a, b = b, a
+        elif a_kind == b_kind:
+            raise ValueError(f"Can't connect two nodes from the same framework: {a} and {b}")
+
+        self.edges.setdefault(a, set()).add(b)
+        self._descendants = self._ancestors = None
+        return self
+
+    def add_stix2_objects(self, objects: Iterable[dict]) -> "PivotGraph":
+        """
+        Add the pivots found in STIX 2 objects:
+
+        - CVE → CWE: CWE references of `vulnerability` objects;
+        - CWE → CAPEC → ATT&CK: CWE and ATT&CK references of CAPEC attack patterns, and CAPEC references of ATT&CK techniques; and
+        - ATT&CK → NIST SP 800-53: `mitigates` relationships between NIST SP 800-53 controls and ATT&CK techniques.
+        """
+        external_ids = {}
+        relationships = []
+        for o in objects:
+            if o['type'] == 'relationship':
+                if o.get('relationship_type') == 'mitigates':
+                    relationships.append(o)
+                continue
+
+            references = o.get('external_references', [])
+            if o['type'] == 'vulnerability':
+                cve_id = _get_reference_id(references, 'cve')
+                if cve_id:
+                    for cwe_id in _get_reference_ids(references, 'cwe'):
+                        self.add_edge(cve_id, CVE, cwe_id, CWE)
+            elif o['type'] == 'attack-pattern' and parsers.is_mitre_capec_object(o):
+                capec_id = _get_reference_id(references, 'capec')
+                if capec_id:
+                    for cwe_id in _get_reference_ids(references, 'cwe'):
+                        self.add_edge(cwe_id, CWE, capec_id, CAPEC)
+                    for technique_id in _get_reference_ids(references, 'ATTACK'):
+                        self.add_edge(capec_id, CAPEC, _normalize_technique_id(technique_id), ATTACK)
+            elif o['type'] == 'attack-pattern':
+                technique_id = _get_reference_id(references, 'mitre-attack')
+                if technique_id:
+                    external_ids[o['id']] = technique_id
+                    for capec_id in _get_reference_ids(references, 'capec'):
+                        self.add_edge(capec_id, CAPEC, technique_id, ATTACK)
+            elif o['type'] == 'course-of-action' and parsers.is_nist_sp_800_53_object(o):
+                external_ids[o['id']] = _get_reference_id(references, *NIST_SP_800_53_SOURCE_NAMES)
+
+        for relationship in relationships:
+            control_id = external_ids.get(relationship['source_ref'])
+            technique_id = external_ids.get(relationship['target_ref'])
+            if control_id and technique_id and relationship['source_ref'].startswith('course-of-action--'):
+                self.add_edge(technique_id, ATTACK, control_id, NIST_SP_800_53)
+        return self
+
+    def build(self) -> "PivotGraph":
+        """
+        Precompute the transitive closure of every node.
+        """
+        parents = collections.defaultdict(set)
+        for a, bs in self.edges.items():
+            for b in bs:
+                parents[b].add(a)
+
+        # Nodes are visited in framework order, so the closure of every child (or parent) is computed before it's needed.
+        nodes = sorted(self.kinds, key=lambda node: KINDS.index(self.kinds[node]))
+        self._descendants = self._get_closures(reversed(nodes), self.edges)
+        self._ancestors = self._get_closures(nodes, parents)
+        logger.debug("Precomputed the transitive closures of %d nodes", len(nodes))
+        return self
+
+    def _get_closures(self, nodes: Iterable[str], neighbours: Dict[str, Set[str]]) -> Dict[str, Dict[str, FrozenSet[str]]]:
+        closures = {}
+        for node in nodes:
+            reachable = collections.defaultdict(set)
+            for neighbour in neighbours.get(node, ()):
+                reachable[self.kinds[neighbour]].add(neighbour)
+                for kind, others in closures[neighbour].items():
+                    reachable[kind] |= others
+            closures[node] = {kind: frozenset(others) for kind, others in reachable.items()}
+        return closures
+
+    def get_reachable(self, node: str, kind: str) -> FrozenSet[str]:
+        """
+        Lookup every node of the provided framework that is reachable from a node in either direction along the pivot graph (e.g., the ATT&CK techniques reachable from a CWE, or the CVEs that lead to an ATT&CK technique).
+        """
+        if self._descendants is None:
+            self.build()
+
+        node_kind = self.kinds.get(node)
+        if node_kind is None:
+            return _EMPTY
+        elif KINDS.index(kind) > KINDS.index(node_kind):
+            return self._descendants[node].get(kind, _EMPTY)
+        else:
+            return self._ancestors[node].get(kind, _EMPTY)
+
+    def get_reachable_from_any(self, nodes: Iterable[str], kind: str) -> Set[str]:
+        reachable = set()
+        for node in nodes:
+            reachable |= self.get_reachable(node, kind)
+        return reachable
+
+    def get_nodes(self, kind: str) -> List[str]:
+        return sorted(node for node, node_kind in self.kinds.items() if node_kind == kind)
+
+    def get_layer_pivots(self, layer: Layer, kind: str) -> Set[str]:
+        """
+        Lookup every node of the provided framework that is reachable from the techniques selected in a layer (e.g., the NIST SP 800-53 controls covering a layer).
+        """
+        return self.get_reachable_from_any(layer.get_selected_technique_ids(), kind)
+
+
+def iter_pivot_layers(
+        graph: PivotGraph,
+        kind: str,
+        color_scheme: Optional[SingleColorScheme] = None,
+        domain: str = MITRE_ATTACK_ENTERPRISE,
+        nodes: Optional[Iterable[str]] = None,
+        include_empty_layers: bool = False) -> Iterator[Tuple[str, Layer]]:
+    """
+    Generate one ATT&CK layer per node of the provided framework (e.g., per CWE), selecting every technique that is reachable from the node, and return an iterator of (external ID, layer) pairs.
+    """
+    color_scheme = color_scheme or SingleColorScheme()
+    color = coloring.get_hex_color_value(color_scheme.color)
+    for node in (nodes if nodes is not None else graph.get_nodes(kind)):
+        technique_ids = graph.get_reachable(node, ATTACK)
+        if not technique_ids and not include_empty_layers:
+            continue
+
+        layer = Layer(
+            name=node,
+            description=f"ATT&CK techniques reachable from {node}",
+            domain=domain,
+            metadata=[MetadataItem(name=kind, value=node)],
+        )
+        for technique_id in sorted(technique_ids):
+            layer.techniques.append(Technique(techniqueID=technique_id, score=1, color=color))
+        yield node, layer
+
+
+def _get_reference_ids(references: List[dict], *source_names: str) -> Iterator[str]:
+    return (ref['external_id'] for ref in references if ref.get('source_name') in source_names and ref.get('external_id'))
+
+
+def _get_reference_id(references: List[dict], *source_names: str) -> Optional[str]:
+    return next(_get_reference_ids(references, *source_names), None)
+
+
+def _normalize_technique_id(technique_id: str) -> str:
+    # CAPEC refers to ATT&CK techniques with or without the leading "T" (e.g., "1574.010").
+    return technique_id if technique_id.startswith('T') else f'T{technique_id}'
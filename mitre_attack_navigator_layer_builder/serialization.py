@@ -0,0 +1,234 @@
+import dataclasses
+import io
+import typing
+from typing import IO, Any, List, Optional, Union
+from json.encoder import encode_basestring_ascii
+import logging
+
+from mitre_attack_navigator_layer_builder.constants import JSON_INDENT
+from mitre_attack_navigator_layer_builder.util import JSONEncoder
+from mitre_attack_navigator_layer_builder.layers import CompactTechnique, Divider, Filter, Gradient, Layer, Layout, LegendItem, Link, MetadataItem, Technique, Versions
+
+logger = logging.getLogger(__name__)
+
+
+def decode_layer(o: dict, strict: bool = False, compact: bool = False) -> Layer:
+    """
+    Decode a layer from a dictionary in a single pass.
+
+    By default, values are assumed to be well-formed and aren't type checked - if `strict` is true, every field is validated against the type hints of the `Layer` dataclass first, and a `ValueError` is raised on the first invalid value.
+
+    If `compact` is true, techniques will be decoded as `CompactTechnique`s.
+    """
+    if strict:
+        validate(o, Layer)
+
+    decode_technique = _decode_compact_technique if compact else _decode_technique
+
+    kwargs = {k: v for k, v in o.items() if k in LAYER_FIELDS}
+    if kwargs.get('versions') is not None:
+        kwargs['versions'] = Versions(**_pick(o['versions'], VERSIONS_FIELDS))
+    if kwargs.get('filters') is not None:
+        kwargs['filters'] = Filter(**_pick(o['filters'], FILTER_FIELDS))
+    if kwargs.get('layout') is not None:
+        kwargs['layout'] = Layout(**_pick(o['layout'], LAYOUT_FIELDS))
+    if kwargs.get('gradient') is not None:
+        gradient = o['gradient']
+        kwargs['gradient'] = Gradient(minValue=gradient['minValue'], maxValue=gradient['maxValue'], colors=gradient['colors'])
+    if 'techniques' in kwargs:
+        kwargs['techniques'] = [decode_technique(technique) for technique in o['techniques']]
+    if 'legendItems' in kwargs:
+        kwargs['legendItems'] = [LegendItem(label=item['label'], color=item['color']) for item in o['legendItems']]
+    if 'metadata' in kwargs:
+        kwargs['metadata'] = _decode_metadata(o['metadata'])
+    if 'links' in kwargs:
+        kwargs['links'] = _decode_links(o['links'])
+    return Layer(**kwargs)
+
+
+def _decode_technique(o: dict) -> Technique:
+    get = o.get
+    metadata = get('metadata')
+    links = get('links')
+    return Technique(
+        techniqueID=o['techniqueID'],
+        tactic=get('tactic'),
+        showSubtechniques=get('showSubtechniques', False),
+        enabled=get('enabled', True),
+        score=get('score'),
+        color=get('color'),
+        comment=get('comment'),
+        metadata=_decode_metadata(metadata) if metadata else [],
+        links=_decode_links(links) if links else [],
+    )
+
+
+def _decode_compact_technique(o: dict) -> CompactTechnique:
+    get = o.get
+    metadata = get('metadata')
+    links = get('links')
+    return CompactTechnique(
+        techniqueID=o['techniqueID'],
+        tactic=get('tactic'),
+        showSubtechniques=get('showSubtechniques', False),
+        enabled=get('enabled', True),
+        score=get('score'),
+        color=get('color'),
+        comment=get('comment'),
+        metadata=_decode_metadata(metadata) if metadata else (),
+        links=_decode_links(links) if links else (),
+    )
+
+
+def _decode_metadata(rows: List[dict]) -> List[Union[MetadataItem, Divider]]:
+    return [MetadataItem(name=row['name'], value=row['value']) if 'name' in row else Divider(divider=row['divider']) for row in rows]
+
+
+def _decode_links(rows: List[dict]) -> List[Union[Link, Divider]]:
+    return [Link(label=row['label'], url=row['url']) if 'label' in row else Divider(divider=row['divider']) for row in rows]
+
+
+def _pick(o: dict, fields: frozenset) -> dict:
+    return {k: v for k, v in o.items() if k in fields}
+
+
+def _get_field_names(cls: type) -> frozenset:
+    return frozenset(f.name for f in dataclasses.fields(cls))
+
+
+LAYER_FIELDS = _get_field_names(Layer)
+VERSIONS_FIELDS = _get_field_names(Versions)
+FILTER_FIELDS = _get_field_names(Filter)
+LAYOUT_FIELDS = _get_field_names(Layout)
+
+
+def validate(value: Any, expected_type: Any, path: str = '$') -> None:
+    """
+    Recursively check the provided value against a type hint (e.g., a dataclass, `Optional[str]`, or `List[Union[MetadataItem, Divider]]`).
+    """
+    origin = typing.get_origin(expected_type)
+    if expected_type is Any:
+        return
+    elif origin is Union:
+        errors = []
+        for t in typing.get_args(expected_type):
+            try:
+                validate(value, t, path)
+            except ValueError as e:
+                errors.append(e)
+            else:
+                return
+        raise errors[-1]
+    elif origin in (list, List):
+        if not isinstance(value, list):
+            raise ValueError(f"Invalid value at {path}: expected a list - got {type(value).__name__}")
+        (item_type,) = typing.get_args(expected_type)
+        for i, item in enumerate(value):
+            validate(item, item_type, f'{path}[{i}]')
+    elif dataclasses.is_dataclass(expected_type):
+        if not isinstance(value, dict):
+            raise ValueError(f"Invalid value at {path}: expected {expected_type.__name__} - got {type(value).__name__}")
+        for name, field_type, required in _get_dataclass_type_hints(expected_type):
+            if name in value:
+                validate(value[name], field_type, f'{path}.{name}')
+            elif required:
+                raise ValueError(f"Missing value at {path}.{name}")
+    elif expected_type is type(None):
+        if value is not None:
+            raise ValueError(f"Invalid value at {path}: expected null - got {type(value).__name__}")
+    elif not isinstance(value, expected_type):
+        raise ValueError(f"Invalid value at {path}: expected {expected_type.__name__} - got {type(value).__name__}")
+
+
+_DATACLASS_TYPE_HINTS = {}
+
+
+def _get_dataclass_type_hints(cls: type) -> List[tuple]:
+    hints = _DATACLASS_TYPE_HINTS.get(cls)
+    if hints is None:
+        types = typing.get_type_hints(cls)
+        hints = _DATACLASS_TYPE_HINTS[cls] = [
+            (f.name, types[f.name], f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING)
+            for f in dataclasses.fields(cls)
+        ]
+    return hints
+
+
+def encode_layer(layer: Layer, indent: Optional[int] = JSON_INDENT) -> str:
+    """
+    Encode a layer as JSON in a single pass, omitting fields that are set to `None`.
+
+    The output is identical to `json.dumps(util.prune_dict(layer.__dict__()), indent=indent, cls=JSONEncoder)`, or, if `indent` is `None`, to the same call with compact separators (i.e., `(',', ':')`).
+    """
+    out = []
+    _encode(layer, out, ' ' * indent if indent is not None else None, '\n')
+    return ''.join(out)
+
+
+def dump_layer(layer: Layer, fp: IO, indent: Optional[int] = JSON_INDENT) -> None:
+    """
+    Write a layer to a text or binary stream (see `encode_layer`).
+    """
+    s = encode_layer(layer, indent=indent)
+    if isinstance(fp, (io.RawIOBase, io.BufferedIOBase)) or 'b' in getattr(fp, 'mode', ''):
+        fp.write(s.encode('ascii'))
+    else:
+        fp.write(s)
+
+
+_FIELD_NAMES = {}
+
+
+def _encode(o: Any, out: List[str], indent: Optional[str], newline: str) -> None:
+    """
+    Append the JSON encoding of the provided value to `out` - `indent` is the indent of a single level (or `None` for compact output), and `newline` is the newline and indent of the current level.
+    """
+    if isinstance(o, str):
+        out.append(encode_basestring_ascii(o))
+    elif o is None:
+        out.append('null')
+    elif o is True:
+        out.append('true')
+    elif o is False:
+        out.append('false')
+    elif isinstance(o, int):
+        out.append(int.__repr__(o))
+    elif isinstance(o, float):
+        out.append(JSONEncoder().encode(o))
+    elif isinstance(o, (list, tuple)):
+        if not o:
+            out.append('[]')
+            return
+        inner = newline + indent if indent is not None else ''
+        separator = ',' + inner if indent is not None else ','
+        out.append('[' + inner)
+        for i, value in enumerate(o):
+            if i:
+                out.append(separator)
+            _encode(value, out, indent, inner)
+        out.append(newline + ']' if indent is not None else ']')
+    elif dataclasses.is_dataclass(o) or isinstance(o, dict):
+        if isinstance(o, dict):
+            items = [(k, v) for k, v in o.items() if v is not None]
+        else:
+            cls = type(o)
+            names = _FIELD_NAMES.get(cls)
+            if names is None:
+                names = _FIELD_NAMES[cls] = [f.name for f in dataclasses.fields(cls)]
+            items = [(k, v) for k, v in ((k, getattr(o, k)) for k in names) if v is not None]
+
+        if not items:
+            out.append('{}')
+            return
+        inner = newline + indent if indent is not None else ''
+        separator = ',' + inner if indent is not None else ','
+        key_separator = ': ' if indent is not None else ':'
+        out.append('{' + inner)
+        for i, (k, v) in enumerate(items):
+            if i:
+                out.append(separator)
+            out.append(encode_basestring_ascii(k) + key_separator)
+            _encode(v, out, indent, inner)
+        out.append(newline + '}' if indent is not None else '}')
+    else:
+        _encode(JSONEncoder().default(o), out, indent, newline)
@@ -0,0 +1,255 @@
+from dataclasses import dataclass
+import datetime
+import functools
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import logging
+
+import numpy as np
+import polars as pl
+
+from mitre_attack_navigator_layer_builder import io, util
+from mitre_attack_navigator_layer_builder.coloring import GradientColorScheme
+from mitre_attack_navigator_layer_builder.constants import DEFAULT_LAYER_FILE_CHUNK_SIZE, DEFAULT_MOVING_AVERAGE_WINDOW, MITRE_ATTACK_ENTERPRISE
+from mitre_attack_navigator_layer_builder.layers import Gradient, Layer, Technique
+from mitre_attack_navigator_layer_builder.vectors import TechniqueIndex
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DATE_PATTERN = re.compile(r'(\d{4})-?(\d{2})-?(\d{2})')
+
+_NAT = np.datetime64('NaT', 'D')
+
+
+@dataclass()
+class SnapshotSeries:
+    """
+    A time series of layer snapshots (e.g., daily snapshots of a detection coverage layer) stored as dense (time × technique) matrices over a fixed technique index.
+
+    Each technique is scored by its highest score within each snapshot (i.e., across tactics), and techniques that are missing from a snapshot (or unscored) have a score of zero.
+    """
+    index: TechniqueIndex
+    dates: np.ndarray                   # One date (`datetime64[D]`) per snapshot, in ascending order.
+    scores: np.ndarray                  # One row per snapshot, and one column per technique.
+    selected: np.ndarray
+    domain: str = MITRE_ATTACK_ENTERPRISE
+
+    @classmethod
+    def from_files(
+            cls,
+            paths: Union[str, Iterable[str]],
+            index: TechniqueIndex,
+            jobs: int = 1,
+            chunk_size: int = DEFAULT_LAYER_FILE_CHUNK_SIZE) -> "SnapshotSeries":
+        """
+        Read layer files, directories, or glob patterns (see `io.iter_layer_paths`) directly into a series without decoding each file into a `Layer`.
+
+        The date of each snapshot is read from its file name (e.g., "coverage-2024-01-31.json"), falling back to the date that the file was last modified. Techniques that aren't in the index are ignored.
+        """
+        paths = list(io.iter_layer_paths(paths))
+        dates = np.array([get_snapshot_date(path) for path in paths], dtype='datetime64[D]')
+        order = np.argsort(dates, kind='stable')
+        paths = [paths[i] for i in order]
+
+        scores = np.zeros((len(paths), len(index)), dtype=np.float64)
+        selected = np.zeros((len(paths), len(index)), dtype=bool)
+        domains = set()
+
+        f = functools.partial(_read_snapshot_rows, index=index)
+        offset = 0
+        for chunk_domains, chunk_scores, chunk_selected in util.map_chunks(f, paths, jobs=jobs, chunk_size=chunk_size):
+            scores[offset:offset + len(chunk_scores)] = chunk_scores
+            selected[offset:offset + len(chunk_selected)] = chunk_selected
+            domains |= chunk_domains
+            offset += len(chunk_scores)
+
+        if len(domains) > 1:
+            raise ValueError(f'All snapshots must have the same domain - got {domains}')
+
+        logger.info("Read %d snapshots of %d techniques", len(paths), len(index))
+        return cls(
+            index=index,
+            dates=dates[order],
+            scores=scores,
+            selected=selected,
+            domain=next(iter(domains), MITRE_ATTACK_ENTERPRISE),
+        )
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def get_deltas(self, periods: int = 1) -> np.ndarray:
+        """
+        The change in the score of each technique between each snapshot and the snapshot `periods` snapshots earlier (i.e., one row for each snapshot after the first `periods` snapshots).
+        """
+        return self.scores[periods:] - self.scores[:-periods]
+
+    def get_moving_averages(self, window: int = DEFAULT_MOVING_AVERAGE_WINDOW) -> np.ndarray:
+        """
+        The mean score of each technique over each window of `window` consecutive snapshots (i.e., one row for each snapshot from the `window`-th snapshot onwards).
+        """
+        if window > len(self):
+            return np.zeros((0, len(self.index)), dtype=np.float64)
+        totals = np.cumsum(self.scores, axis=0)
+        totals = np.vstack([np.zeros((1, len(self.index))), totals])
+        return (totals[window:] - totals[:-window]) / window
+
+    def get_first_seen(self) -> np.ndarray:
+        """
+        The date of the first snapshot in which each technique is selected (or `NaT` if it's never selected).
+        """
+        seen = self.selected.any(axis=0)
+        if not len(self):
+            return np.full(len(self.index), _NAT)
+        return np.where(seen, self.dates[self.selected.argmax(axis=0)], _NAT)
+
+    def get_last_seen(self) -> np.ndarray:
+        """
+        The date of the last snapshot in which each technique is selected (or `NaT` if it's never selected).
+        """
+        seen = self.selected.any(axis=0)
+        if not len(self):
+            return np.full(len(self.index), _NAT)
+        return np.where(seen, self.dates[len(self) - 1 - self.selected[::-1].argmax(axis=0)], _NAT)
+
+    def get_tactic_coverage(self, tactics: Dict[str, Iterable[str]]) -> Tuple[List[str], np.ndarray]:
+        """
+        Count the number of techniques selected within each tactic in each snapshot, given a mapping of tactics to technique IDs (e.g., `AttackCatalog.get_map_of_tactic_ids_to_technique_ids`), and return the tactics along with a (time × tactic) matrix of counts.
+        """
+        names = list(tactics)
+        membership = np.zeros((len(names), len(self.index)), dtype=np.int64)
+        for i, name in enumerate(names):
+            membership[i, self.index.get_positions(tactics[name])] = 1
+        return names, self.selected.astype(np.int64) @ membership.T
+
+    def get_delta_layer(self, start: int = 0, end: int = -1, color_scheme: Optional[GradientColorScheme] = None) -> Layer:
+        """
+        Create a layer which scores each technique by the change in its score between two snapshots (by default, the first and last snapshots).
+        """
+        values = self.scores[end] - self.scores[start] if len(self) else np.zeros(len(self.index))
+        a, b = (str(self.dates[start]), str(self.dates[end])) if len(self) else ('', '')
+        return new_trend_layer(
+            self.index,
+            values,
+            color_scheme=color_scheme,
+            name=f'Change in score from {a} to {b}',
+            description=f'The change in the score of each technique from {a} to {b}',
+            domain=self.domain,
+        )
+
+    def get_moving_average_layer(self, window: int = DEFAULT_MOVING_AVERAGE_WINDOW, color_scheme: Optional[GradientColorScheme] = None) -> Layer:
+        """
+        Create a layer which scores each technique by its mean score over the last `window` snapshots.
+        """
+        averages = self.get_moving_averages(window)
+        values = averages[-1] if len(averages) else np.zeros(len(self.index))
+        return new_trend_layer(
+            self.index,
+            values,
+            color_scheme=color_scheme,
+            name=f'{window}-snapshot moving average',
+            description=f'The mean score of each technique over the last {window} snapshots',
+            domain=self.domain,
+        )
+
+    def get_summary(self, window: int = DEFAULT_MOVING_AVERAGE_WINDOW) -> pl.DataFrame:
+        """
+        Summarize the series with one row per technique: the dates of the first and last snapshots in which it was selected, the number of snapshots in which it was selected, its first and last scores, the change between them, and its latest moving average.
+        """
+        empty = np.zeros(len(self.index))
+        averages = self.get_moving_averages(window)
+        first = self.scores[0] if len(self) else empty
+        last = self.scores[-1] if len(self) else empty
+        return pl.DataFrame({
+            'techniqueID': self.index.technique_ids,
+            'first_seen': self.get_first_seen(),
+            'last_seen': self.get_last_seen(),
+            'snapshots_selected': self.selected.sum(axis=0, dtype=np.int64),
+            'first_score': first,
+            'last_score': last,
+            'delta': last - first,
+            'moving_average': averages[-1] if len(averages) else np.full(len(self.index), np.nan),
+        })
+
+    def get_tactic_summary(self, tactics: Dict[str, Iterable[str]]) -> pl.DataFrame:
+        """
+        Summarize the coverage of each tactic with one row per snapshot and tactic: the number of techniques selected within the tactic, and the fraction of the tactic's techniques that were selected.
+        """
+        tactics = {name: list(technique_ids) for name, technique_ids in tactics.items()}
+        names, counts = self.get_tactic_coverage(tactics)
+        totals = np.array([len(self.index.get_positions(tactics[name])) for name in names], dtype=np.int64)
+        return pl.DataFrame({
+            'date': np.repeat(self.dates, len(names)),
+            'tactic': names * len(self),
+            'selected': counts.ravel(),
+            'total': np.tile(totals, len(self)),
+            'coverage': (counts / np.maximum(totals, 1)).ravel(),
+        })
+
+
+def _read_snapshot_rows(paths: List[str], index: TechniqueIndex) -> Tuple[set, np.ndarray, np.ndarray]:
+    domains = set()
+
+    # Scores start out missing (NaN) so that negative scores aren't clamped to zero, and are then filled with zero.
+    scores = np.full((len(paths), len(index)), np.nan, dtype=np.float64)
+    selected = np.zeros((len(paths), len(index)), dtype=bool)
+    for i, path in enumerate(paths):
+        o = util.read_json_file(path)
+        domains.add(o.get('domain', MITRE_ATTACK_ENTERPRISE))
+        for technique in o.get('techniques', []):
+            j = index.get_position(technique['techniqueID'])
+            if j is None:
+                continue
+
+            score = technique.get('score')
+            if score is not None:
+                scores[i, j] = np.fmax(scores[i, j], score)
+
+            # See `Technique.is_selected`.
+            if technique.get('enabled', True) and any((score, technique.get('color'))):
+                selected[i, j] = True
+    return domains, np.nan_to_num(scores, copy=False, nan=0), selected
+
+
+def get_snapshot_date(path: str) -> np.datetime64:
+    match = SNAPSHOT_DATE_PATTERN.search(os.path.basename(path))
+    if match:
+        try:
+            return np.datetime64(datetime.date(*map(int, match.groups())), 'D')
+        except ValueError:
+            pass
+    return np.datetime64(datetime.date.fromtimestamp(os.path.getmtime(path)), 'D')
+
+
+def new_trend_layer(index: TechniqueIndex, values: np.ndarray, color_scheme: Optional[GradientColorScheme] = None, **kwargs) -> Layer:
+    """
+    Create a layer from per-technique values which may be negative or fractional (e.g., deltas or moving averages).
+
+    Techniques with a non-zero value are scored (rounded to the nearest integer) and coloured using the provided gradient, which spans the range of scores in the layer.
+    """
+    color_scheme = color_scheme or GradientColorScheme()
+    scores = np.rint(values).astype(np.int64)
+    positions = np.flatnonzero(scores)
+
+    min_score = int(min(scores[positions].min(), 0)) if len(positions) else 0
+    max_score = int(scores[positions].max()) if len(positions) else 0
+    max_score = max(max_score, min_score + 1)
+    colors = color_scheme.get_colors(max_score - min_score + 1)
+
+    layer = Layer(
+        gradient=Gradient(
+            minValue=min_score,
+            maxValue=max_score,
+            colors=colors,
+        ),
+        **kwargs,
+    )
+    for i in positions:
+        score = int(scores[i])
+        layer.techniques.append(Technique(
+            techniqueID=index.technique_ids[i],
+            score=score,
+            color=colors[score - min_score],
+        ))
+    return layer
@@ -0,0 +1,105 @@
+import concurrent.futures
+import contextlib
+from dataclasses import dataclass
+import os
+import time
+from typing import Iterable, List, Optional, Tuple, Union
+import logging
+import urllib.parse
+
+from stix2.datastore import DataSource, DataStoreMixin
+
+from mitre_attack_navigator_layer_builder import fetch, io, util
+from mitre_attack_navigator_layer_builder.cache import BundleCache
+from mitre_attack_navigator_layer_builder.catalog import AttackCatalog
+from mitre_attack_navigator_layer_builder.constants import DEFAULT_HTTP_TIMEOUT
+from mitre_attack_navigator_layer_builder.fetch import HTTPCache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass()
+class SourceTiming:
+    """
+    The time taken to fetch (or read) and parse a single STIX 2 data source.
+    """
+    source: str
+    total_objects: int
+    duration: float     # In seconds.
+
+
+def load_attack_catalog(
+        data_sources: Iterable[Union[str, DataSource, DataStoreMixin]],
+        cache: Optional[BundleCache] = None,
+        http_cache: Optional[HTTPCache] = None,
+        jobs: Optional[int] = None) -> Tuple[AttackCatalog, List[SourceTiming]]:
+    """
+    Fetch (or read) and parse the provided STIX 2 data sources concurrently (e.g., ATT&CK, CAPEC, and NIST 800-53 bundles) and merge them into a single catalog, returning the catalog and the time taken to load each data source.
+
+    URLs (and other data sources) are loaded by a pool of threads (one per data source), so the total time is bounded by the slowest data source when loading is dominated by I/O. Parsing local bundles is CPU bound, so when more than one file is provided, files are parsed by a pool of `jobs` processes (by default, one per CPU) instead - if `jobs` is 1, files are parsed by the threads.
+
+    If an object appears in more than one data source, the most recently modified version is kept.
+    """
+    data_sources = list(data_sources)
+    objects_by_id = {}
+    timings = []
+    if not data_sources:
+        return AttackCatalog(), timings
+
+    paths = [data_source for data_source in data_sources if _is_path(data_source)]
+    with contextlib.ExitStack() as stack:
+        threads = stack.enter_context(concurrent.futures.ThreadPoolExecutor(max_workers=len(data_sources)))
+        processes = None
+        if len(paths) > 1 and jobs != 1:
+            processes = stack.enter_context(concurrent.futures.ProcessPoolExecutor(max_workers=min(jobs or os.cpu_count() or 1, len(paths))))
+
+        futures = []
+        for data_source in data_sources:
+            executor = processes if processes is not None and _is_path(data_source) else threads
+            futures.append(executor.submit(_load_stix2_objects, data_source, cache, http_cache))
+
+        # Merge in the order that the data sources were provided so that the result is deterministic.
+        for data_source, future in zip(data_sources, futures):
+            objects, duration = future.result()
+            timing = SourceTiming(source=_get_source_name(data_source), total_objects=len(objects), duration=duration)
+            logger.info("Loaded %d objects from %s in %.2f seconds", timing.total_objects, timing.source, timing.duration)
+            timings.append(timing)
+
+            for o in objects:
+                existing = objects_by_id.get(o['id'])
+                if existing is None or o.get('modified', '') > existing.get('modified', ''):
+                    objects_by_id[o['id']] = o
+
+    return AttackCatalog(objects=list(objects_by_id.values())), timings
+
+
+def _load_stix2_objects(
+        data_source: Union[str, DataSource, DataStoreMixin],
+        cache: Optional[BundleCache],
+        http_cache: Optional[HTTPCache]) -> Tuple[List[dict], float]:
+    start = time.perf_counter()
+    if isinstance(data_source, str) and data_source.startswith(('http://', 'https://')):
+        if http_cache is not None:
+            objects = http_cache.get_stix2_objects(data_source)
+        elif urllib.parse.urlparse(data_source).path.endswith(('.json', '.json.gz')):
+            response = fetch.get_session().get(data_source, timeout=DEFAULT_HTTP_TIMEOUT)
+            response.raise_for_status()
+            objects = fetch.decode_json_body(response.content)['objects']
+        else:
+            objects = list(io.iter_stix2_objects(data_source, include_deprecated_objects=True, include_revoked_objects=True))
+    elif _is_path(data_source):
+        path = util.get_real_path(data_source)
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        objects = list(io.iter_raw_stix2_objects(path, include_deprecated_objects=True, include_revoked_objects=True, cache=cache))
+    else:
+        objects = list(io.iter_stix2_objects(data_source, include_deprecated_objects=True, include_revoked_objects=True))
+    return objects, time.perf_counter() - start
+
+
+def _is_path(data_source: Union[str, DataSource, DataStoreMixin]) -> bool:
+    return isinstance(data_source, str) and not data_source.startswith(('http://', 'https://'))
+
+
+def _get_source_name(data_source: Union[str, DataSource, DataStoreMixin]) -> str:
+    return data_source if isinstance(data_source, str) else type(data_source).__name__
@@ -0,0 +1,148 @@
+import gzip
+import json
+from typing import IO, Iterator, Tuple
+import logging
+
+from mitre_attack_navigator_layer_builder import util
+from mitre_attack_navigator_layer_builder.constants import DEFAULT_BUNDLE_READ_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE = ' \t\n\r'
+
+_decoder = json.JSONDecoder()
+
+
+def iter_bundle_objects(path: str, chunk_size: int = DEFAULT_BUNDLE_READ_CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Incrementally read the objects in a STIX 2 bundle (i.e., the `objects` array) one at a time.
+
+    The bundle is read `chunk_size` characters at a time, so memory usage is bounded by the size of the largest object in the bundle rather than by the size of the bundle. GZIP compressed bundles (i.e., `.json.gz` files) are decompressed on the fly.
+    """
+    path = util.get_real_path(path)
+    if path.endswith('.gz'):
+        fp = gzip.open(path, mode='rt', encoding='utf-8')
+    else:
+        fp = open(path, mode='r', encoding='utf-8')
+
+    with fp:
+        for _, _, o in iter_json_array_items(fp, key='objects', chunk_size=chunk_size):
+            yield o
+
+
+def iter_json_array_items(fp: IO[str], key: str, chunk_size: int = DEFAULT_BUNDLE_READ_CHUNK_SIZE) -> Iterator[Tuple[int, int, dict]]:
+    """
+    Incrementally read the items of the array stored under `key` in a top-level JSON object, yielding the offset and length of each item (in characters) along with the decoded item.
+
+    Other top-level values are skipped. If the file is opened with a single-byte encoding (e.g., `latin-1`), offsets and lengths are byte offsets and lengths.
+    """
+    reader = _Reader(fp, chunk_size)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+
+    while True:
+        name = reader.decode()
+        if not isinstance(name, str):
+            raise ValueError(f"Expected a property name at offset {reader.offset}")
+        reader.expect(':')
+
+        if name == key:
+            yield from _iter_array_items(reader)
+        else:
+            reader.decode()
+
+        if reader.expect(',}') == '}':
+            return
+
+
+def _iter_array_items(reader: "_Reader") -> Iterator[Tuple[int, int, dict]]:
+    reader.expect('[')
+    if reader.peek() == ']':
+        reader.expect(']')
+        return
+
+    while True:
+        offset = reader.offset
+        o = reader.decode()
+        yield offset, reader.offset - offset, o
+        if reader.expect(',]') == ']':
+            return
+
+
+class _Reader:
+    """
+    A buffered reader that decodes one JSON value at a time from a text stream.
+
+    Values are decoded with the C implementation of `json.JSONDecoder.raw_decode` - if a value spans the end of the buffer, the buffer is grown and decoding is retried.
+    """
+    def __init__(self, fp: IO[str], chunk_size: int):
+        assert chunk_size > 0, "Chunk size must be greater than zero"
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.position = 0   # The position within the buffer.
+        self.consumed = 0   # The number of characters that were discarded from the start of the buffer.
+        self.eof = False
+
+    @property
+    def offset(self) -> int:
+        return self.consumed + self.position
+
+    def _fill(self, size: int) -> bool:
+        if self.eof:
+            return False
+
+        # Discard consumed characters so that the buffer only holds the value being decoded.
+        if self.position:
+            self.consumed += self.position
+            self.buffer = self.buffer[self.position:]
+            self.position = 0
+
+        chunk = self.fp.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer += chunk
+        return True
+
+    def _skip_whitespace(self) -> None:
+        while True:
+            buffer = self.buffer
+            position = self.position
+            while position < len(buffer) and buffer[position] in WHITESPACE:
+                position += 1
+            self.position = position
+            if position < len(buffer) or not self._fill(self.chunk_size):
+                return
+
+    def peek(self) -> str:
+        self._skip_whitespace()
+        if self.position >= len(self.buffer):
+            raise ValueError(f"Unexpected end of file at offset {self.offset}")
+        return self.buffer[self.position]
+
+    def expect(self, characters: str) -> str:
+        c = self.peek()
+        if c not in characters:
+            raise ValueError(f"Expected one of {characters!r} at offset {self.offset} - got {c!r}")
+        self.position += 1
+        return c
+
+    def decode(self):
+        self.peek()
+        while True:
+            try:
+                o, end = _decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                # Grow the buffer geometrically so that large values aren't re-scanned too many times.
+                if not self._fill(max(self.chunk_size, len(self.buffer))):
+                    raise
+                continue
+
+            # Numbers (and literals) may continue past the end of the buffer.
+            if end == len(self.buffer) and not isinstance(o, (dict, list, str)) and self._fill(self.chunk_size):
+                continue
+
+            self.position = end
+            return o
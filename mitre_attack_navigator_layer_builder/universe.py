@@ -0,0 +1,134 @@
+import collections
+import concurrent.futures
+from dataclasses import dataclass
+import threading
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+import logging
+
+from mitre_attack_navigator_layer_builder.catalog import AttackCatalog
+from mitre_attack_navigator_layer_builder.constants import DEFAULT_TECHNIQUE_UNIVERSE_CACHE_SIZE, MITRE_ATTACK_VERSIONED_URL_TEMPLATE, STIX2_URLS_BY_LAYER_DOMAIN
+from mitre_attack_navigator_layer_builder.fetch import HTTPCache
+from mitre_attack_navigator_layer_builder.layers import Layer
+from mitre_attack_navigator_layer_builder.sources import load_attack_catalog
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TechniqueUniverse:
+    """
+    Every active technique in a domain of a specific version of ATT&CK (or the latest version, if `version` is `None`).
+
+    Technique IDs are sorted.
+    """
+    domain: str
+    version: Optional[str]
+    technique_ids: Tuple[str, ...]
+    technique_id_set: FrozenSet[str]
+
+    @classmethod
+    def from_technique_ids(cls, domain: str, version: Optional[str], technique_ids: Iterable[str]) -> "TechniqueUniverse":
+        technique_ids = tuple(sorted(set(technique_ids)))
+        return cls(
+            domain=domain,
+            version=version,
+            technique_ids=technique_ids,
+            technique_id_set=frozenset(technique_ids),
+        )
+
+    @classmethod
+    def from_catalog(cls, catalog: AttackCatalog, domain: str, version: Optional[str] = None) -> "TechniqueUniverse":
+        technique_ids = [
+            technique_id for technique_id in catalog.get_technique_ids() 
+            if domain in catalog.get_technique(technique_id).get('x_mitre_domains', [domain])
+        ]
+        return cls.from_technique_ids(domain, version, technique_ids)
+
+    def get_missing_technique_ids(self, layer: Layer) -> List[str]:
+        """
+        Return the sorted IDs of the techniques that aren't in the provided layer.
+        """
+        return sorted(self.technique_id_set - layer.technique_ids)
+
+    def __contains__(self, technique_id: str) -> bool:
+        return technique_id in self.technique_id_set
+
+    def __len__(self) -> int:
+        return len(self.technique_ids)
+
+
+class TechniqueUniverseProvider:
+    """
+    A memoized, thread-safe provider of technique universes keyed by ATT&CK domain and version (i.e., `Layer.domain` and `Versions.attack`).
+
+    Universes are loaded on demand using `load(domain, version)` (by default, by downloading the matching release of ATT&CK), and the least recently used universe is evicted once there are more than `max_size` universes. Each universe is only loaded once at a time - concurrent requests for a universe that's being loaded wait for it instead.
+    """
+    def __init__(
+            self, 
+            load: Optional[Callable[[str, Optional[str]], AttackCatalog]] = None, 
+            max_size: int = DEFAULT_TECHNIQUE_UNIVERSE_CACHE_SIZE):
+        self.load = load or load_attack_release
+        self.max_size = max_size
+        self._universes: Dict[Tuple[str, Optional[str]], TechniqueUniverse] = collections.OrderedDict()
+        self._loading: Dict[Tuple[str, Optional[str]], concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, domain: str, version: Optional[str] = None) -> TechniqueUniverse:
+        key = (domain, version)
+        with self._lock:
+            universe = self._universes.get(key)
+            if universe is not None:
+                self._universes.move_to_end(key)
+                return universe
+
+            future = self._loading.get(key)
+            if future is not None:
+                loading = False
+            else:
+                future = self._loading[key] = concurrent.futures.Future()
+                loading = True
+
+        if not loading:
+            return future.result()
+
+        try:
+            logger.info("Loading technique universe: %s (version: %s)", domain, version or 'latest')
+            universe = TechniqueUniverse.from_catalog(self.load(domain, version), domain, version)
+            self.put(universe)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(universe)
+            return universe
+        finally:
+            with self._lock:
+                del self._loading[key]
+
+    def get_for_layer(self, layer: Layer) -> TechniqueUniverse:
+        return self.get(layer.domain, layer.versions.attack if layer.versions else None)
+
+    def put(self, universe: TechniqueUniverse) -> None:
+        with self._lock:
+            self._universes[(universe.domain, universe.version)] = universe
+            self._universes.move_to_end((universe.domain, universe.version))
+            while len(self._universes) > self.max_size:
+                self._universes.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._universes.clear()
+
+    def __len__(self) -> int:
+        return len(self._universes)
+
+
+def get_attack_release_url(domain: str, version: Optional[str] = None) -> str:
+    if version is None:
+        return STIX2_URLS_BY_LAYER_DOMAIN[domain]
+    return MITRE_ATTACK_VERSIONED_URL_TEMPLATE.format(domain=domain, version=version)
+
+
+def load_attack_release(domain: str, version: Optional[str] = None, http_cache: Optional[HTTPCache] = None) -> AttackCatalog:
+    catalog, _ = load_attack_catalog([get_attack_release_url(domain, version)], http_cache=http_cache)
+    return catalog
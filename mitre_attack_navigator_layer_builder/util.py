@@ -1,12 +1,17 @@
+import collections
+import concurrent.futures
+import contextlib
 import datetime
 import functools
 import pandas as pd
 import gzip
+import itertools
 import json
 import os
 import re
 import string
-from typing import Any, Dict, List
+import tempfile
+from typing import Any, Callable, Dict, Iterable, Iterator, List
 from uuid import UUID
 import nearest_colours
 from stix2.base import _STIXBase
@@ -53,6 +58,52 @@ def prune_dict(d) -> dict:
         return d
     
 
+def iter_chunks(rows: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """
+    Split the provided iterable into lists of up to `chunk_size` items.
+    """
+    assert chunk_size > 0, "Chunk size must be greater than zero"
+    rows = iter(rows)
+    while chunk := list(itertools.islice(rows, chunk_size)):
+        yield chunk
+
+
+def iter_executor_map(executor: concurrent.futures.Executor, f: Callable[[Any], Any], rows: Iterable[Any], window: int) -> Iterator[Any]:
+    """
+    Like `executor.map`, but rows are only submitted while fewer than `window` results are pending, so rows are consumed lazily and memory use is bounded (`Executor.map` consumes every row up front).
+
+    Results are returned in the order that the rows were provided.
+    """
+    assert window > 0, "Window must be greater than zero"
+    pending = collections.deque()
+    try:
+        for row in rows:
+            if len(pending) >= window:
+                yield pending.popleft().result()
+            pending.append(executor.submit(f, row))
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def map_chunks(f: Callable[[List[Any]], Any], rows: Iterable[Any], jobs: int, chunk_size: int) -> Iterator[Any]:
+    """
+    Split the provided rows into chunks (see `iter_chunks`) and yield the result of `f(chunk)` for each chunk, in order.
+
+    If `jobs` isn't 1, chunks are processed by a pool of `jobs` worker processes (or by one worker per CPU if `jobs` is 0), and at most two chunks per worker are generated ahead of the results (see `iter_executor_map`).
+    """
+    chunks = iter_chunks(rows, chunk_size)
+    if jobs == 1:
+        yield from map(f, chunks)
+        return
+
+    jobs = jobs or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from iter_executor_map(executor, f, chunks, window=2 * jobs)
+
+
 def is_iterable(o: Any) -> bool:
     try:
         iter(o)
@@ -81,6 +132,21 @@ def read_json_file(path: str) -> Any:
         return json.load(fp)
 
 
+def write_file_atomically(path: str, data: bytes) -> None:
+    """
+    Write the provided data to a temporary file in the same directory and then move it into place, so that concurrent readers never see a partial file.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode='wb') as fp:
+            fp.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
 def get_real_path(path: str) -> str:
     """
     Get the real path of the provided path by:
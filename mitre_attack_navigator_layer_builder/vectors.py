@@ -0,0 +1,233 @@
+from dataclasses import dataclass
+import dataclasses
+import itertools
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+import logging
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from mitre_attack_navigator_layer_builder.layers import Layer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass()
+class TechniqueIndex:
+    """
+    A mapping of technique IDs (e.g., "T1003") to dense integer positions so that per-technique state can be stored in NumPy arrays.
+
+    Indexes are append-only: technique IDs are assigned positions in the order that they're added, and positions never change.
+    """
+    technique_ids: List[str] = dataclasses.field(default_factory=list)
+
+    def __post_init__(self):
+        self._positions: Dict[str, int] = {}
+        technique_ids, self.technique_ids = self.technique_ids, []
+        for technique_id in technique_ids:
+            self.add(technique_id)
+
+    @classmethod
+    def from_layers(cls, layers: Iterable["Layer"]) -> "TechniqueIndex":
+        index = cls()
+        for layer in layers:
+            index.update(technique.techniqueID for technique in layer.techniques)
+        return index
+
+    def add(self, technique_id: str) -> int:
+        position = self._positions.get(technique_id)
+        if position is None:
+            position = self._positions[technique_id] = len(self.technique_ids)
+            self.technique_ids.append(technique_id)
+        return position
+
+    def update(self, technique_ids: Iterable[str]) -> "TechniqueIndex":
+        for technique_id in technique_ids:
+            self.add(technique_id)
+        return self
+
+    def get_position(self, technique_id: str) -> Optional[int]:
+        return self._positions.get(technique_id)
+
+    def get_positions(self, technique_ids: Iterable[str], add_missing: bool = False) -> np.ndarray:
+        """
+        Return the positions of the provided technique IDs - unknown technique IDs are either added to the index or skipped.
+        """
+        if add_missing:
+            get = self._positions.get
+            positions = (position if (position := get(technique_id)) is not None else self.add(technique_id) for technique_id in technique_ids)
+        else:
+            positions = (self._positions[technique_id] for technique_id in technique_ids if technique_id in self._positions)
+        return np.fromiter(positions, dtype=np.int64)
+
+    def get_mask(self, technique_ids: Iterable[str], add_missing: bool = False) -> np.ndarray:
+        positions = self.get_positions(technique_ids, add_missing=add_missing)
+        mask = np.zeros(len(self), dtype=bool)
+        mask[positions] = True
+        return mask
+
+    def get_technique_ids(self, mask: np.ndarray) -> List[str]:
+        """
+        Return the technique IDs at the positions set in the provided boolean mask (or at the provided positions).
+        """
+        positions = np.flatnonzero(mask) if mask.dtype == bool else mask
+        return [self.technique_ids[i] for i in positions]
+
+    def __contains__(self, technique_id: str) -> bool:
+        return technique_id in self._positions
+
+    def __len__(self) -> int:
+        return len(self.technique_ids)
+
+
+@dataclass()
+class LayerMatrix:
+    """
+    The state of N layers over a shared technique index, stored as (layers x techniques) boolean matrices.
+
+    A technique is selected/enabled/disabled within a layer if any of its entries (e.g., one per tactic) is selected/enabled/disabled.
+    """
+    index: TechniqueIndex
+    names: List[str]
+    domain: Optional[str]
+    present: np.ndarray
+    selected: np.ndarray
+    enabled: np.ndarray
+    disabled: np.ndarray
+
+    @classmethod
+    def from_layers(cls, layers: Iterable["Layer"], index: Optional[TechniqueIndex] = None) -> "LayerMatrix":
+        """
+        Build a matrix from the provided layers.
+
+        By default, a new index is built for the layers. Pass the same index to several calls to assign a technique the same position in every matrix - the index then grows as needed, so a matrix may have columns for techniques that aren't in any of its layers (see `get_present`).
+        """
+        layers = list(layers)
+        domains = {layer.domain for layer in layers}
+        assert len(domains) <= 1, f'All layers must have the same domain - got {domains}'
+        domain = next(iter(domains), None)
+
+        if index is None:
+            index = TechniqueIndex()
+
+        # Gather the positions of the techniques in each layer, and then fill the matrices using fancy indexing.
+        positions = [index.get_positions((technique.techniqueID for technique in layer.techniques), add_missing=True) for layer in layers]
+        shape = (len(layers), len(index))
+
+        rows = np.repeat(np.arange(len(layers), dtype=np.int64), [len(p) for p in positions])
+        columns = np.concatenate(positions) if positions else np.zeros(0, dtype=np.int64)
+        techniques = list(itertools.chain.from_iterable(layer.techniques for layer in layers))
+
+        present = np.zeros(shape, dtype=bool)
+        selected = np.zeros(shape, dtype=bool)
+        enabled = np.zeros(shape, dtype=bool)
+        disabled = np.zeros(shape, dtype=bool)
+        present[rows, columns] = True
+
+        # See `Technique.is_selected`, `Technique.is_enabled`, and `Technique.is_disabled`.
+        for matrix, mask in [
+            (selected, [bool(technique.enabled and (technique.score or technique.color)) for technique in techniques]),
+            (enabled, [technique.enabled is True for technique in techniques]),
+            (disabled, [technique.enabled is False for technique in techniques]),
+        ]:
+            mask = np.array(mask, dtype=bool)
+            matrix[rows[mask], columns[mask]] = True
+
+        return cls(
+            index=index,
+            names=[layer.name for layer in layers],
+            domain=domain,
+            present=present,
+            selected=selected,
+            enabled=enabled,
+            disabled=disabled,
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def get_present(self) -> np.ndarray:
+        return self.present.any(axis=0)
+
+    def get_union(self) -> np.ndarray:
+        return self.selected.any(axis=0)
+
+    def get_intersection(self) -> np.ndarray:
+        if not len(self):
+            return np.zeros(len(self.index), dtype=bool)
+        return self.selected.all(axis=0)
+
+    def get_left_diff(self) -> np.ndarray:
+        """
+        Techniques selected in the first layer, but not in any of the other layers.
+        """
+        if not len(self):
+            return np.zeros(len(self.index), dtype=bool)
+        return self.selected[0] & ~self.selected[1:].any(axis=0)
+
+    def get_right_diff(self) -> np.ndarray:
+        """
+        Techniques selected in the last layer, but not in any of the other layers.
+        """
+        if not len(self):
+            return np.zeros(len(self.index), dtype=bool)
+        return self.selected[-1] & ~self.selected[:-1].any(axis=0)
+
+    def get_symmetric_diff(self) -> np.ndarray:
+        """
+        Techniques selected in an odd number of layers (i.e., a chained XOR - for two layers, techniques selected in exactly one of them).
+        """
+        return np.logical_xor.reduce(self.selected, axis=0)
+
+    def get_selection_counts(self) -> np.ndarray:
+        return self.selected.sum(axis=0, dtype=np.int64)
+
+
+@dataclass()
+class TechniqueCounter:
+    """
+    Per-technique counts stored in a NumPy array over a (growable) technique index.
+
+    The array grows with the number of distinct techniques rather than with the number of inputs, so counts can be accumulated over any number of layers using constant memory.
+    """
+    index: TechniqueIndex = dataclasses.field(default_factory=TechniqueIndex)
+
+    def __post_init__(self):
+        self._counts = np.zeros(len(self.index), dtype=np.int64)
+
+    @property
+    def counts(self) -> np.ndarray:
+        self._reserve()
+        return self._counts[:len(self.index)]
+
+    def _reserve(self) -> None:
+        if len(self.index) > len(self._counts):
+            counts = np.zeros(max(len(self.index), 2 * len(self._counts)), dtype=np.int64)
+            counts[:len(self._counts)] = self._counts
+            self._counts = counts
+
+    def register(self, technique_ids: Iterable[str]) -> "TechniqueCounter":
+        """
+        Add the provided technique IDs to the index without counting them.
+        """
+        self.index.update(technique_ids)
+        self._reserve()
+        return self
+
+    def add(self, technique_ids: Iterable[str], n: int = 1) -> "TechniqueCounter":
+        positions = self.index.get_positions(technique_ids, add_missing=True)
+        self._reserve()
+        np.add.at(self._counts, positions, n)
+        return self
+
+    def subtract(self, technique_ids: Iterable[str], n: int = 1) -> "TechniqueCounter":
+        return self.add(technique_ids, n=-n)
+
+    def merge(self, other: "TechniqueCounter") -> "TechniqueCounter":
+        """
+        Add the counts from another counter (e.g., a partial aggregate calculated by a worker process) to this counter.
+        """
+        positions = self.index.get_positions(other.index.technique_ids, add_missing=True)
+        self._reserve()
+        np.add.at(self._counts, positions, other.counts)
+        return self
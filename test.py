@@ -6,6 +6,8 @@ import logging
 import urllib3
 
 from mitre_attack_navigator_layer_builder.coloring import IntersectionColorScheme, DiffColorScheme, LabeledColorScheme, SingleColorScheme, GradientColorScheme
+from mitre_attack_navigator_layer_builder.constants import MITRE_ATTACK_ENTERPRISE
+from mitre_attack_navigator_layer_builder.universe import TechniqueUniverse
 
 logging.basicConfig(level=logging.DEBUG)
 
@@ -24,8 +26,8 @@ def main():
     )
 
     # Load data sources
-    mitre_attack = io.get_stix2_data_source('~/src/attack-stix-data/enterprise-attack/enterprise-attack.json')
-    attack_patterns = [o for o in io.iter_stix2_objects(mitre_attack) if o['type'] == 'attack-pattern']
+    mitre_attack = io.get_attack_catalog('~/src/attack-stix-data/enterprise-attack/enterprise-attack.json')
+    universe = TechniqueUniverse.from_catalog(mitre_attack, domain=MITRE_ATTACK_ENTERPRISE)
 
     a = io.read_layer('examples/layers/oilrig.json')
     b = io.read_layer('examples/layers/muddywater.json')
@@ -40,7 +42,7 @@ def main():
     io.write_layer(c, 'examples/layers/fin7.json')
 
     o = layers.calculate_heatmap([a, b, c], color_scheme=heatmap_color_scheme).disable_deselected_techniques()
-    layers.add_missing_techniques(o, attack_patterns, enable=False)
+    layers.add_missing_techniques(o, universe, enable=False)
 
     io.write_layer(o, 'examples/layers/heatmap.json')
 
@@ -0,0 +1,128 @@
+"""
+Synthetic ATT&CK-style STIX 2 bundles for tests and benchmarks.
+"""
+import uuid
+from typing import List, Optional
+
+from mitre_attack_navigator_layer_builder.constants import MITRE_ATTACK_ENTERPRISE, MITRE_ATTACK_TACTICS
+
+MITRE_ATTACK_MARKING = 'marking-definition--fa42a846-8d90-4e51-bc29-71d5b4802168'
+MITRE_ATTACK_IDENTITY = 'identity--c78cb6e5-0c4b-4611-8297-d1b8b55e40b5'
+TIMESTAMP = '2024-01-01T00:00:00.000Z'
+
+
+def new_stix2_id(object_type: str, name: str) -> str:
+    return f'{object_type}--{uuid.uuid5(uuid.NAMESPACE_URL, f"{object_type}/{name}")}'
+
+
+def new_attack_object(object_type: str, external_id: str, name: str, **kwargs) -> dict:
+    url_paths = {
+        'attack-pattern': 'techniques',
+        'x-mitre-tactic': 'tactics',
+        'intrusion-set': 'groups',
+        'malware': 'software',
+        'tool': 'software',
+        'campaign': 'campaigns',
+        'course-of-action': 'mitigations',
+    }
+    o = {
+        'type': object_type,
+        'spec_version': '2.1',
+        'id': new_stix2_id(object_type, external_id),
+        'created': TIMESTAMP,
+        'modified': TIMESTAMP,
+        'created_by_ref': MITRE_ATTACK_IDENTITY,
+        'name': name,
+        'object_marking_refs': [MITRE_ATTACK_MARKING],
+        'external_references': [
+            {
+                'source_name': 'mitre-attack',
+                'external_id': external_id,
+                'url': f'https://attack.mitre.org/{url_paths[object_type]}/{external_id.replace(".", "/")}',
+            }
+        ],
+        'x_mitre_domains': [MITRE_ATTACK_ENTERPRISE],
+    }
+    o.update(kwargs)
+    return o
+
+
+def new_relationship(source_ref: str, relationship_type: str, target_ref: str, **kwargs) -> dict:
+    o = {
+        'type': 'relationship',
+        'spec_version': '2.1',
+        'id': new_stix2_id('relationship', f'{source_ref}/{relationship_type}/{target_ref}'),
+        'created': TIMESTAMP,
+        'modified': TIMESTAMP,
+        'created_by_ref': MITRE_ATTACK_IDENTITY,
+        'relationship_type': relationship_type,
+        'source_ref': source_ref,
+        'target_ref': target_ref,
+        'object_marking_refs': [MITRE_ATTACK_MARKING],
+    }
+    o.update(kwargs)
+    return o
+
+
+def new_attack_bundle(
+        total_techniques: int = 50,
+        total_subtechniques: int = 2,
+        total_groups: int = 5,
+        total_software: int = 5,
+        total_campaigns: int = 2,
+        revoked_technique_ids: Optional[List[str]] = None,
+        deprecated_technique_ids: Optional[List[str]] = None) -> dict:
+    """
+    Create a bundle containing tactics, techniques (with sub-techniques), groups, software, campaigns, and `uses` relationships.
+
+    Techniques are assigned to tactics round-robin, and each group/software/campaign uses every n-th technique.
+    """
+    revoked_technique_ids = set(revoked_technique_ids or [])
+    deprecated_technique_ids = set(deprecated_technique_ids or [])
+    objects = []
+
+    for tactic in MITRE_ATTACK_TACTICS:
+        objects.append(new_attack_object('x-mitre-tactic', tactic['external_id'], tactic['name'], x_mitre_shortname=tactic['x_mitre_shortname']))
+
+    techniques = []
+    for i in range(total_techniques):
+        tactics = [MITRE_ATTACK_TACTICS[i % len(MITRE_ATTACK_TACTICS)], MITRE_ATTACK_TACTICS[(i * 7) % len(MITRE_ATTACK_TACTICS)]]
+        kill_chain_phases = [{'kill_chain_name': 'mitre-attack', 'phase_name': t['x_mitre_shortname']} for t in {t['external_id']: t for t in tactics}.values()]
+        platforms = ['Windows', 'Linux'] if i % 2 else ['macOS']
+
+        parent_id = f'T{1000 + i}'
+        for external_id in [parent_id] + [f'{parent_id}.{j:03}' for j in range(1, total_subtechniques + 1)]:
+            kwargs = {
+                'kill_chain_phases': kill_chain_phases,
+                'x_mitre_platforms': platforms,
+                'x_mitre_is_subtechnique': '.' in external_id,
+                'x_mitre_data_sources': ['Process: Process Creation'],
+            }
+            if external_id in revoked_technique_ids:
+                kwargs['revoked'] = True
+            if external_id in deprecated_technique_ids:
+                kwargs['x_mitre_deprecated'] = True
+
+            technique = new_attack_object('attack-pattern', external_id, f'Technique {external_id}', **kwargs)
+            techniques.append(technique)
+            objects.append(technique)
+            if '.' in external_id:
+                objects.append(new_relationship(technique['id'], 'subtechnique-of', new_stix2_id('attack-pattern', parent_id)))
+
+    for object_type, prefix, total in [
+        ('intrusion-set', 'G', total_groups),
+        ('malware', 'S', total_software),
+        ('campaign', 'C', total_campaigns),
+    ]:
+        for i in range(total):
+            external_id = f'{prefix}{i:04}'
+            o = new_attack_object(object_type, external_id, f'{object_type} {external_id}', **({'is_family': False} if object_type == 'malware' else {}))
+            objects.append(o)
+            for technique in techniques[i::max(total, 1) + 1]:
+                objects.append(new_relationship(o['id'], 'uses', technique['id'], description=f'{o["name"]} uses {technique["name"]}'))
+
+    return {
+        'type': 'bundle',
+        'id': f'bundle--{uuid.uuid4()}',
+        'objects': objects,
+    }
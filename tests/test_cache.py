@@ -0,0 +1,97 @@
+import json
+import os
+import pickle
+import tempfile
+import unittest
+
+from mitre_attack_navigator_layer_builder import io
+from mitre_attack_navigator_layer_builder.cache import BundleCache
+from tests.bundles import new_attack_bundle
+
+
+class VanishingEntry:
+    """
+    A cache entry which is removed (e.g., by another process) while it's being read.
+    """
+    def __init__(self, path: str, fail: bool = True):
+        self.path = path
+        self.fail = fail
+
+    def __reduce__(self):
+        return _remove, (self.path, self.fail)
+
+
+def _remove(path: str, fail: bool) -> str:
+    os.unlink(path)
+    if fail:
+        raise ValueError(f"Corrupt cache entry: {path}")
+    return path
+
+
+class BundleCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = BundleCache(directory=os.path.join(self.tmp.name, 'cache'))
+        self.path = os.path.join(self.tmp.name, 'bundle.json')
+        self.write_bundle(new_attack_bundle())
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_bundle(self, bundle: dict) -> None:
+        with open(self.path, 'w') as fp:
+            json.dump(bundle, fp)
+
+    def test_get(self):
+        calls = []
+        def load(path):
+            calls.append(path)
+            return io.read_stix2_bundle_objects(path)
+
+        a = self.cache.get(self.path, 'objects', load)
+        b = self.cache.get(self.path, 'objects', load)
+        self.assertEqual(a, b)
+        self.assertEqual(len(calls), 1)
+
+    def test_get_corrupt_entry(self):
+        expected = self.cache.get(self.path, 'objects', io.read_stix2_bundle_objects)
+        cache_path, = [os.path.join(self.cache.directory, name) for name in os.listdir(self.cache.directory)]
+        with open(cache_path, 'wb') as fp:
+            pickle.dump(VanishingEntry(cache_path), fp)
+
+        # The entry is rebuilt even if it's removed before it can be discarded.
+        self.assertEqual(self.cache.get(self.path, 'objects', io.read_stix2_bundle_objects), expected)
+        self.assertTrue(os.path.exists(cache_path))
+
+    def test_get_vanishing_entry(self):
+        self.cache.get(self.path, 'objects', io.read_stix2_bundle_objects)
+        cache_path, = [os.path.join(self.cache.directory, name) for name in os.listdir(self.cache.directory)]
+        with open(cache_path, 'wb') as fp:
+            pickle.dump(VanishingEntry(cache_path, fail=False), fp)
+
+        # The entry is returned even if it's removed before its access time can be updated.
+        self.assertEqual(self.cache.get(self.path, 'objects', io.read_stix2_bundle_objects), cache_path)
+
+    def test_get_stix2_data_source_from_file(self):
+        expected = io.get_stix2_data_source_from_file(self.path)
+        for _ in range(2):
+            result = io.get_stix2_data_source_from_file(self.path, cache=self.cache)
+            self.assertEqual({o['id'] for o in result.query()}, {o['id'] for o in expected.query()})
+
+    def test_stale_versions_are_replaced(self):
+        io.read_stix2_bundle_objects(self.path, cache=self.cache)
+        self.write_bundle(new_attack_bundle(total_techniques=10))
+        os.utime(self.path, ns=(0, 0))
+
+        objects = io.read_stix2_bundle_objects(self.path, cache=self.cache)
+        self.assertEqual(len([o for o in objects if o['type'] == 'attack-pattern']), 30)
+        self.assertEqual(len(os.listdir(self.cache.directory)), 1)
+
+    def test_invalidate_and_evict(self):
+        io.read_stix2_bundle_objects(self.path, cache=self.cache)
+        io.get_stix2_data_source_from_file(self.path, cache=self.cache)
+        self.assertEqual(self.cache.invalidate(self.path), 2)
+
+        self.cache.max_size = 1
+        io.read_stix2_bundle_objects(self.path, cache=self.cache)
+        self.assertEqual(self.cache.get_size(), 0)
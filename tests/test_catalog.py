@@ -0,0 +1,44 @@
+import unittest
+
+from stix2 import MemoryStore
+
+from mitre_attack_navigator_layer_builder import io, layers
+from mitre_attack_navigator_layer_builder.catalog import AttackCatalog
+from mitre_attack_navigator_layer_builder.layers import Layer
+from tests.bundles import new_attack_bundle
+
+
+class AttackCatalogTests(unittest.TestCase):
+    def setUp(self):
+        self.bundle = new_attack_bundle(revoked_technique_ids=['T1001'], deprecated_technique_ids=['T1002.001'])
+        self.catalog = AttackCatalog.from_bundle(self.bundle)
+
+    def test_lookups(self):
+        technique = self.catalog.get_technique('T1003')
+        self.assertEqual(technique['name'], 'Technique T1003')
+        self.assertIs(self.catalog.get(technique['id']), technique)
+        self.assertEqual(self.catalog.get_external_id(technique['id']), 'T1003')
+        self.assertEqual(self.catalog.get_tactic_shortnames('T1003'), [phase['phase_name'] for phase in technique['kill_chain_phases']])
+        self.assertEqual(self.catalog.get_tactic('execution')['name'], 'Execution')
+        self.assertIn('T1003', self.catalog.get_technique_ids_by_platform('Windows'))
+        self.assertIsNone(self.catalog.get_technique('TA0002'))
+
+    def test_revoked_and_deprecated_techniques(self):
+        technique_ids = self.catalog.get_technique_ids()
+        self.assertEqual(len(technique_ids), 148)
+        self.assertNotIn('T1001', technique_ids)
+        self.assertNotIn('T1002.001', technique_ids)
+        self.assertEqual(len(self.catalog.get_technique_ids(include_revoked=True, include_deprecated=True)), 150)
+
+    def test_tactic_maps_match_data_source(self):
+        store = MemoryStore(allow_custom=True)
+        store.add(self.bundle['objects'])
+
+        self.assertEqual(io.get_map_of_attack_tactic_ids_to_technique_ids(self.catalog), io.get_map_of_attack_tactic_ids_to_technique_ids(store))
+        self.assertEqual(io.get_map_of_attack_technique_ids_to_tactic_ids(self.catalog), io.get_map_of_attack_technique_ids_to_tactic_ids(store))
+
+    def test_add_missing_techniques(self):
+        layer = Layer().select_techniques(['T1003'], color='#ff0000')
+        layers.add_missing_techniques(layer, self.catalog, enable=False)
+        self.assertEqual(layer.technique_ids, self.catalog.get_technique_ids())
+        self.assertEqual(layer.get_selected_technique_ids(), {'T1003'})
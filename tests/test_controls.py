@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+import unittest
+
+from click.testing import CliRunner
+
+from mitre_attack_navigator_layer_builder.catalog import AttackCatalog
+from mitre_attack_navigator_layer_builder.cli import main_group
+from mitre_attack_navigator_layer_builder.controls import ControlMatrix
+from tests.bundles import new_attack_object, new_relationship
+from tests.test_pivots import new_nist_control
+
+MAPPINGS = {
+    'AC-2': ['T1078', 'T1098'],
+    'AC-2(1)': ['T1078'],
+    'AC-3': [],
+    'SI-4': ['T1078', 'T1059'],
+}
+
+
+class ControlMatrixTests(unittest.TestCase):
+    def setUp(self):
+        techniques = {technique_id: new_attack_object('attack-pattern', technique_id, technique_id) for technique_id in ['T1059', 'T1078', 'T1098', 'T1190']}
+        controls = {control_id: new_nist_control(control_id) for control_id in MAPPINGS}
+        self.techniques = list(techniques.values())
+        self.objects = list(techniques.values()) + list(controls.values())
+        for control_id, technique_ids in MAPPINGS.items():
+            for technique_id in technique_ids:
+                self.objects.append(new_relationship(controls[control_id]['id'], 'mitigates', techniques[technique_id]['id']))
+        self.objects.append(new_relationship(controls['AC-3']['id'], 'mitigates', techniques['T1190']['id'], revoked=True))
+        self.matrix = ControlMatrix.from_stix2_objects(self.objects)
+
+    def test_matrix(self):
+        self.assertEqual(self.matrix.control_ids, sorted(MAPPINGS))
+        self.assertEqual(self.matrix.matrix.shape, (4, 4))
+        for control_id, technique_ids in MAPPINGS.items():
+            self.assertEqual(self.matrix.get_technique_ids(control_id), sorted(technique_ids))
+        self.assertEqual(self.matrix.get_control_ids('T1078'), ['AC-2', 'AC-2(1)', 'SI-4'])
+        self.assertEqual(self.matrix.get_control_ids('T9999'), [])
+
+    def test_scores(self):
+        scores = dict(zip(self.matrix.index.technique_ids, self.matrix.get_technique_scores().tolist()))
+        self.assertEqual(scores, {'T1059': 1, 'T1078': 3, 'T1098': 1, 'T1190': 0})
+
+        family_scores = {family: scores.tolist() for family, scores in self.matrix.get_family_scores().items()}
+        self.assertEqual(family_scores, {'AC': [0, 2, 1, 0], 'SI': [1, 1, 0, 0]})
+
+    def test_layers(self):
+        rows = dict(self.matrix.iter_control_layers())
+        self.assertEqual(sorted(rows), ['AC-2', 'AC-2(1)', 'SI-4'])
+        self.assertEqual(rows['AC-2'].get_selected_technique_ids(), {'T1078', 'T1098'})
+
+        rows = dict(self.matrix.iter_family_layers())
+        self.assertEqual(rows['AC'].get_scores(), {'T1078': 2, 'T1098': 1})
+
+        layer = self.matrix.get_technique_score_layer()
+        self.assertEqual(layer.get_scores(), {'T1059': 1, 'T1078': 3, 'T1098': 1})
+
+    def test_controls_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'mappings.json')
+            with open(path, 'w') as fp:
+                json.dump({'type': 'bundle', 'id': 'bundle--1', 'objects': self.objects}, fp)
+
+            output = os.path.join(tmp, 'layers')
+            result = CliRunner().invoke(main_group, ['controls', '-s', path, '-o', output])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertEqual(sorted(os.listdir(output)), ['AC-2(1).json', 'AC-2.json', 'SI-4.json', 'family-AC.json', 'family-SI.json', 'technique-scores.json'])
+
+    def test_mappings_without_techniques(self):
+        # Mapping bundles only contain relationships, so the techniques have to be resolved using a catalog.
+        mappings = [o for o in self.objects if o['type'] != 'attack-pattern']
+        self.assertEqual(ControlMatrix.from_stix2_objects(mappings).matrix.sum(), 0)
+
+        matrix = ControlMatrix.from_stix2_objects(mappings, catalog=AttackCatalog(objects=self.techniques))
+        for control_id, technique_ids in MAPPINGS.items():
+            self.assertEqual(matrix.get_technique_ids(control_id), sorted(technique_ids))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [os.path.join(tmp, 'mappings.json'), os.path.join(tmp, 'attack.json')]
+            for path, objects in zip(paths, [mappings, self.techniques]):
+                with open(path, 'w') as fp:
+                    json.dump({'type': 'bundle', 'id': 'bundle--1', 'objects': objects}, fp)
+
+            output = os.path.join(tmp, 'layers')
+            result = CliRunner().invoke(main_group, ['controls', '-s', paths[0], '--attack-source', paths[1], '-o', output])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn('AC-2.json', os.listdir(output))
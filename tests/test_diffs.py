@@ -0,0 +1,84 @@
+import io as _io
+import json
+import os
+import tempfile
+import unittest
+
+from mitre_attack_navigator_layer_builder import coloring, diffs, io
+from mitre_attack_navigator_layer_builder.coloring import DiffColorScheme
+from mitre_attack_navigator_layer_builder.diffs import ADDED, CHANGED, REMOVED, UNCHANGED, TechniqueChange
+from mitre_attack_navigator_layer_builder.layers import Layer, Technique
+
+
+class DiffTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.a = Layer(name='a', techniques=[
+            Technique('T1001', score=1, color='red'),
+            Technique('T1002', score=1),
+            Technique('T1003', tactic='execution', score=1, comment='x'),
+            Technique('T1003', tactic='persistence', score=1),
+        ])
+        self.b = Layer(name='b', techniques=[
+            Technique('T1004', score=1),
+            Technique('T1003', tactic='execution', score=2, comment='y', enabled=False),
+            Technique('T1002', score=1),
+            Technique('T1001', score=1, color='#ff0000'),
+        ])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_iter_technique_changes(self):
+        changes = list(diffs.iter_technique_changes(self.a, self.b))
+        self.assertEqual([(change.technique_id, change.tactic, change.change) for change in changes], [
+            ('T1003', 'execution', CHANGED),
+            ('T1003', 'persistence', REMOVED),
+            ('T1004', None, ADDED),
+        ])
+        self.assertEqual(changes[0].fields, {'score': (1, 2), 'comment': ('x', 'y'), 'enabled': (True, False)})
+
+        # Colours are compared by value (i.e., "red" and "#ff0000" are the same colour).
+        changes = list(diffs.iter_technique_changes(self.a, self.b, include_unchanged=True))
+        self.assertEqual([change.change for change in changes], [UNCHANGED, UNCHANGED, CHANGED, REMOVED, ADDED])
+
+    def test_calculate_field_diff(self):
+        color_scheme = DiffColorScheme()
+        layer, changes = diffs.calculate_field_diff(self.a, self.b, color_scheme=color_scheme)
+        self.assertEqual(len(changes), 3)
+        self.assertEqual(layer.get_technique('T1004').color, coloring.get_hex_color_value(color_scheme.right_color))
+        self.assertEqual(layer.get_technique('T1003', tactic='persistence').color, coloring.get_hex_color_value(color_scheme.left_color))
+
+        technique = layer.get_technique('T1003', tactic='execution')
+        self.assertEqual(technique.color, coloring.get_hex_color_value(color_scheme.changed_color))
+        self.assertIn("score: 1 → 2", technique.comment)
+
+    def test_diff_layer_directories(self):
+        a = os.path.join(self.tmp.name, 'a')
+        b = os.path.join(self.tmp.name, 'b')
+        for path, layer in [
+            (os.path.join(a, 'x.json'), self.a),
+            (os.path.join(b, 'x.json'), self.b),
+            (os.path.join(a, 'only-a.json'), self.a),
+            (os.path.join(b, 'nested', 'y.json'), self.b),
+            (os.path.join(a, 'same.json'), self.a),
+            (os.path.join(b, 'same.json'), self.a),
+        ]:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            io.write_layer(layer, path)
+
+        output_dir = os.path.join(self.tmp.name, 'diffs')
+        fp = _io.StringIO()
+        total = diffs.diff_layer_directories(a, b, output_dir=output_dir, changes=fp)
+        self.assertEqual(total, 3 + 4 + 4)
+
+        rows = [json.loads(line) for line in fp.getvalue().splitlines()]
+        self.assertEqual({row['path'] for row in rows}, {'x.json', 'only-a.json', os.path.join('nested', 'y.json')})
+        self.assertEqual({row['change'] for row in rows if row['path'] == 'only-a.json'}, {REMOVED})
+
+        self.assertTrue(os.path.exists(os.path.join(output_dir, 'nested', 'y.json')))
+        self.assertFalse(os.path.exists(os.path.join(output_dir, 'same.json')))
+
+    def test_to_dict(self):
+        change = TechniqueChange('T1001', None, CHANGED, fields={'score': (1, 2)}, path='x.json')
+        self.assertEqual(change.to_dict(), {'path': 'x.json', 'techniqueID': 'T1001', 'tactic': None, 'change': CHANGED, 'fields': {'score': [1, 2]}})
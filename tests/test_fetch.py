@@ -0,0 +1,175 @@
+import email.utils
+import gzip
+import http.server
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import requests
+
+from mitre_attack_navigator_layer_builder import fetch, io
+from mitre_attack_navigator_layer_builder.fetch import HTTPCache
+from tests.bundles import new_attack_bundle
+
+
+class BundleServer(http.server.ThreadingHTTPServer):
+    """
+    A local stand-in for a server hosting STIX 2 bundles which supports `ETag` and `Last-Modified` validators.
+    """
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), BundleRequestHandler)
+        self.bundles = {}
+        self.requests = []
+        self.use_etags = True
+        self.delay = 0
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+
+class BundleRequestHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        time.sleep(self.server.delay)
+        bundle = self.server.bundles.get(self.path)
+        if bundle is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        body, version = bundle
+        etag = f'"{version}"'
+        last_modified = email.utils.formatdate(1700000000 + version, usegmt=True)
+        if self.server.use_etags and self.headers.get('If-None-Match') == etag or \
+                not self.server.use_etags and self.headers.get('If-Modified-Since') == last_modified:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if self.server.use_etags:
+            self.send_header('ETag', etag)
+        else:
+            self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HTTPCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.server = BundleServer()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+        self.bundle = new_attack_bundle(total_techniques=5)
+        self.set_bundle('/enterprise-attack.json', self.bundle, version=1)
+        self.url = self.server.url + '/enterprise-attack.json'
+        self.cache = HTTPCache(directory=self.tmp.name)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def set_bundle(self, path: str, bundle: dict, version: int) -> None:
+        self.server.bundles[path] = (json.dumps(bundle).encode('utf-8'), version)
+
+    def get_validators(self):
+        return [headers.get('If-None-Match') or headers.get('If-Modified-Since') for _, headers in self.server.requests]
+
+    def test_revalidation_with_etags(self):
+        self.assertEqual(self.cache.get_stix2_objects(self.url), self.bundle['objects'])
+        self.assertEqual(self.cache.get_stix2_objects(self.url), self.bundle['objects'])
+        self.assertEqual(self.get_validators(), [None, '"1"'])
+
+        bundle = new_attack_bundle(total_techniques=2)
+        self.set_bundle('/enterprise-attack.json', bundle, version=2)
+        self.assertEqual(self.cache.get_stix2_objects(self.url), bundle['objects'])
+        self.assertEqual(self.cache.get_stix2_objects(self.url), bundle['objects'])
+        self.assertEqual(self.get_validators(), [None, '"1"', '"1"', '"2"'])
+
+    def test_revalidation_with_last_modified(self):
+        self.server.use_etags = False
+        self.cache.get(self.url)
+        self.cache.get(self.url)
+        self.assertEqual(self.get_validators(), [None, email.utils.formatdate(1700000001, usegmt=True)])
+
+    def test_bodies_are_compressed(self):
+        body = self.cache.get(self.url)
+        (path,) = [os.path.join(self.tmp.name, name) for name in os.listdir(self.tmp.name) if name.endswith('.gz')]
+        with gzip.open(path, mode='rb') as fp:
+            self.assertEqual(fp.read(), body)
+        self.assertLess(os.path.getsize(path), len(body))
+
+    def test_offline_mode(self):
+        offline = HTTPCache(directory=self.tmp.name, offline=True)
+        with self.assertRaises(FileNotFoundError):
+            offline.get(self.url)
+
+        self.cache.get(self.url)
+        self.assertEqual(offline.get_stix2_objects(self.url), self.bundle['objects'])
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_cached_copy_is_used_if_server_is_unreachable(self):
+        self.cache.get(self.url)
+        self.server.shutdown()
+        self.server.server_close()
+        self.assertEqual(self.cache.get_stix2_objects(self.url), self.bundle['objects'])
+
+        with self.assertRaises(requests.RequestException):
+            self.cache.get(self.server.url + '/missing.json')
+
+    def test_invalidate(self):
+        self.cache.get(self.url)
+        self.assertEqual(self.cache.invalidate(self.url), 2)
+        self.cache.get(self.url)
+        self.assertEqual(self.get_validators(), [None, None])
+
+    def test_get_stix2_data_source_from_url(self):
+        src = io.get_stix2_data_source_from_url(self.url, http_cache=self.cache)
+        self.assertEqual(len(src.query([io.STIX2Filter('type', '=', 'attack-pattern')])), 15)
+
+    def test_taxii_requests_use_settings(self):
+        calls = []
+
+        class Session(requests.Session):
+            def get(self, url, **kwargs):
+                calls.append(kwargs)
+                raise requests.ConnectionError(url)
+
+        # TAXII requests are sent using the shared session.
+        session, fetch._session = fetch._session, Session()
+        try:
+            cache = HTTPCache(directory=self.tmp.name, verify_tls_certificate_chain=False, timeout=5)
+            with self.assertRaises(requests.ConnectionError):
+                cache.get_stix2_objects(self.server.url + '/taxii2/api/collections/x/')
+        finally:
+            fetch._session = session
+
+        self.assertTrue(calls)
+        self.assertTrue(all(kwargs['verify'] is False and kwargs['timeout'] == 5 for kwargs in calls))
+
+    def test_get_stix2_data_source_from_url_verifies_tls_certificate_chain(self):
+        settings = []
+
+        class Cache(HTTPCache):
+            def get_stix2_objects(self, url):
+                settings.append(self.verify_tls_certificate_chain)
+                return super().get_stix2_objects(url)
+
+        # The setting of the cache is used unless it's overridden, and the cache itself isn't modified.
+        cache = Cache(directory=self.tmp.name)
+        for verify_tls_certificate_chain in [None, False, True]:
+            io.get_stix2_data_source_from_url(self.url, verify_tls_certificate_chain=verify_tls_certificate_chain, http_cache=cache)
+        self.assertEqual(settings, [True, False, True])
+        self.assertTrue(cache.verify_tls_certificate_chain)
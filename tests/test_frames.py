@@ -0,0 +1,60 @@
+import os
+import unittest
+
+from mitre_attack_navigator_layer_builder import frames, io, layers
+from mitre_attack_navigator_layer_builder.coloring import GradientColorScheme, LabeledColorScheme
+from mitre_attack_navigator_layer_builder.constants import SUM
+from mitre_attack_navigator_layer_builder.layers import Layer
+
+
+LAYERS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples", "layers"
+)
+
+LAYER_PATHS = [os.path.join(LAYERS_DIR, f"{name}.json") for name in ["fin7", "muddywater", "oilrig"]]
+
+
+class LayerFrameTests(unittest.TestCase):
+    def setUp(self):
+        self.layers = list(map(io.read_layer, LAYER_PATHS))
+
+    def test_round_trip(self):
+        frame = frames.LayerFrame.from_layers(self.layers)
+        self.assertEqual(len(frame), sum(len(layer.techniques) for layer in self.layers))
+        self.assertEqual(frame.to_layers(), self.layers)
+
+    def test_bulk_edits(self):
+        frame = frames.LayerFrame.from_layers(self.layers).drop_comments().disable_deselected_techniques()
+        for layer, expected in zip(frame.to_layers(), self.layers):
+            expected.drop_comments().disable_deselected_techniques()
+            self.assertEqual(layer, expected)
+
+    def test_aggregate_scores(self):
+        frame = frames.LayerFrame.from_layers(self.layers).reset_scores(1)
+        df = frame.aggregate_scores(SUM)
+        scores = dict(zip(df['techniqueID'], df['score']))
+
+        expected = {}
+        for layer in self.layers:
+            for technique in layer.reset_scores(1).techniques:
+                if technique.is_selected():
+                    expected[technique.id] = expected.get(technique.id, 0) + 1
+        self.assertEqual(scores, expected)
+
+    def test_apply_gradient_color_scheme(self):
+        layer = Layer().select_techniques(['T1003'], color=None, score=1).select_techniques(['T1059'], color=None, score=2)
+        frame = frames.LayerFrame.from_layer(layer).apply_color_scheme(GradientColorScheme(min_color='#000000', max_color='#ffffff'))
+        self.assertEqual(frame.to_layer().get_colors(), ['#000000', '#7f7f7f'])
+
+    def test_apply_color_scheme_to_enabled_techniques(self):
+        layer = Layer().select_techniques(['T1003'], color='#ff0000', score=1).select_techniques(['T1059'], color=None, score=2)
+        layer.deselect_techniques(['T1059'], disable=True)
+        frame = frames.LayerFrame.from_layer(layer)
+
+        # Disabled techniques keep their colours (and their scores aren't used to scale the gradient).
+        recolored = frame.apply_color_scheme(GradientColorScheme(min_color='#000000', max_color='#ffffff')).to_layer()
+        self.assertEqual([technique.color for technique in recolored.techniques], ['#000000', None])
+
+        recolored = frame.apply_color_scheme(LabeledColorScheme({'T1003': '#00ff00', 'T1059': '#0000ff'})).to_layer()
+        self.assertEqual([technique.color for technique in recolored.techniques], ['#00ff00', None])
+        self.assertEqual(recolored.__dict__(), layers.apply_color_scheme(layer, LabeledColorScheme({'T1003': '#00ff00', 'T1059': '#0000ff'})).__dict__())
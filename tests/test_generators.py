@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import unittest
+
+from click.testing import CliRunner
+
+from mitre_attack_navigator_layer_builder import coloring, generators, io, util
+from mitre_attack_navigator_layer_builder.catalog import AttackCatalog
+from mitre_attack_navigator_layer_builder.cli import main_group
+from mitre_attack_navigator_layer_builder.coloring import SingleColorScheme
+from tests.bundles import new_attack_bundle
+
+
+class GeneratorTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bundle = new_attack_bundle(total_techniques=20, revoked_technique_ids=['T1000'])
+        self.catalog = AttackCatalog.from_bundle(self.bundle)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def get_expected_technique_ids(self, external_id: str) -> set:
+        source = self.catalog.get_by_external_id(external_id)
+        return {
+            self.catalog.get_external_id(o['target_ref']) for o in self.bundle['objects']
+            if o['type'] == 'relationship' and o['source_ref'] == source['id'] and o['relationship_type'] == 'uses'
+        } - {'T1000'}
+
+    def test_iter_entity_layers(self):
+        rows = dict(generators.iter_entity_layers(self.catalog, color_scheme=SingleColorScheme('red')))
+        self.assertEqual(sorted(rows), sorted([f'G{i:04}' for i in range(5)] + [f'S{i:04}' for i in range(5)] + ['C0000', 'C0001']))
+
+        for external_id, layer in rows.items():
+            self.assertEqual(layer.get_selected_technique_ids(), self.get_expected_technique_ids(external_id))
+            self.assertTrue(layer.name.endswith(f'({external_id})'))
+            self.assertTrue(layer.links[0].url.endswith(external_id))
+
+        technique = rows['G0001'].techniques[0]
+        self.assertEqual(technique.color, coloring.get_hex_color_value('red'))
+        self.assertIn('uses', technique.comment)
+        self.assertEqual(technique.links[0].label, technique.techniqueID)
+
+    def test_iter_entity_layers_by_type(self):
+        rows = dict(generators.iter_entity_layers(self.catalog, entity_types=[generators.CAMPAIGN]))
+        self.assertEqual(sorted(rows), ['C0000', 'C0001'])
+
+    def test_write_layers(self):
+        rows = list(generators.iter_entity_layers(self.catalog))
+        for path, jobs in [('layers', 1), ('layers.jsonl', 1), ('layers.jsonl.gz', 2), ('parallel', 2)]:
+            path = os.path.join(self.tmp.name, path)
+            self.assertEqual(io.write_layers(iter(rows), path, jobs=jobs, chunk_size=5), len(rows))
+            if os.path.isdir(path):
+                result = [io.read_layer(os.path.join(path, f'{name}.json')) for name, _ in rows]
+            else:
+                result = list(io.iter_layers_from_jsonl(path))
+            self.assertEqual([layer.get_selected_technique_ids() for layer in result], [layer.get_selected_technique_ids() for _, layer in rows])
+            self.assertEqual([layer.name for layer in result], [layer.name for _, layer in rows])
+
+    def test_write_layers_generates_chunks_lazily(self):
+        rows = list(generators.iter_entity_layers(self.catalog))
+        generated = []
+
+        def iter_rows():
+            for row in rows:
+                generated.append(row)
+                yield row
+
+        # Chunks are only generated a bounded number of chunks ahead of the results (two per worker).
+        results = util.map_chunks(len, iter_rows(), jobs=2, chunk_size=1)
+        next(results)
+        self.assertLessEqual(len(generated), 5)
+        self.assertEqual(1 + sum(results), len(rows))
+
+        path = os.path.join(self.tmp.name, 'layers.jsonl')
+        self.assertEqual(io.write_layers(iter_rows(), path, jobs=2, chunk_size=1), len(rows))
+
+    def test_generate_command(self):
+        path = os.path.join(self.tmp.name, 'bundle.json')
+        with open(path, 'w') as fp:
+            json.dump(self.bundle, fp)
+        output = os.path.join(self.tmp.name, 'layers')
+
+        result = CliRunner().invoke(main_group, ['generate', '-s', path, '-o', output, '--type', 'intrusion-set'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(sorted(os.listdir(output)), [f'G{i:04}.json' for i in range(5)])
@@ -0,0 +1,37 @@
+import os
+import unittest
+
+from mitre_attack_navigator_layer_builder import io, layers
+
+
+LAYERS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples", "layers"
+)
+
+LAYER_PATHS = [os.path.join(LAYERS_DIR, f"{name}.json") for name in ["fin7", "muddywater", "oilrig"]]
+
+
+class HeatmapTests(unittest.TestCase):
+    def test_calculate_heatmap_from_files(self):
+        expected = layers.calculate_heatmap(list(map(io.read_layer, LAYER_PATHS)))
+        result = io.calculate_heatmap_from_files(os.path.join(LAYERS_DIR, "[fmo]*.json"))
+
+        self.assertEqual(result.get_scores(), expected.get_scores())
+        self.assertEqual(result.technique_ids, expected.technique_ids)
+        self.assertEqual(result.gradient, expected.gradient)
+
+    def test_calculate_heatmap_from_files_in_parallel(self):
+        expected = io.calculate_heatmap_from_files(LAYER_PATHS)
+        result = io.calculate_heatmap_from_files(LAYER_PATHS, jobs=2, chunk_size=1)
+
+        self.assertEqual(result.get_scores(), expected.get_scores())
+
+
+class MergeTests(unittest.TestCase):
+    def test_merge_layer_files(self):
+        inputs = list(map(io.read_layer, LAYER_PATHS))
+        for merge_strategy in layers.MERGE_STRATEGIES:
+            expected = layers.merge_layers(inputs, merge_strategy)
+            result = io.merge_layer_files(LAYER_PATHS, merge_strategy, jobs=2, chunk_size=2)
+            self.assertEqual(result.get_selected_technique_ids(), expected.get_selected_technique_ids(), merge_strategy)
+            self.assertEqual(result.technique_ids, expected.technique_ids, merge_strategy)
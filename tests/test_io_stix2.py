@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+import unittest
+
+from mitre_attack_navigator_layer_builder import io
+from tests.bundles import new_attack_bundle
+
+
+class IterStix2ObjectsTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bundle = new_attack_bundle(revoked_technique_ids=['T1001'], deprecated_technique_ids=['T1002.001'])
+
+        self.path = os.path.join(self.tmp.name, 'bundle.json')
+        with open(self.path, 'w') as fp:
+            json.dump(self.bundle, fp)
+
+        # A directory of single-object bundles (e.g., a mitre/cti checkout).
+        self.directory = os.path.join(self.tmp.name, 'cti')
+        for o in self.bundle['objects']:
+            subdirectory = os.path.join(self.directory, o['type'])
+            os.makedirs(subdirectory, exist_ok=True)
+            with open(os.path.join(subdirectory, f"{o['id']}.json"), 'w') as fp:
+                json.dump({'type': 'bundle', 'id': 'bundle--1', 'objects': [o]}, fp)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def get_ids(self, rows) -> set:
+        return {o['id'] for o in rows}
+
+    def test_raw_mode_matches_data_source(self):
+        for kwargs in [
+            {},
+            {'include_revoked_objects': True},
+            {'include_deprecated_objects': True, 'include_revoked_objects': True},
+            {'types': ['attack-pattern']},
+            {'queries': ['type = attack-pattern']},
+            {'queries': ['type = relationship', 'relationship_type = uses']},
+        ]:
+            expected = self.get_ids(io.iter_stix2_objects(self.path, **kwargs))
+            self.assertEqual(self.get_ids(io.iter_stix2_objects(self.path, raw=True, **kwargs)), expected, kwargs)
+            self.assertEqual(self.get_ids(io.iter_stix2_objects(self.directory, raw=True, **kwargs)), expected, kwargs)
+
+    def test_raw_mode_returns_bundle_objects(self):
+        rows = list(io.iter_stix2_objects(self.path, raw=True, types=['attack-pattern']))
+        self.assertEqual(len(rows), 148)
+        self.assertEqual(rows[0], next(o for o in self.bundle['objects'] if o['type'] == 'attack-pattern'))
+
+    def test_directory_type_pushdown(self):
+        os.chmod(os.path.join(self.directory, 'relationship'), 0)
+        try:
+            rows = list(io.iter_stix2_objects(self.directory, raw=True, types=['attack-pattern']))
+        finally:
+            os.chmod(os.path.join(self.directory, 'relationship'), 0o755)
+        self.assertEqual(len(rows), 148)
+
+
+class GetStix2DataSourceFromDirectoryTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bundle = new_attack_bundle(total_techniques=10)
+        for o in self.bundle['objects']:
+            subdirectory = os.path.join(self.tmp.name, o['type'])
+            os.makedirs(subdirectory, exist_ok=True)
+            with open(os.path.join(subdirectory, f"{o['id']}.json"), 'w') as fp:
+                json.dump({'type': 'bundle', 'id': 'bundle--1', 'objects': [o]}, fp)
+
+        # A newer version of an object in a different file.
+        o = dict(self.bundle['objects'][0], modified='2025-01-01T00:00:00.000Z', name='Renamed')
+        with open(os.path.join(self.tmp.name, 'newer.json'), 'w') as fp:
+            json.dump({'type': 'bundle', 'id': 'bundle--2', 'objects': [o]}, fp)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parallel_load(self):
+        for jobs, chunk_size in [(1, 256), (1, 7), (2, 7)]:
+            store = io.get_stix2_data_source_from_directory(self.tmp.name, memory=True, jobs=jobs, chunk_size=chunk_size)
+            self.assertEqual({o['id'] for o in store.query()}, {o['id'] for o in self.bundle['objects']})
+
+            versions = store.get(self.bundle['objects'][0]['id'])
+            self.assertEqual(versions['name'], 'Renamed')
+            self.assertEqual(len(store.all_versions(self.bundle['objects'][0]['id'])), 2)
+
+    def test_objects_are_parsed_on_demand(self):
+        src = io.get_stix2_data_source(self.tmp.name, jobs=2, chunk_size=7)
+        self.assertIsInstance(src, io.RawMemorySource)
+        self.assertEqual(len(src), len(self.bundle['objects']) + 1)
+
+        techniques = src.query([io.STIX2Filter('type', '=', 'attack-pattern')])
+        self.assertEqual(len(techniques), 30)
+        self.assertNotIsInstance(techniques[0], dict)
+        self.assertIs(src.get(techniques[0]['id']), techniques[0])
+        self.assertIsNone(src.get('attack-pattern--00000000-0000-4000-8000-000000000000'))
@@ -0,0 +1,264 @@
+import pickle
+import tracemalloc
+import unittest
+
+from mitre_attack_navigator_layer_builder import layers, vectors
+from mitre_attack_navigator_layer_builder.catalog import AttackCatalog
+from mitre_attack_navigator_layer_builder.layers import CompactTechnique, Layer, Link, Technique
+from mitre_attack_navigator_layer_builder.universe import TechniqueUniverse
+from tests.bundles import new_attack_bundle
+
+
+class LayerTests(unittest.TestCase):
+    def test_select_techniques(self):
+        layer = Layer(techniques=[Technique(techniqueID='T1003', enabled=False)])
+        layer.select_techniques(['T1003', 'T1059'], color='#ff0000', score=1)
+
+        self.assertEqual(layer.get_selected_technique_ids(), {'T1003', 'T1059'})
+        self.assertEqual(layer.get_scores(), {'T1003': 1, 'T1059': 1})
+        self.assertEqual(len(layer.techniques), 2)
+
+    def test_deselect_techniques(self):
+        layer = Layer().select_techniques(['T1003', 'T1059'], color='#ff0000')
+        layer.deselect_techniques({'T1003', 'T1105'}, reset_color=True, disable=True)
+
+        self.assertEqual(layer.get_selected_technique_ids(), {'T1059'})
+        self.assertEqual(layer.get_disabled_technique_ids(), {'T1003', 'T1105'})
+
+    def test_technique_index_tracks_direct_appends(self):
+        layer = Layer()
+        layer.techniques.append(Technique(techniqueID='T1003', tactic='credential-access', score=1))
+        layer.techniques.append(Technique(techniqueID='T1003', tactic='defense-evasion', score=2))
+
+        self.assertTrue(layer.has_technique('T1003'))
+        self.assertEqual(layer.get_technique('T1003', tactic='defense-evasion').score, 2)
+        self.assertEqual(len(layer.get_techniques(['T1003'])), 2)
+
+        layer.techniques = [Technique(techniqueID='T1059', score=1)]
+        self.assertFalse(layer.has_technique('T1003'))
+        self.assertEqual(layer.get_scores(['T1059', 'T1003']), {'T1059': 1})
+
+    def test_technique_index_tracks_in_place_replacements(self):
+        layer = Layer(techniques=[Technique('T1'), Technique('T2')])
+        self.assertTrue(layer.has_technique('T1'))
+
+        layer.techniques[0] = Technique('T3')
+        self.assertTrue(layer.has_technique('T3'))
+        self.assertFalse(layer.has_technique('T1'))
+
+        layer.techniques[1:] = [Technique('T4'), Technique('T5')]
+        self.assertEqual(layer.technique_ids, {'T3', 'T4', 'T5'})
+        self.assertEqual(len(layer.get_techniques(['T2', 'T4', 'T5'])), 2)
+
+        del layer.techniques[0]
+        layer.techniques.insert(0, Technique('T6', score=1))
+        self.assertEqual(layer.technique_ids, {'T4', 'T5', 'T6'})
+
+        layer.techniques.pop()
+        layer.techniques.reverse()
+        self.assertEqual(layer.technique_ids, {'T4', 'T6'})
+
+        # Changes made to a technique's ID in place require the index to be rebuilt explicitly.
+        layer.techniques[0].techniqueID = 'T7'
+        self.assertEqual(layer.reindex_techniques().technique_ids, {'T6', 'T7'})
+
+    def test_techniques_are_pickled_as_lists(self):
+        layer = pickle.loads(pickle.dumps(Layer(techniques=[Technique('T1003')])))
+        self.assertIsInstance(layer.techniques, layers.TechniqueList)
+        self.assertTrue(layer.has_technique('T1003'))
+
+
+class MergeTests(unittest.TestCase):
+    def setUp(self):
+        self.a = Layer(name='a').select_techniques(['T1003', 'T1059'], color='#ff0000')
+        self.b = Layer(name='b').select_techniques(['T1059', 'T1105'], color='#ff0000')
+        self.c = Layer(name='c').select_techniques(['T1059', 'T1105', 'T1566'], color='#ff0000')
+
+    def test_merge_two_layers(self):
+        for merge_strategy, expected in [
+            (layers.UNION, {'T1003', 'T1059', 'T1105'}),
+            (layers.INTERSECTION, {'T1003', 'T1059', 'T1105'}),
+            (layers.LEFT_DIFF, {'T1003'}),
+            (layers.RIGHT_DIFF, {'T1105'}),
+            (layers.SYMMETRIC_DIFF, {'T1003', 'T1105'}),
+        ]:
+            layer = layers.merge(self.a, self.b, merge_strategy)
+            self.assertEqual(layer.get_selected_technique_ids(), expected, merge_strategy)
+            self.assertEqual(layer.technique_ids, {'T1003', 'T1059', 'T1105'})
+
+        layer = layers.calculate_intersection(self.a, self.b)
+        self.assertEqual(layer.get_technique('T1059').color, '#ffe4e1')
+
+    def test_merge_layers(self):
+        for merge_strategy, expected in [
+            (layers.UNION, {'T1003', 'T1059', 'T1105', 'T1566'}),
+            (layers.INTERSECTION, {'T1059'}),
+            (layers.LEFT_DIFF, {'T1003'}),
+            (layers.RIGHT_DIFF, {'T1566'}),
+            (layers.SYMMETRIC_DIFF, {'T1003', 'T1059', 'T1566'}),
+        ]:
+            layer = layers.merge_layers([self.a, self.b, self.c], merge_strategy)
+            self.assertEqual(layer.get_selected_technique_ids(), expected, merge_strategy)
+
+
+    def test_layer_matrices_only_share_explicit_indexes(self):
+        self.assertIsNot(vectors.LayerMatrix.from_layers([self.a]).index, vectors.LayerMatrix.from_layers([self.a]).index)
+
+        index = vectors.TechniqueIndex()
+        a = vectors.LayerMatrix.from_layers([self.a, self.b], index=index)
+        b = vectors.LayerMatrix.from_layers([self.c], index=index)
+        self.assertIs(a.index, b.index)
+        self.assertEqual(set(b.index.get_technique_ids(b.get_present())), {'T1059', 'T1105', 'T1566'})
+
+        # Heatmaps only include the techniques of their own layers.
+        self.assertEqual(layers.calculate_heatmap([self.c]).technique_ids, {'T1059', 'T1105', 'T1566'})
+        self.assertEqual(layers.merge_layers_as_heatmap([self.c]).technique_ids, {'T1059', 'T1105', 'T1566'})
+
+
+class HeatmapAccumulatorTests(unittest.TestCase):
+    def test_add_remove_update(self):
+        a = Layer(name='a').select_techniques(['T1003', 'T1059'], color='#ff0000')
+        b = Layer(name='b').select_techniques(['T1059', 'T1105'], color='#ff0000')
+        c = Layer(name='c').select_techniques(['T1566'], color='#ff0000')
+
+        accumulator = layers.HeatmapAccumulator().add(a).add(b)
+        self.assertEqual(accumulator.get_layer().get_scores(), layers.calculate_heatmap([a, b]).get_scores())
+
+        accumulator.update(b, c)
+        expected = layers.calculate_heatmap([a, c])
+        result = accumulator.get_layer()
+        self.assertEqual(result.get_scores(), expected.get_scores())
+        self.assertEqual(result.technique_ids, expected.technique_ids)
+
+        with self.assertRaises(ValueError):
+            accumulator.remove(b)
+
+        restored = layers.HeatmapAccumulator.from_dict(accumulator.to_dict())
+        self.assertEqual(restored.get_layer(), result)
+
+    def test_remove_rejects_mismatched_layers(self):
+        for added, removed in [
+            (Technique('T1', score=1), Technique('T1')),
+            (Technique('T1'), Technique('T1', score=1)),
+        ]:
+            accumulator = layers.HeatmapAccumulator().add(Layer(techniques=[added]))
+            expected = accumulator.to_dict()
+            with self.assertRaises(ValueError):
+                accumulator.remove(Layer(techniques=[removed]))
+            with self.assertRaises(ValueError):
+                accumulator.update(Layer(techniques=[removed]), Layer(techniques=[Technique('T2', score=1)]))
+            self.assertEqual(accumulator.to_dict(), expected)
+
+
+class CompactTechniqueTests(unittest.TestCase):
+    def test_compact_layer(self):
+        layer = Layer().select_techniques(['T1003', 'T1059'], color='#ff0000', score=1)
+        layer.deselect_techniques(['T1105'], disable=True)
+        expected = layer.__dict__()
+
+        layers.compact_layer(layer)
+        self.assertTrue(all(isinstance(technique, CompactTechnique) for technique in layer.techniques))
+        self.assertEqual(layer.get_selected_technique_ids(), {'T1003', 'T1059'})
+        self.assertEqual(layer.__dict__(), {**expected, 'techniques': [{**t, 'metadata': (), 'links': ()} for t in expected['techniques']]})
+
+    def test_mutate_compact_layer(self):
+        layer = layers.compact_layer(Layer().select_techniques(['T1003'], color='#ff0000'))
+        layer.select_techniques(['T1059'], color='blue', score=1)
+        layer.deselect_techniques(['T1105'], disable=True)
+        layers.add_missing_techniques(layer, TechniqueUniverse.from_technique_ids(layer.domain, None, ['T1003', 'T1134']))
+        self.assertEqual([type(technique) for technique in layer.techniques], [CompactTechnique] * 4)
+
+        # Colours assigned to existing techniques are interned too.
+        layer.select_techniques(['T1003'], color=''.join(['#', '0000ff']))
+        self.assertIs(layer.get_technique('T1003').color, layer.get_technique('T1059').color)
+
+    def test_memory_budget(self):
+        total = 10000
+        technique_ids = [f'T{1000 + i % 800}' for i in range(total)]
+
+        tracemalloc.start()
+        try:
+            techniques = [CompactTechnique(techniqueID=''.join(technique_id), tactic='defense-evasion', color='#ff0000', score=1) for technique_id in technique_ids]
+            size, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(len(techniques), total)
+        self.assertLess(size / total, layers.COMPACT_TECHNIQUE_MEMORY_BUDGET)
+
+
+class EnrichmentTests(unittest.TestCase):
+    def setUp(self):
+        self.bundle = new_attack_bundle(total_techniques=10)
+        self.catalog = AttackCatalog.from_bundle(self.bundle)
+        self.details = self.catalog.get_technique_details()
+
+    def test_enrich_layer(self):
+        layer = Layer(techniques=[
+            Technique('T1001', score=1),                                # Two tactics.
+            Technique('T1002', tactic='defense-evasion', score=2),      # Already has a tactic.
+            Technique('T1003', score=3),                                # Two tactics, one of which is already present.
+            Technique('T1003', tactic=self.details['T1003'].tactics[0], score=4),
+            Technique('T9999', score=5),                                # Unknown.
+        ])
+        layers.enrich_layer(layer, self.catalog)
+
+        tactics = self.details['T1001'].tactics
+        self.assertEqual(len(tactics), 2)
+        self.assertEqual([(t.techniqueID, t.tactic, t.score) for t in layer.techniques], [
+            ('T1001', tactics[0], 1),
+            ('T1001', tactics[1], 1),
+            ('T1002', 'defense-evasion', 2),
+            ('T1003', self.details['T1003'].tactics[1], 3),
+            ('T1003', self.details['T1003'].tactics[0], 4),
+            ('T9999', None, 5),
+        ])
+        self.assertEqual(len(layer.get_techniques(['T1001'])), 2)
+
+        technique = layer.techniques[0]
+        self.assertEqual(technique.links, [Link(label='T1001', url='https://attack.mitre.org/techniques/T1001')])
+        self.assertEqual({item.name: item.value for item in technique.metadata}, {
+            'name': 'Technique T1001', 
+            'platforms': 'Windows, Linux', 
+            'data sources': 'Process: Process Creation',
+        })
+        self.assertIsNot(layer.techniques[0].metadata, layer.techniques[1].metadata)
+
+        # Enrichment is idempotent.
+        expected = layer.__dict__()
+        layers.enrich_layer(layer, self.catalog)
+        self.assertEqual(layer.__dict__(), expected)
+
+    def test_enrich_layer_merges_untacticked_techniques(self):
+        tactics = self.details['T1000'].tactics
+        self.assertEqual(len(tactics), 1)
+
+        # Every tactic of T1000 is already present, so the untacticked entry is merged rather than dropped.
+        layer = Layer(techniques=[
+            Technique('T1000', score=5, color='#ff0000', comment='keep'),
+            Technique('T1000', tactic=tactics[0], score=1),
+        ])
+        layers.enrich_layer(layer, self.catalog)
+        self.assertEqual([(t.tactic, t.score, t.color, t.comment) for t in layer.techniques], [
+            (tactics[0], 1, '#ff0000', 'keep'),
+        ])
+
+        layer = Layer(techniques=[
+            Technique('T1000', tactic=tactics[0], comment='a'),
+            Technique('T1000', score=5, comment='b'),
+        ])
+        layers.enrich_layer(layer, self.catalog)
+        self.assertEqual([(t.tactic, t.score, t.comment) for t in layer.techniques], [(tactics[0], 5, 'a\nb')])
+
+    def test_enrich_compact_layer(self):
+        layer = layers.compact_layer(Layer(techniques=[Technique('T1001', score=1)]))
+        layers.enrich_layer(layer, self.bundle['objects'])
+        self.assertEqual(len(layer.techniques), 2)
+        self.assertTrue(all(isinstance(technique.metadata, tuple) for technique in layer.techniques))
+
+    def test_add_missing_tactic_shortnames(self):
+        tactics = [o for o in self.bundle['objects'] if o['type'] == 'x-mitre-tactic']
+        techniques = [o for o in self.bundle['objects'] if o['type'] == 'attack-pattern']
+        layer = layers.add_missing_tactic_shortnames(Layer(techniques=[Technique('T1001', score=1)]), tactics, techniques)
+        self.assertEqual([t.tactic for t in layer.techniques], list(self.details['T1001'].tactics))
+        self.assertTrue(all(not t.links and not t.metadata for t in layer.techniques))
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+
+from mitre_attack_navigator_layer_builder import io
+from mitre_attack_navigator_layer_builder.catalog import AttackCatalog
+from mitre_attack_navigator_layer_builder.constants import AVG, MITRE_ATTACK_TACTICS, SUM
+from mitre_attack_navigator_layer_builder.layers import Layer, Link, Technique, Versions
+from mitre_attack_navigator_layer_builder.migrations import RemapTable, migrate_layer, migrate_layer_files
+from tests.bundles import new_attack_bundle, new_relationship, new_stix2_id
+
+
+def new_collection(version: str) -> dict:
+    return {
+        'type': 'x-mitre-collection',
+        'id': new_stix2_id('x-mitre-collection', version),
+        'name': 'Enterprise ATT&CK',
+        'x_mitre_version': version,
+    }
+
+
+class MigrationTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+        source = new_attack_bundle(total_techniques=5)
+        source['objects'].append(new_collection('14.1'))
+
+        # T1001 is revoked by T1004, which is in turn revoked by T1000, and T1002 is deprecated.
+        target = new_attack_bundle(total_techniques=6, revoked_technique_ids=['T1001', 'T1004'], deprecated_technique_ids=['T1002'])
+        target['objects'] += [
+            new_collection('15.1'),
+            new_relationship(new_stix2_id('attack-pattern', 'T1001'), 'revoked-by', new_stix2_id('attack-pattern', 'T1004')),
+            new_relationship(new_stix2_id('attack-pattern', 'T1004'), 'revoked-by', new_stix2_id('attack-pattern', 'T1000')),
+        ]
+        self.table = RemapTable.from_catalogs(AttackCatalog.from_bundle(source), AttackCatalog.from_bundle(target))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def new_layer(self) -> Layer:
+        return Layer(
+            name='test',
+            versions=Versions(attack='14.1'),
+            techniques=[
+                Technique('T1000', score=10, color='#ff0000', comment='a', links=[Link(label='a', url='https://example.com/a')]),
+                Technique('T1001', tactic=MITRE_ATTACK_TACTICS[1]['x_mitre_shortname'], score=50, color='#0000ff', comment='b'),
+                Technique('T1002', score=5),
+                Technique('T1003', score=20),
+                Technique('T1004', score=30, links=[Link(label='a', url='https://example.com/a')]),
+            ],
+        )
+
+    def test_remap_table(self):
+        self.assertEqual((self.table.source_version, self.table.target_version), ('14.1', '15.1'))
+        self.assertEqual(self.table.remaps, {'T1001': ['T1000'], 'T1002': [], 'T1004': ['T1000']})
+        self.assertEqual(self.table.get_technique_ids('T1003'), ['T1003'])
+
+    def test_migrate_layer(self):
+        layer = migrate_layer(self.new_layer(), self.table)
+        self.assertEqual(layer.versions.attack, '15.1')
+        self.assertEqual([technique.techniqueID for technique in layer.techniques], ['T1000', 'T1003'])
+
+        # The tactic of T1001 doesn't apply to T1000, so it's dropped and the techniques are merged.
+        technique = layer.techniques[0]
+        self.assertIsNone(technique.tactic)
+        self.assertEqual(technique.score, 50)
+        self.assertEqual(technique.color, '#0000ff')
+        self.assertEqual(technique.comment, 'a\nb')
+        self.assertEqual(len(technique.links), 1)
+
+    def test_migrate_layer_with_combine_rule(self):
+        layer = migrate_layer(self.new_layer(), self.table, combine=SUM)
+        self.assertEqual(layer.techniques[0].score, 90)
+
+        # Averages aren't rounded (i.e., scores may be fractional).
+        layer = migrate_layer(self.new_layer(), self.table, combine=AVG)
+        self.assertEqual(layer.techniques[0].score, 30)
+
+        layer = self.new_layer()
+        layer.techniques[0].score, layer.techniques[1].score, layer.techniques[4].score = 0.2, 0.4, None
+        self.assertAlmostEqual(migrate_layer(layer, self.table, combine=AVG).techniques[0].score, 0.3)
+
+        with self.assertRaises(ValueError):
+            migrate_layer(self.new_layer(), self.table, combine='median')
+
+    def test_migrate_layer_files(self):
+        input_dir = os.path.join(self.tmp.name, 'input')
+        for name in ['a.json', 'nested/b.json']:
+            path = os.path.join(input_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            io.write_layer(self.new_layer(), path)
+
+        output_dir = os.path.join(self.tmp.name, 'output')
+        self.assertEqual(migrate_layer_files(input_dir, output_dir, self.table, jobs=2, chunk_size=1), 2)
+
+        layer = io.read_layer(os.path.join(output_dir, 'nested', 'b.json'))
+        self.assertEqual(layer.versions.attack, '15.1')
+        self.assertEqual(layer.get_selected_technique_ids(), {'T1000', 'T1003'})
@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from mitre_attack_navigator_layer_builder import offsets
+from mitre_attack_navigator_layer_builder.offsets import BundleOffsetIndex, MappedBundle
+from tests.bundles import new_attack_bundle
+
+
+class MappedBundleTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'bundle.json')
+        self.bundle = new_attack_bundle(total_techniques=10, revoked_technique_ids=['T1001'])
+        self.bundle['objects'][0]['description'] = 'Non-ASCII: é中'
+        with open(self.path, 'w', encoding='utf-8') as fp:
+            json.dump(self.bundle, fp, indent=2, ensure_ascii=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_get(self):
+        with MappedBundle(self.path) as bundle:
+            self.assertEqual(len(bundle), len(self.bundle['objects']))
+            for o in self.bundle['objects']:
+                self.assertIn(o['id'], bundle)
+                self.assertEqual(bundle.get(o['id']), o)
+            self.assertIsNone(bundle.get('attack-pattern--00000000-0000-0000-0000-000000000000'))
+
+    def test_get_by_external_id_and_type(self):
+        with MappedBundle(self.path) as bundle:
+            self.assertEqual(bundle.get_by_external_id('T1002.001')['name'], 'Technique T1002.001')
+            self.assertIsNone(bundle.get_by_external_id('T9999'))
+            self.assertEqual(len(bundle.get_objects('attack-pattern')), 30)
+
+    def test_index_is_persisted_and_rebuilt_when_stale(self):
+        index = offsets.get_offset_index(self.path)
+        self.assertTrue(os.path.exists(offsets.get_offset_index_path(self.path)))
+        self.assertEqual(offsets.read_offset_index(self.path), index)
+
+        with open(self.path, 'w') as fp:
+            json.dump(new_attack_bundle(total_techniques=2), fp)
+        self.assertIsNone(offsets.read_offset_index(self.path))
+        self.assertEqual(len(offsets.get_offset_index(self.path).ids_by_type['attack-pattern']), 6)
+
+    def test_index_is_written_atomically(self):
+        index = BundleOffsetIndex.build(self.path)
+        with mock.patch('os.replace', side_effect=OSError("Disk full")):
+            with self.assertRaisesRegex(OSError, "Disk full"):
+                offsets.write_offset_index(index, self.path)
+        self.assertEqual(os.listdir(self.tmp.name), ['bundle.json'])
+
+    def test_compressed_bundles_are_not_supported(self):
+        with self.assertRaises(ValueError):
+            BundleOffsetIndex.build(self.path + '.gz')
@@ -0,0 +1,82 @@
+import unittest
+
+from mitre_attack_navigator_layer_builder import pivots
+from mitre_attack_navigator_layer_builder.layers import Layer, Technique
+from mitre_attack_navigator_layer_builder.pivots import ATTACK, CAPEC, CVE, CWE, NIST_CSF, NIST_SP_800_53, PivotGraph
+from tests.bundles import new_attack_object, new_relationship, new_stix2_id
+
+CAPEC_MARKING = 'marking-definition--17d82bb2-eeeb-4898-bda5-3ddbcd2b799d'
+
+
+def new_capec_attack_pattern(capec_id: str, cwe_ids: list, technique_ids: list) -> dict:
+    references = [{'source_name': 'capec', 'external_id': capec_id}]
+    references += [{'source_name': 'cwe', 'external_id': cwe_id} for cwe_id in cwe_ids]
+    references += [{'source_name': 'ATTACK', 'external_id': technique_id} for technique_id in technique_ids]
+    return {
+        'type': 'attack-pattern',
+        'id': new_stix2_id('attack-pattern', capec_id),
+        'name': capec_id,
+        'object_marking_refs': [CAPEC_MARKING],
+        'external_references': references,
+    }
+
+
+def new_nist_control(control_id: str) -> dict:
+    return {
+        'type': 'course-of-action',
+        'id': new_stix2_id('course-of-action', control_id),
+        'name': control_id,
+        'external_references': [{'source_name': 'NIST 800-53 Revision 5', 'external_id': control_id}],
+    }
+
+
+class PivotGraphTests(unittest.TestCase):
+    def setUp(self):
+        techniques = [new_attack_object('attack-pattern', technique_id, technique_id) for technique_id in ['T1190', 'T1059', 'T1003']]
+        techniques[2]['external_references'].append({'source_name': 'capec', 'external_id': 'CAPEC-3'})
+        controls = [new_nist_control('AC-2'), new_nist_control('SI-4')]
+        self.objects = techniques + controls + [
+            {'type': 'vulnerability', 'id': 'vulnerability--1', 'external_references': [{'source_name': 'cve', 'external_id': 'CVE-2024-0001'}, {'source_name': 'cwe', 'external_id': 'CWE-89'}]},
+            new_capec_attack_pattern('CAPEC-66', ['CWE-89'], ['1190']),
+            new_capec_attack_pattern('CAPEC-88', ['CWE-78', 'CWE-89'], ['T1059']),
+            new_capec_attack_pattern('CAPEC-3', ['CWE-20'], []),
+            new_relationship(controls[0]['id'], 'mitigates', techniques[0]['id']),
+            new_relationship(controls[1]['id'], 'mitigates', techniques[0]['id']),
+            new_relationship(controls[1]['id'], 'mitigates', techniques[2]['id']),
+        ]
+        self.graph = PivotGraph.from_stix2_objects(self.objects)
+
+    def test_get_reachable(self):
+        self.assertEqual(self.graph.get_reachable('CWE-89', ATTACK), {'T1190', 'T1059'})
+        self.assertEqual(self.graph.get_reachable('CVE-2024-0001', ATTACK), {'T1190', 'T1059'})
+        self.assertEqual(self.graph.get_reachable('CVE-2024-0001', NIST_SP_800_53), {'AC-2', 'SI-4'})
+        self.assertEqual(self.graph.get_reachable('CWE-20', NIST_SP_800_53), {'SI-4'})
+        self.assertEqual(self.graph.get_reachable('T1190', CVE), {'CVE-2024-0001'})
+        self.assertEqual(self.graph.get_reachable('SI-4', CWE), {'CWE-89', 'CWE-20'})
+        self.assertEqual(self.graph.get_reachable('CWE-404', ATTACK), set())
+
+    def test_closures_are_rebuilt_after_changes(self):
+        self.assertEqual(self.graph.get_reachable('AC-2', NIST_CSF), set())
+        self.graph.add_edge('PR.AA-05', NIST_CSF, 'AC-2', NIST_SP_800_53)
+        self.assertEqual(self.graph.get_reachable('CWE-89', NIST_CSF), {'PR.AA-05'})
+
+    def test_edges_can_be_provided(self):
+        graph = PivotGraph(kinds={'CWE-89': CWE}, edges={})
+        graph.add_edge('CWE-89', CWE, 'CAPEC-66', CAPEC).add_edge('CAPEC-66', CAPEC, 'T1190', ATTACK)
+        self.assertEqual(graph.get_reachable('CWE-89', ATTACK), {'T1190'})
+
+    def test_invalid_edges(self):
+        with self.assertRaises(ValueError):
+            self.graph.add_edge('CWE-1', CWE, 'CWE-2', CWE)
+        with self.assertRaises(ValueError):
+            self.graph.add_edge('CWE-89', CAPEC, 'T1190', ATTACK)
+
+    def test_get_layer_pivots(self):
+        layer = Layer(techniques=[Technique('T1003', score=1), Technique('T1059')])
+        self.assertEqual(self.graph.get_layer_pivots(layer, NIST_SP_800_53), {'SI-4'})
+        self.assertEqual(self.graph.get_layer_pivots(layer, CWE), {'CWE-20'})
+
+    def test_iter_pivot_layers(self):
+        rows = dict(pivots.iter_pivot_layers(self.graph, CWE))
+        self.assertEqual(sorted(rows), ['CWE-20', 'CWE-78', 'CWE-89'])
+        self.assertEqual(rows['CWE-89'].get_selected_technique_ids(), {'T1190', 'T1059'})
@@ -0,0 +1,78 @@
+import io
+import json
+import os
+import unittest
+
+import dacite
+
+from mitre_attack_navigator_layer_builder import layers, serialization, util
+from mitre_attack_navigator_layer_builder.util import JSONEncoder
+from mitre_attack_navigator_layer_builder.layers import CompactTechnique, Layer
+
+
+LAYERS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples", "layers"
+)
+
+LAYER_PATHS = [os.path.join(LAYERS_DIR, name) for name in sorted(os.listdir(LAYERS_DIR))]
+
+
+class DecoderTests(unittest.TestCase):
+    def test_decode_layer(self):
+        for path in LAYER_PATHS:
+            o = util.read_json_file(path)
+            expected = dacite.from_dict(data_class=Layer, data=o)
+            for strict in [False, True]:
+                self.assertEqual(serialization.decode_layer(o, strict=strict), expected, path)
+
+    def test_decode_compact_layer(self):
+        o = util.read_json_file(LAYER_PATHS[0])
+        layer = serialization.decode_layer(o, compact=True)
+        self.assertTrue(all(isinstance(technique, CompactTechnique) for technique in layer.techniques))
+        self.assertEqual([t.to_technique() for t in layer.techniques], dacite.from_dict(data_class=Layer, data=o).techniques)
+
+    def test_decode_layer_with_dividers(self):
+        o = {
+            'techniques': [{'techniqueID': 'T1003', 'metadata': [{'name': 'a', 'value': 'b'}, {'divider': True}], 'links': [{'label': 'a', 'url': 'b'}]}],
+        }
+        self.assertEqual(serialization.decode_layer(o, strict=True), dacite.from_dict(data_class=Layer, data=o))
+
+    def test_strict_validation(self):
+        for o in [
+            {'name': 1},
+            {'techniques': [{'tactic': 'execution'}]},
+            {'techniques': [{'techniqueID': 'T1003', 'score': 'high'}]},
+            {'techniques': [{'techniqueID': 'T1003', 'links': 'https://attack.mitre.org'}]},
+        ]:
+            with self.assertRaises(ValueError):
+                serialization.decode_layer(o, strict=True)
+
+
+class EncoderTests(unittest.TestCase):
+    def get_layers(self):
+        for path in LAYER_PATHS:
+            yield serialization.decode_layer(util.read_json_file(path))
+
+        layer = Layer(name='Ünïcode', description=None).select_techniques(['T1003'], color='#ff0000', score=1)
+        layer.techniques[0].metadata.extend([layers.MetadataItem(name='a', value='b'), layers.Divider()])
+        yield layer
+        yield Layer(techniques=[])
+
+    def test_encode_layer(self):
+        for layer in self.get_layers():
+            data = util.prune_dict(layer.__dict__())
+            self.assertEqual(serialization.encode_layer(layer), json.dumps(data, cls=JSONEncoder, indent=4))
+            self.assertEqual(serialization.encode_layer(layer, indent=2), json.dumps(data, cls=JSONEncoder, indent=2))
+            self.assertEqual(serialization.encode_layer(layer, indent=None), json.dumps(data, cls=JSONEncoder, separators=(',', ':')))
+
+    def test_encode_compact_layer(self):
+        for layer in self.get_layers():
+            expected = serialization.encode_layer(layer)
+            self.assertEqual(serialization.encode_layer(layers.compact_layer(layer)), expected)
+
+    def test_dump_layer(self):
+        layer = next(self.get_layers())
+        text, binary = io.StringIO(), io.BytesIO()
+        serialization.dump_layer(layer, text)
+        serialization.dump_layer(layer, binary)
+        self.assertEqual(binary.getvalue().decode('ascii'), text.getvalue())
@@ -0,0 +1,90 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from mitre_attack_navigator_layer_builder import io
+from mitre_attack_navigator_layer_builder.layers import Layer, Technique
+from mitre_attack_navigator_layer_builder.snapshots import SnapshotSeries, get_snapshot_date
+from mitre_attack_navigator_layer_builder.vectors import TechniqueIndex
+
+# Scores of T1001, T1002, and T1003 in each daily snapshot (None = missing from the snapshot).
+SNAPSHOTS = {
+    '2024-01-01': [1, None, None],
+    '2024-01-02': [2, 0, None],
+    '2024-01-03': [3, 4, None],
+    '2024-01-04': [None, 4, None],
+}
+
+
+class SnapshotSeriesTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = TechniqueIndex(['T1001', 'T1002', 'T1003'])
+
+        # Snapshots are written out of order to check that they're sorted by date.
+        for date, scores in reversed(SNAPSHOTS.items()):
+            layer = Layer(name=date)
+            for technique_id, score in zip(self.index.technique_ids, scores):
+                if score is not None:
+                    layer.techniques.append(Technique(technique_id, tactic='execution', score=score))
+                    layer.techniques.append(Technique(technique_id, tactic='persistence', score=score // 2))
+            layer.techniques.append(Technique('T9999', score=100))
+            io.write_layer(layer, os.path.join(self.tmp.name, f'coverage-{date}.json'))
+
+        self.series = SnapshotSeries.from_files(self.tmp.name, self.index, jobs=2, chunk_size=1)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_from_files(self):
+        self.assertEqual([str(date) for date in self.series.dates], list(SNAPSHOTS))
+        self.assertEqual(self.series.scores.tolist(), [[1, 0, 0], [2, 0, 0], [3, 4, 0], [0, 4, 0]])
+        self.assertEqual(self.series.selected[:, 1].tolist(), [False, False, True, True])
+
+    def test_deltas_and_moving_averages(self):
+        self.assertEqual(self.series.get_deltas()[:, 0].tolist(), [1, 1, -3])
+        self.assertEqual(self.series.get_moving_averages(2)[:, 0].tolist(), [1.5, 2.5, 1.5])
+        self.assertEqual(self.series.get_moving_averages(5).shape, (0, 3))
+
+    def test_first_and_last_seen(self):
+        self.assertEqual([str(date) for date in self.series.get_first_seen()], ['2024-01-01', '2024-01-03', 'NaT'])
+        self.assertEqual([str(date) for date in self.series.get_last_seen()], ['2024-01-03', '2024-01-04', 'NaT'])
+
+    def test_tactic_coverage(self):
+        names, counts = self.series.get_tactic_coverage({'TA0002': ['T1001', 'T1002'], 'TA0003': ['T1003']})
+        self.assertEqual(names, ['TA0002', 'TA0003'])
+        self.assertEqual(counts.tolist(), [[1, 0], [1, 0], [2, 0], [1, 0]])
+
+        df = self.series.get_tactic_summary({'TA0002': ['T1001', 'T1002'], 'TA0003': ['T1003']})
+        self.assertEqual(len(df), 8)
+        self.assertEqual(df['coverage'].to_list()[:4], [0.5, 0, 0.5, 0])
+
+    def test_trend_layers(self):
+        layer = self.series.get_delta_layer()
+        self.assertEqual(layer.get_scores(), {'T1001': -1, 'T1002': 4})
+        self.assertEqual((layer.gradient.minValue, layer.gradient.maxValue), (-1, 4))
+
+        layer = self.series.get_moving_average_layer(2)
+        self.assertEqual(layer.get_scores(), {'T1001': 2, 'T1002': 4})
+
+    def test_summary(self):
+        df = self.series.get_summary(window=2)
+        row = df.row(0, named=True)
+        self.assertEqual(row['techniqueID'], 'T1001')
+        self.assertEqual((row['first_seen'], row['last_seen']), (datetime.date(2024, 1, 1), datetime.date(2024, 1, 3)))
+        self.assertEqual((row['snapshots_selected'], row['delta'], row['moving_average']), (3, -1, 1.5))
+        self.assertIsNone(df.row(2, named=True)['first_seen'])
+
+    def test_negative_scores(self):
+        layer = Layer(techniques=[Technique('T1001', tactic='execution', score=-5), Technique('T1001', tactic='persistence', score=-2), Technique('T1002', score=-1, enabled=False)])
+        path = os.path.join(self.tmp.name, 'coverage-2024-01-05.json')
+        io.write_layer(layer, path)
+
+        series = SnapshotSeries.from_files(path, self.index)
+        self.assertEqual(series.scores.tolist(), [[-2, -1, 0]])
+
+    def test_get_snapshot_date(self):
+        self.assertEqual(get_snapshot_date('coverage-20240131.json'), np.datetime64('2024-01-31'))
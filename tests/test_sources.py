@@ -0,0 +1,72 @@
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from mitre_attack_navigator_layer_builder import sources
+from mitre_attack_navigator_layer_builder.fetch import HTTPCache
+from tests.bundles import new_attack_bundle, new_attack_object
+from tests.test_fetch import BundleServer
+
+
+class LoadAttackCatalogTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.server = BundleServer()
+        self.server.delay = 0.5
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.enterprise = new_attack_bundle(total_techniques=5)
+        technique = next(o for o in self.enterprise['objects'] if o['type'] == 'attack-pattern')
+        self.capec = {'type': 'bundle', 'id': 'bundle--2', 'objects': [
+            new_attack_object('course-of-action', 'M1000', 'Mitigation'),
+            dict(technique, modified='2025-01-01T00:00:00.000Z', name='Renamed'),
+        ]}
+        self.server.bundles['/enterprise-attack.json'] = (json.dumps(self.enterprise).encode('utf-8'), 1)
+        self.server.bundles['/capec.json'] = (json.dumps(self.capec).encode('utf-8'), 1)
+
+        self.path = os.path.join(self.tmp.name, 'bundle.json')
+        with open(self.path, 'w') as fp:
+            json.dump(new_attack_bundle(total_techniques=60), fp)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def test_load_attack_catalog(self):
+        urls = [self.server.url + '/enterprise-attack.json', self.server.url + '/capec.json']
+        start = time.perf_counter()
+        catalog, timings = sources.load_attack_catalog(urls + [self.path], http_cache=HTTPCache(directory=os.path.join(self.tmp.name, 'http')))
+        duration = time.perf_counter() - start
+
+        # Both URLs are fetched concurrently.
+        self.assertLess(duration, 2 * self.server.delay)
+        self.assertEqual([timing.source for timing in timings], urls + [self.path])
+        self.assertEqual([timing.total_objects for timing in timings], [len(self.enterprise['objects']), 2, len(new_attack_bundle(total_techniques=60)['objects'])])
+        for timing in timings[:2]:
+            self.assertGreaterEqual(timing.duration, self.server.delay)
+
+        self.assertEqual(catalog.get_technique('T1000')['name'], 'Renamed')
+        self.assertIsNotNone(catalog.get_by_external_id('M1000'))
+        self.assertEqual(len(catalog.get_technique_ids()), 180)
+        self.assertEqual(len(catalog), len({o['id'] for o in catalog}))
+
+    def test_load_without_http_cache(self):
+        # Compressed bundles are fetched directly rather than being treated as TAXII collections, and files are parsed by a pool of processes.
+        self.server.delay = 0
+        self.server.bundles['/enterprise-attack.json.gz'] = (gzip.compress(json.dumps(self.enterprise).encode('utf-8')), 1)
+        other = os.path.join(self.tmp.name, 'other.json')
+        with open(other, 'w') as fp:
+            json.dump(self.capec, fp)
+
+        catalog, timings = sources.load_attack_catalog([self.server.url + '/enterprise-attack.json.gz', self.path, other], jobs=2)
+        self.assertEqual([timing.total_objects for timing in timings], [len(self.enterprise['objects']), len(new_attack_bundle(total_techniques=60)['objects']), 2])
+        self.assertEqual(catalog.get_technique('T1000')['name'], 'Renamed')
+
+    def test_load_nothing(self):
+        catalog, timings = sources.load_attack_catalog([])
+        self.assertEqual((len(catalog), timings), (0, []))
@@ -0,0 +1,49 @@
+import gzip
+import io as _io
+import json
+import os
+import tempfile
+import unittest
+
+from mitre_attack_navigator_layer_builder import io, streaming
+from tests.bundles import new_attack_bundle
+
+
+class StreamingTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bundle = new_attack_bundle(total_techniques=10)
+        self.path = os.path.join(self.tmp.name, 'bundle.json')
+        with open(self.path, 'w') as fp:
+            json.dump(self.bundle, fp, indent=4)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_iter_bundle_objects(self):
+        for chunk_size in [1, 13, 4096]:
+            self.assertEqual(list(streaming.iter_bundle_objects(self.path, chunk_size=chunk_size)), self.bundle['objects'])
+
+    def test_iter_gzip_compressed_bundle_objects(self):
+        path = self.path + '.gz'
+        with gzip.open(path, mode='wt') as fp:
+            json.dump(self.bundle, fp)
+        self.assertEqual(list(streaming.iter_bundle_objects(path, chunk_size=97)), self.bundle['objects'])
+
+    def test_iter_json_array_items(self):
+        s = '{"type": "bundle", "n": 12345, "x": {"objects": [1]}, "objects": [{"a": "\\u00e9"}, {"b": [1, 2]}], "y": null}'
+        rows = list(streaming.iter_json_array_items(_io.StringIO(s), key='objects', chunk_size=2))
+        self.assertEqual([o for _, _, o in rows], [{'a': 'é'}, {'b': [1, 2]}])
+        for offset, length, o in rows:
+            self.assertEqual(json.loads(s[offset:offset + length]), o)
+
+    def test_empty_and_invalid_bundles(self):
+        self.assertEqual(list(streaming.iter_json_array_items(_io.StringIO('{}'), key='objects')), [])
+        self.assertEqual(list(streaming.iter_json_array_items(_io.StringIO('{"objects": []}'), key='objects')), [])
+        for s in ['[]', '{"objects": [{"a": 1}', '{"objects": [{"a": 1} {"b": 2}]}']:
+            with self.assertRaises(ValueError):
+                list(streaming.iter_json_array_items(_io.StringIO(s), key='objects', chunk_size=4))
+
+    def test_read_stix2_bundle(self):
+        ids = {o['id'] for o in io.read_stix2_bundle(self.path, stream=True)}
+        self.assertEqual(ids, {o['id'] for o in self.bundle['objects']})
@@ -0,0 +1,87 @@
+import concurrent.futures
+import threading
+import unittest
+
+from mitre_attack_navigator_layer_builder import layers
+from mitre_attack_navigator_layer_builder.catalog import AttackCatalog
+from mitre_attack_navigator_layer_builder.constants import MITRE_ATTACK_ENTERPRISE, MITRE_ATTACK_MOBILE
+from mitre_attack_navigator_layer_builder.layers import Layer, Technique, Versions
+from mitre_attack_navigator_layer_builder.universe import TechniqueUniverse, TechniqueUniverseProvider, get_attack_release_url
+from tests.bundles import new_attack_bundle
+
+
+class TechniqueUniverseTests(unittest.TestCase):
+    def setUp(self):
+        self.loads = []
+        self.catalogs = {
+            '14.1': AttackCatalog.from_bundle(new_attack_bundle(total_techniques=5, deprecated_technique_ids=['T1004'])),
+            '15.1': AttackCatalog.from_bundle(new_attack_bundle(total_techniques=6)),
+        }
+        self.provider = TechniqueUniverseProvider(load=self.load, max_size=2)
+
+    def load(self, domain: str, version: str) -> AttackCatalog:
+        self.loads.append((domain, version))
+        return self.catalogs[version or '15.1']
+
+    def test_universe(self):
+        universe = TechniqueUniverse.from_catalog(self.catalogs['14.1'], MITRE_ATTACK_ENTERPRISE)
+        self.assertEqual(len(universe), 14)
+        self.assertNotIn('T1004', universe)
+        self.assertEqual(list(universe.technique_ids), sorted(universe.technique_ids))
+        self.assertEqual(universe.get_missing_technique_ids(Layer(techniques=[Technique('T1000')]))[:2], ['T1000.001', 'T1000.002'])
+
+        # Techniques outside of the domain are excluded.
+        self.assertEqual(len(TechniqueUniverse.from_catalog(self.catalogs['14.1'], MITRE_ATTACK_MOBILE)), 0)
+
+    def test_provider(self):
+        a = self.provider.get(MITRE_ATTACK_ENTERPRISE, '14.1')
+        self.assertIs(self.provider.get(MITRE_ATTACK_ENTERPRISE, '14.1'), a)
+        self.assertEqual(len(self.provider.get(MITRE_ATTACK_ENTERPRISE, '15.1')), 18)
+        self.assertEqual(self.loads, [(MITRE_ATTACK_ENTERPRISE, '14.1'), (MITRE_ATTACK_ENTERPRISE, '15.1')])
+
+        # The least recently used universe is evicted.
+        self.provider.get(MITRE_ATTACK_ENTERPRISE, '14.1')
+        self.provider.get(MITRE_ATTACK_ENTERPRISE, None)
+        self.assertEqual(len(self.provider), 2)
+        self.provider.get(MITRE_ATTACK_ENTERPRISE, '14.1')
+        self.provider.get(MITRE_ATTACK_ENTERPRISE, '15.1')
+        self.assertEqual(self.loads[-1], (MITRE_ATTACK_ENTERPRISE, '15.1'))
+        self.assertEqual(len(self.loads), 4)
+
+    def test_provider_loads_each_universe_once(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def load(domain: str, version: str) -> AttackCatalog:
+            started.set()
+            release.wait()
+            return self.load(domain, version)
+
+        provider = TechniqueUniverseProvider(load=load)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(provider.get, MITRE_ATTACK_ENTERPRISE, '14.1')]
+            started.wait()
+            futures += [executor.submit(provider.get, MITRE_ATTACK_ENTERPRISE, '14.1') for _ in range(3)]
+            release.set()
+            universes = [future.result() for future in futures]
+
+        self.assertEqual(self.loads, [(MITRE_ATTACK_ENTERPRISE, '14.1')])
+        self.assertTrue(all(universe is universes[0] for universe in universes))
+
+    def test_add_missing_techniques(self):
+        rows = [
+            Layer(versions=Versions(attack='14.1'), techniques=[Technique('T1000', score=1)]),
+            Layer(versions=Versions(attack='14.1')),
+            Layer(versions=Versions(attack='15.1')),
+        ]
+        for layer in rows:
+            layers.add_missing_techniques(layer, self.provider, enable=False)
+
+        self.assertEqual([len(layer.techniques) for layer in rows], [14, 14, 18])
+        self.assertEqual(rows[0].get_selected_technique_ids(), {'T1000'})
+        self.assertTrue(all(technique.enabled is False for technique in rows[1].techniques))
+        self.assertIsNot(rows[1].techniques[0], rows[0].techniques[1])
+        self.assertEqual(len(self.loads), 2)
+
+    def test_get_attack_release_url(self):
+        self.assertTrue(get_attack_release_url(MITRE_ATTACK_ENTERPRISE, '15.1').endswith('/enterprise-attack/enterprise-attack-15.1.json'))